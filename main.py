@@ -1,37 +1,93 @@
+import argparse
+import contextlib
+import os
+import sys
+import zlib
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import cartopy.crs as ccrs
-import cartopy.feature as cfeature
 from datetime import datetime, timedelta
 
+SCRIPTS_DIR = Path(__file__).resolve().parent / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import neo_grids
+from nasa_simulator import VARIABLES, RegionSeries, draw_normal, simulate_batch
+from region_cache import RegionDataCache, RegionEntry
+from density_raster import DEFAULT_BINS as DENSITY_BINS, rasterize
+from map_animation import BasemapCache, basemap_axes, write_frames
+from region_registry import RegionRegistry
+from sai_ensemble import ensemble_summary
+from sai_formula import (COMPONENTS as ACTIVITY_COMPONENTS, NOISE_SIGMA, WEIGHTS as SAI_WEIGHTS,
+                         front_saturation, productivity_response, temperature_preference)
+from streaming_stats import QuantileSketch, RunningCovariance, RunningMoments
+
+DATA_SOURCES = ('simulated', 'neo')
+FRAME_FORMATS = ('.parquet', '.json', '.csv')
+PLOT_MODES = ('auto', 'scatter', 'density')
+DENSITY_MIN_ROWS = 50_000
+
+BASE_REGIONS = {
+    'gulf_stream': (35.0, -75.0),
+    'california_current': (32.0, -118.0),
+    'great_barrier_reef': (-18.0, 147.0),
+    'hawaii': (21.0, -157.0),
+    'south_africa': (-32.0, 18.0),
+    'galapagos': (-0.5, -91.0)
+}
+
 class SharkActivityModel:
-    def __init__(self):
-        # Base regions + custom
-        self.regions = {
-            'gulf_stream': (35.0, -75.0),
-            'california_current': (32.0, -118.0),
-            'great_barrier_reef': (-18.0, 147.0),
-            'hawaii': (21.0, -157.0),
-            'south_africa': (-32.0, 18.0),
-            'galapagos': (-0.5, -91.0)
-        }
-        self.custom_regions = {}
+    def __init__(self, data_source='simulated', neo_months=None, sampling='bilinear',
+                 seed=None, cache_size=4096):
+        """
+        data_source: 'simulated' — синтетические ряды, 'neo' — реальные месячные сетки NASA NEO
+        neo_months: список месяцев 'YYYY-MM' для режима 'neo' (по умолчанию все доступные)
+        sampling: 'bilinear' или 'nearest' для выборки из сеток
+        seed: зерно генератора (None — без воспроизводимости)
+        cache_size: сколько регионов держать в LRU-кэше collect_global_data
+        """
+        if data_source not in DATA_SOURCES:
+            raise ValueError(f"Неизвестный источник данных: {data_source} (ожидается один из {DATA_SOURCES})")
+        self.data_source = data_source
+        self.neo_months = neo_months
+        self.sampling = sampling
+        self.seed = seed
+        self.region_cache = RegionDataCache(cache_size)
+        self.basemap_cache = BasemapCache()
+        # Base regions + custom: колоночный реестр, словари — представления поверх него
+        self.registry = RegionRegistry()
+        coords = np.array(list(BASE_REGIONS.values()))
+        self.registry.add_many(list(BASE_REGIONS), coords[:, 0], coords[:, 1], custom=False)
+        self.regions = self.registry.view(custom=False)
+        self.custom_regions = self.registry.view(custom=True)
 
     def add_custom_location(self, name, lat, lon):
         """Добавление кастомного местоположения"""
-        self.custom_regions[name] = (lat, lon)
+        self.registry.add(name, lat, lon, custom=True)
         print(f"✅ Добавлена кастомная точка: {name} ({lat}, {lon})")
 
     def add_multiple_locations(self, locations_dict):
         """Добавление нескольких местоположений"""
-        for name, coords in locations_dict.items():
-            self.custom_regions[name] = coords
+        names = list(locations_dict)
+        coords = np.array([locations_dict[name] for name in names], dtype=float).reshape(-1, 2)
+        self.registry.add_many(names, coords[:, 0], coords[:, 1], custom=True)
         print(f"✅ Добавлено {len(locations_dict)} кастомных точек")
 
+    def add_locations_from_file(self, path, **columns):
+        """Массовая загрузка кастомных точек из CSV/Parquet (колонки name, lat, lon)"""
+        count = self.registry.add_from_file(path, custom=True, **columns)
+        print(f"✅ Загружено {count} кастомных точек из {path}")
+        return count
+
+    def regions_within(self, lat, lon, radius_km):
+        """Регионы в радиусе radius_km от точки (ближайшие первыми)"""
+        return self.registry.within_km(lat, lon, radius_km)
+
     def get_all_regions(self):
         """Получить все регионы (базовые + кастомные)"""
-        return {**self.regions, **self.custom_regions}
+        return self.registry.view()
 
     def display_mathematical_formulas(self):
         """Вывод всех математических формул модели"""
@@ -142,83 +198,263 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
 
         return formulas
 
-    def simulate_nasa_satellite_data(self, lat, lon, days=365):
-        """Симуляция спутниковых данных NASA"""
-        dates = pd.date_range(end=datetime.now(), periods=days, freq='D')
-
-        t = np.arange(days)
-        seasonal = np.sin(2 * np.pi * t / 365)
-
-        # Sea Surface Temperature (MODIS/Aqua)
-        sst_base = 15 + 10 * (1 + np.sin(np.radians(lat))) / 2
-        sst = sst_base + 5 * seasonal + np.random.normal(0, 1, days)
-
-        # Chlorophyll-a (Ocean Color)
-        chlor_base = 0.1 + 0.5 * np.abs(np.sin(np.radians(lat)))
-        chlorophyll = np.maximum(0.01, chlor_base + 0.3 * seasonal + np.random.normal(0, 0.1, days))
-
-        # Sea Level Anomaly (Jason-3)
-        sla = np.random.normal(0, 0.15, days) + 0.1 * seasonal
-
-        # Salinity (SMAP)
-        salinity = 35 + 2 * np.random.normal(0, 0.5, days)
+    def simulate_nasa_satellite_data(self, lat, lon, days=365, end=None, rng=None):
+        """Симуляция спутниковых данных NASA
+
+        rng: numpy.random.Generator (по умолчанию глобальный np.random).
+        Для многих регионов сразу используйте nasa_simulator.simulate_batch.
+        """
+        rng = rng if rng is not None else np.random
+        return simulate_batch([lat], [lon], days=days, end=end, rng=rng).to_long()
+
+    def available_neo_months(self):
+        """Месяцы, для которых есть и SST, и хлорофилл"""
+        return self.neo_months or sorted(
+            set(neo_grids.list_months('sst')) & set(neo_grids.list_months('chlorophyll'))
+        )
+
+    def sample_neo_series(self, lats, lons, rng=None):
+        """Выборка реальных месячных сеток NEO (SST, Chl-a) во всех точках одной векторной операцией
+
+        Возвращает RegionSeries с массивами (регионы, месяцы). SLA и солёность в архиве NEO
+        отсутствуют, поэтому они по-прежнему моделируются.
+        """
+        rng = rng if rng is not None else np.random
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        months = self.available_neo_months()
+        if not months:
+            raise FileNotFoundError("Не найдены месячные сетки NEO в data/raw")
+
+        shape = (len(lats), len(months))
+        # (месяцы, регионы) -> (регионы, месяцы)
+        sst = np.stack([
+            neo_grids.sample_points(neo_grids.load_month('sst', m), lats, lons, self.sampling) for m in months
+        ]).T
+        chlorophyll = np.stack([
+            neo_grids.sample_points(neo_grids.load_month('chlorophyll', m), lats, lons, self.sampling) for m in months
+        ]).T
+
+        seasonal = np.sin(2 * np.pi * np.arange(len(months)) / 12)
+        sla = draw_normal(rng, 0.15, shape) + 0.1 * seasonal
+        salinity = 35 + 2 * draw_normal(rng, 0.5, shape)
+
+        return RegionSeries(
+            dates=pd.DatetimeIndex(pd.to_datetime([f"{m}-01" for m in months])),
+            lat=lats, lon=lons,
+            values={'sst': sst.astype(float), 'chlorophyll': chlorophyll.astype(float),
+                    'sea_level_anomaly': sla, 'salinity': salinity}
+        )
+
+    def sample_neo_satellite_data(self, names, lats, lons, is_custom, rng=None):
+        """Длинная таблица NEO для всех регионов (см. sample_neo_series)"""
+        return self.sample_neo_series(lats, lons, rng=rng).to_long(names, is_custom)
+
+    @staticmethod
+    def activity_components(df):
+        """Ненормализованные компоненты SAI (формулы 2–4)"""
+        return {
+            # Температурная предпочтительность (формула 2)
+            'temp_pref': temperature_preference(df['sst']),
+            # Продуктивность с насыщением (формула 3)
+            'productivity': productivity_response(df['chlorophyll']),
+            # Фронты океана (формула 4)
+            'fronts': front_saturation(np.abs(df['sea_level_anomaly'])),
+        }
 
-        return pd.DataFrame({
-            'date': dates, 'lat': lat, 'lon': lon,
-            'sst': sst, 'chlorophyll': chlorophyll,
-            'sea_level_anomaly': sla, 'salinity': salinity
-        })
+    def accumulate_activity_stats(self, batches, stats=None):
+        """Потоковая статистика по батчам для архивов, не помещающихся в память
+
+        Возвращает словарь с RunningMoments для каждой компоненты SAI, QuantileSketch
+        для 'shark_activity' (если колонка есть) и RunningCovariance для матрицы корреляций.
+        Результаты воркеров объединяются через .merge().
+        """
+        if stats is None:
+            stats = {name: RunningMoments() for name in ACTIVITY_COMPONENTS}
+            stats['shark_activity'] = QuantileSketch()
+            stats['corr'] = RunningCovariance(['sst', 'chlorophyll', 'sea_level_anomaly', 'shark_activity'])
+        for batch in batches:
+            for name, values in self.activity_components(batch).items():
+                stats[name].update(values.to_numpy())
+            if 'shark_activity' in batch:
+                stats['shark_activity'].update(batch['shark_activity'].to_numpy())
+                stats['corr'].update_frame(batch)
+        return stats
+
+    def calculate_shark_activity(self, df, stats=None, noise=None):
+        """Расчет индекса активности акул на основе математических формул
+
+        stats: необязательные глобальные RunningMoments (см. accumulate_activity_stats),
+        позволяют считать батч с нормализацией по всему архиву.
+        noise: готовая реализация ε (по умолчанию — новая выборка N(0, 0.2))
+        """
+        components = self.activity_components(df)
 
-    def calculate_shark_activity(self, df):
-        """Расчет индекса активности акул на основе математических формул"""
         # Нормализация параметров (формула 5)
-        sst_norm = (df['sst'] - df['sst'].mean()) / df['sst'].std()
-        chlor_norm = (df['chlorophyll'] - df['chlorophyll'].mean()) / df['chlorophyll'].std()
-        sla_norm = (np.abs(df['sea_level_anomaly']) - np.abs(df['sea_level_anomaly']).mean()) / np.abs(df['sea_level_anomaly']).std()
-
-        # Температурная предпочтительность (формула 2)
-        temp_pref = np.exp(-0.5 * ((df['sst'] - 22) / 6) ** 2)
-        temp_pref_norm = (temp_pref - temp_pref.mean()) / temp_pref.std()
-
-        # Продуктивность с насыщением (формула 3)
-        productivity = np.log(1 + df['chlorophyll']) * (1 - np.exp(-df['chlorophyll'] / 0.3))
-        prod_norm = (productivity - productivity.mean()) / productivity.std()
-
-        # Фронты океана (формула 4)
-        fronts = np.abs(df['sea_level_anomaly']) / (0.1 + np.abs(df['sea_level_anomaly']))
-        fronts_norm = (fronts - fronts.mean()) / fronts.std()
+        normalized = {}
+        for name, values in components.items():
+            if stats is None:
+                mean, std = values.mean(), values.std()
+            else:
+                mean, std = stats[name].mean, stats[name].std()
+            normalized[name] = (values - mean) / std
 
         # Композитный индекс (формула 1)
-        shark_activity = (0.35 * temp_pref_norm +
-                         0.40 * prod_norm +
-                         0.25 * fronts_norm +
-                         np.random.normal(0, 0.2, len(df)))
+        w1, w2, w3 = SAI_WEIGHTS
+        shark_activity = (w1 * normalized['temp_pref'] +
+                         w2 * normalized['productivity'] +
+                         w3 * normalized['fronts'] +
+                         (np.random.normal(0, NOISE_SIGMA, len(df)) if noise is None else noise))
 
         return shark_activity
 
-    def collect_global_data(self):
-        """Сбор данных для всех регионов (базовых + кастомных)"""
-        all_data = []
-        all_regions = self.get_all_regions()
+    def calculate_shark_activity_ensemble(self, df, k=200, quantiles=(0.05, 0.5, 0.95),
+                                          threshold=None, stats=None, max_elements=2**24):
+        """Ансамбль Монте-Карло для шума ε: K реализаций SAI одной векторной операцией
+
+        Возвращает DataFrame (индекс как у df) со средним, стандартным отклонением,
+        квантилями и, если задан threshold, вероятностью превышения порога p_exceed.
+        Память ограничена max_elements значений (строки × K).
+        """
+        deterministic = self.calculate_shark_activity(df, stats=stats, noise=np.zeros(len(df)))
+        rng = np.random.default_rng(self.seed)
+        summary = ensemble_summary(deterministic.to_numpy(), k=k, quantiles=quantiles, threshold=threshold,
+                                   rng=rng, max_elements=max_elements)
+        return summary.to_frame(index=df.index)
+
+    def _region_rng(self, lat, lon):
+        """Генератор региона: при заданном seed зависит только от seed и координат"""
+        if self.seed is None:
+            return np.random.default_rng()
+        coord_key = zlib.crc32(f"{lat:.6f},{lon:.6f}".encode())
+        return np.random.default_rng([self.seed, coord_key])
+
+    def _fetch_region_entries(self, data_source, lats, lons, end, days):
+        """Загрузка/симуляция одним батчем только для регионов, которых нет в кэше"""
+        # С seed у каждого региона свой генератор — данные не зависят от состава батча
+        # и от того, какие регионы уже были в кэше (для обоих источников)
+        rng = ([self._region_rng(lat, lon) for lat, lon in zip(lats, lons)]
+               if self.seed is not None else np.random.default_rng())
+        if data_source == 'neo':
+            series = self.sample_neo_series(lats, lons, rng=rng)
+        else:
+            series = simulate_batch(lats, lons, days=days, end=end, rng=rng)
+
+        noise = draw_normal(rng, NOISE_SIGMA, series.shape)
+        dates = series.dates.values
+
+        # Моменты компонент SAI для каждого региона — по строкам массивов (регионы, даты),
+        # блоками регионов, чтобы временные массивы не росли с размером батча
+        n_regions = len(lats)
+        moments = {name: (np.zeros(n_regions), np.zeros(n_regions), np.zeros(n_regions))
+                   for name in ACTIVITY_COMPONENTS}
+        for start in range(0, n_regions, 4096):
+            block = {var: arr[start:start + 4096] for var, arr in series.values.items()}
+            for name, arr in self.activity_components(block).items():
+                count, mean, m2 = moments[name]
+                valid = np.isfinite(arr)
+                n = valid.sum(axis=1)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    mu = np.where(n > 0, np.where(valid, arr, 0.0).sum(axis=1) / n, 0.0)
+                count[start:start + 4096] = n
+                mean[start:start + 4096] = mu
+                m2[start:start + 4096] = np.where(valid, (arr - mu[:, None]) ** 2, 0.0).sum(axis=1)
+
+        # Копии строк, а не представления массивов батча: иначе запись в кэше держит в памяти
+        # весь батч (N, D), и вытеснение из RegionDataCache ничего не освобождает
+        return [
+            RegionEntry(
+                dates=dates,
+                values={var: series.values[var][i].copy() for var in VARIABLES},
+                noise=noise[i].copy(),
+                moments={name: RunningMoments.from_moments(c[i], mu[i], m2[i])
+                         for name, (c, mu, m2) in moments.items()},
+            )
+            for i in range(len(lats))
+        ]
+
+    def collect_global_data(self, data_source=None, days=365, refresh=False):
+        """Сбор данных для всех регионов (базовых + кастомных)
+
+        Данные регионов кэшируются по (lat, lon, источник, период, sampling для NEO, seed): повторный вызов
+        после добавления точки загружает только новые регионы, а глобальная нормализация
+        собирается слиянием сохранённых моментов. refresh=True сбрасывает кэш.
+        """
+        data_source = data_source or self.data_source
+        if data_source not in DATA_SOURCES:
+            raise ValueError(f"Неизвестный источник данных: {data_source} (ожидается один из {DATA_SOURCES})")
+        if refresh:
+            self.region_cache.clear()
+
+        names, lats, lons, is_custom = self.registry.columns()
+        end = pd.Timestamp.now().normalize()
+        if data_source == 'neo':
+            period = tuple(self.available_neo_months())
+        else:
+            period = (str(end.date()), days)
+        # Значения NEO зависят и от способа выборки из сетки (bilinear/nearest)
+        sampling = self.sampling if data_source == 'neo' else None
 
         print("📡 Загрузка спутниковых данных NASA...")
-        print(f"Всего регионов для обработки: {len(all_regions)}")
-
-        for region_name, (lat, lon) in all_regions.items():
-            print(f"   📍 Обработка: {region_name} ({lat:.1f}, {lon:.1f})")
-            region_data = self.simulate_nasa_satellite_data(lat, lon)
-            region_data['region'] = region_name
-            region_data['is_custom'] = region_name in self.custom_regions
-            all_data.append(region_data)
+        print(f"Всего регионов для обработки: {len(names)}")
+
+        keys = [(round(float(lat), 6), round(float(lon), 6), data_source, period, sampling, self.seed)
+                for lat, lon in zip(lats, lons)]
+        entries = [self.region_cache.get(key) for key in keys]
+        missing = np.array([i for i, entry in enumerate(entries) if entry is None], dtype=int)
+        if len(missing) < len(names):
+            print(f"   ♻️  Из кэша: {len(names) - len(missing)} регионов")
+
+        if len(missing):
+            print(f"   📍 Обработка новых регионов: {len(missing)}")
+            fetched = self._fetch_region_entries(data_source, lats[missing], lons[missing], end, days)
+            for i, entry in zip(missing, fetched):
+                entries[i] = entry
+                self.region_cache.put(keys[i], entry)
+
+        lengths = [len(entry.dates) for entry in entries]
+        global_data = pd.DataFrame({
+            'date': np.concatenate([entry.dates for entry in entries]),
+            'lat': np.repeat(lats, lengths), 'lon': np.repeat(lons, lengths),
+            **{var: np.concatenate([entry.values[var] for entry in entries]) for var in VARIABLES},
+            'region': np.repeat(names, lengths),
+            'is_custom': np.repeat(is_custom, lengths)
+        })
 
-        global_data = pd.concat(all_data, ignore_index=True)
-        global_data['shark_activity'] = self.calculate_shark_activity(global_data)
+        # Глобальная нормализация (формула 5) из моментов регионов
+        stats = {name: RunningMoments() for name in ACTIVITY_COMPONENTS}
+        for entry in entries:
+            for name in ACTIVITY_COMPONENTS:
+                stats[name].merge(entry.moments[name])
+        noise = np.concatenate([entry.noise for entry in entries])
+        global_data['shark_activity'] = self.calculate_shark_activity(global_data, stats=stats, noise=noise)
 
         print(f"✅ Данные собраны: {len(global_data)} записей")
         return global_data
 
-    def plot_relationships(self, data):
-        """Визуализация взаимосвязей с выделением кастомных точек"""
+    def plot_relationships(self, data, corr_matrix=None, show=True, mode='auto', bins=DENSITY_BINS):
+        """Визуализация взаимосвязей с выделением кастомных точек
+
+        corr_matrix: готовая матрица корреляций (например, stats['corr'].correlation_frame())
+        show: False — только вернуть фигуру, без plt.show() (для пакетного режима)
+        mode: 'scatter' — каждая точка отдельно, 'density' — растр средних значений цвета
+        по ячейкам bins=(nx, ny) через imshow (размер не зависит от числа строк),
+        'auto' — 'density' начиная с DENSITY_MIN_ROWS строк. Кастомные точки всегда поверх.
+        """
+        import matplotlib.pyplot as plt
+
+        if mode not in PLOT_MODES:
+            raise ValueError(f"Неизвестный режим: {mode} (ожидается один из {PLOT_MODES})")
+        if mode == 'auto':
+            mode = 'density' if len(data) >= DENSITY_MIN_ROWS else 'scatter'
+
+        def draw_base(ax, x, y, c, cmap):
+            if mode == 'scatter':
+                return ax.scatter(x, y, c=c, cmap=cmap, alpha=0.6, s=20)
+            raster = rasterize(x, y, c, bins=bins)
+            return ax.imshow(raster.mean, extent=raster.extent, origin='lower', aspect='auto',
+                             cmap=cmap, interpolation='nearest')
+
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
         fig.suptitle('Взаимосвязи между активностью акул и спутниковыми данными NASA\n(Жёлтые точки - кастомные местоположения)',
                     fontsize=14, fontweight='bold')
@@ -228,8 +464,8 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         custom_data = data[data['is_custom']]
 
         # 1. SST vs Shark Activity
-        sc1_base = axes[0,0].scatter(base_data['sst'], base_data['shark_activity'],
-                                    c=base_data['chlorophyll'], cmap='viridis', alpha=0.6, s=20)
+        sc1_base = draw_base(axes[0,0], base_data['sst'], base_data['shark_activity'],
+                             base_data['chlorophyll'], 'viridis')
         if len(custom_data) > 0:
             sc1_custom = axes[0,0].scatter(custom_data['sst'], custom_data['shark_activity'],
                                           c='yellow', alpha=0.8, s=60, edgecolors='black', label='Кастомные')
@@ -241,8 +477,8 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         plt.colorbar(sc1_base, ax=axes[0,0], label='Хлорофилл-а (mg/m³)')
 
         # 2. Chlorophyll vs Shark Activity
-        sc2_base = axes[0,1].scatter(base_data['chlorophyll'], base_data['shark_activity'],
-                                    c=base_data['sst'], cmap='plasma', alpha=0.6, s=20)
+        sc2_base = draw_base(axes[0,1], base_data['chlorophyll'], base_data['shark_activity'],
+                             base_data['sst'], 'plasma')
         if len(custom_data) > 0:
             axes[0,1].scatter(custom_data['chlorophyll'], custom_data['shark_activity'],
                             c='yellow', alpha=0.8, s=60, edgecolors='black')
@@ -253,8 +489,8 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         plt.colorbar(sc2_base, ax=axes[0,1], label='Температура (°C)')
 
         # 3. Sea Level Anomaly vs Shark Activity
-        sc3_base = axes[0,2].scatter(np.abs(base_data['sea_level_anomaly']), base_data['shark_activity'],
-                                    c=base_data['chlorophyll'], cmap='viridis', alpha=0.6, s=20)
+        sc3_base = draw_base(axes[0,2], np.abs(base_data['sea_level_anomaly']), base_data['shark_activity'],
+                             base_data['chlorophyll'], 'viridis')
         if len(custom_data) > 0:
             axes[0,2].scatter(np.abs(custom_data['sea_level_anomaly']), custom_data['shark_activity'],
                             c='yellow', alpha=0.8, s=60, edgecolors='black')
@@ -284,8 +520,9 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         ax2.legend(loc='upper right')
 
         # 5. Корреляционная матрица
-        corr_data = data[['sst', 'chlorophyll', 'sea_level_anomaly', 'shark_activity']]
-        corr_matrix = corr_data.corr()
+        if corr_matrix is None:
+            corr_data = data[['sst', 'chlorophyll', 'sea_level_anomaly', 'shark_activity']]
+            corr_matrix = corr_data.corr()
 
         im = axes[1,1].imshow(corr_matrix.values, cmap='coolwarm', vmin=-1, vmax=1, aspect='auto')
         axes[1,1].set_xticks(range(len(corr_matrix.columns)))
@@ -311,13 +548,13 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         axes[1,2].grid(True, alpha=0.3, axis='x')
 
         plt.tight_layout()
-        plt.show()
+        if show:
+            plt.show()
 
         return fig
 
-    def create_global_map(self, data):
-        """Создание глобальной карты с кастомными точками"""
-        region_avg = data.groupby('region').agg({
+    def _region_means(self, data):
+        return data.groupby('region').agg({
             'shark_activity': 'mean',
             'lat': 'first',
             'lon': 'first',
@@ -326,14 +563,26 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
             'is_custom': 'first'
         }).reset_index()
 
-        fig = plt.figure(figsize=(16, 10))
-        ax = plt.axes(projection=ccrs.PlateCarree())
-
-        ax.add_feature(cfeature.LAND, color='lightgray')
-        ax.add_feature(cfeature.COASTLINE, linewidth=0.5)
-        ax.add_feature(cfeature.BORDERS, linewidth=0.3)
-        ax.add_feature(cfeature.OCEAN, color='lightblue', alpha=0.3)
+    def _map_axes(self, fig, projection):
+        """Карта с кэшированной подложкой (суша, берега, границы, океан рисуются один раз)"""
+        basemap = self.basemap_cache.get(projection, figsize=tuple(fig.get_size_inches()), dpi=int(fig.dpi))
+        ax = basemap_axes(fig, basemap)
         ax.gridlines(draw_labels=True, linewidth=0.5, color='gray', alpha=0.5)
+        return ax
+
+    def create_global_map(self, data, show=True, projection='PlateCarree'):
+        """Создание глобальной карты с кастомными точками
+
+        Статическая подложка берётся из BasemapCache (память + outputs/basemaps/),
+        поверх рисуется только слой данных.
+        """
+        import matplotlib.pyplot as plt
+        import cartopy.crs as ccrs
+
+        region_avg = self._region_means(data)
+
+        fig = plt.figure(figsize=(16, 10))
+        ax = self._map_axes(fig, projection)
 
         # Разделение на базовые и кастомные точки
         base_points = region_avg[~region_avg['is_custom']]
@@ -373,16 +622,75 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
         ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
 
         plt.tight_layout()
-        plt.show()
+        if show:
+            plt.show()
 
         return fig
 
-    def generate_hotspot_predictions(self, data):
-        """Анализ горячих точек с учетом кастомных местоположений"""
+    def animate_global_map(self, data, output='outputs/sai_map_animation.gif', freq='M', fps=2,
+                           projection='PlateCarree', dpi=100):
+        """Анимация глобальной карты по периодам (по умолчанию — месяцы, как в архиве NEO)
+
+        Фигура, подложка, подписи и цветовая шкала создаются один раз, на каждом кадре
+        обновляются только цвета и размеры точек. output: .gif, .mp4 (нужен ffmpeg)
+        или каталог для последовательности PNG.
+        """
+        import cartopy.crs as ccrs
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        region_avg = self._region_means(data)
+        frames = data.assign(period=data['date'].dt.to_period(freq)).pivot_table(
+            index='period', columns='region', values=['shark_activity', 'chlorophyll'], aggfunc='mean')
+        activity = frames['shark_activity'].reindex(columns=region_avg['region']).to_numpy()
+        chlorophyll = np.nan_to_num(frames['chlorophyll'].reindex(columns=region_avg['region']).to_numpy())
+        labels = [str(period) for period in frames.index]
+        custom = region_avg['is_custom'].to_numpy(dtype=bool)
+        lons, lats = region_avg['lon'].to_numpy(), region_avg['lat'].to_numpy()
+
+        fig = Figure(figsize=(16, 10), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = self._map_axes(fig, projection)
+        norm = dict(cmap='hot', vmin=np.nanmin(activity), vmax=np.nanmax(activity), transform=ccrs.PlateCarree())
+        layers = [
+            (~custom, 800, ax.scatter(lons[~custom], lats[~custom], c=activity[0, ~custom], alpha=0.7,
+                                      edgecolors='black', linewidth=0.5, **norm)),
+            (custom, 1000, ax.scatter(lons[custom], lats[custom], c=activity[0, custom], alpha=1.0,
+                                      edgecolors='red', linewidth=2, marker='*', **norm)),
+        ]
+        for name, lat, lon, is_custom in zip(region_avg['region'], lats, lons, custom):
+            ax.text(lon + 2, lat, name, fontsize=8, fontweight='bold' if is_custom else 'normal',
+                    color='red' if is_custom else 'black', transform=ccrs.PlateCarree())
+        cbar = fig.colorbar(layers[0][2], ax=ax, shrink=0.6)
+        cbar.set_label('Индекс активности акул', fontsize=12)
+        title = ax.set_title('', fontsize=14, fontweight='bold', pad=20)
+
+        def update(i):
+            for mask, scale, layer in layers:
+                layer.set_array(activity[i, mask])
+                layer.set_sizes(chlorophyll[i, mask] * scale)
+            title.set_text(f'Глобальная карта ожидаемой активности акул — {labels[i]}')
+
+        return write_frames(fig, update, len(labels), output, fps=fps, dpi=dpi)
+
+    def generate_hotspot_predictions(self, data, threshold=None, ensemble_k=None, min_probability=0.5):
+        """Анализ горячих точек с учетом кастомных местоположений
+
+        threshold: готовый порог (например, stats['shark_activity'].percentile(80))
+        ensemble_k: если задано, горячие точки ранжируются по вероятности превышения порога
+        по ансамблю из ensemble_k реализаций шума, а не по одной случайной выборке
+        """
         print("\n🔍 Анализ горячих точек кормёжки...")
 
-        threshold = np.percentile(data['shark_activity'], 80)
-        hotspots = data[data['shark_activity'] > threshold]
+        if threshold is None:
+            threshold = np.percentile(data['shark_activity'], 80)
+        if ensemble_k:
+            ensemble = self.calculate_shark_activity_ensemble(data, k=ensemble_k, quantiles=(), threshold=threshold)
+            data = data.assign(p_exceed=ensemble['p_exceed'])
+            hotspots = data[data['p_exceed'] >= min_probability].sort_values('p_exceed', ascending=False)
+            print(f"Ансамбль: {ensemble_k} реализаций ε, P(SAI > порог) ≥ {min_probability}")
+        else:
+            hotspots = data[data['shark_activity'] > threshold]
 
         print(f"Порог горячих точек: {threshold:.2f}")
         print(f"Обнаружено горячих точек: {len(hotspots)}")
@@ -404,6 +712,123 @@ shark_activity = (0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * fronts_norm)
 
         return hotspots
 
+    def region_summary(self, data):
+        """Сводка по регионам в плоских колонках (для экспорта в Parquet/JSON)"""
+        summary = data.groupby('region', sort=False).agg(
+            lat=('lat', 'first'),
+            lon=('lon', 'first'),
+            is_custom=('is_custom', 'first'),
+            activity_mean=('shark_activity', 'mean'),
+            activity_max=('shark_activity', 'max'),
+            observations=('shark_activity', 'count'),
+            sst_mean=('sst', 'mean'),
+            chlorophyll_mean=('chlorophyll', 'mean'),
+        )
+        return summary.reset_index()
+
+# 🖥️ ПАКЕТНЫЙ РЕЖИМ (без GUI)
+def write_frame(df, path):
+    """Запись таблицы по расширению файла: .parquet, .json или .csv"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    suffix = path.suffix.lower()
+    if suffix not in FRAME_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат вывода: {path.suffix} (ожидается один из {FRAME_FORMATS})")
+    if suffix == '.parquet':
+        df.to_parquet(path, index=False)
+    elif suffix == '.json':
+        df.to_json(path, orient='records', date_format='iso', force_ascii=False, indent=1)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def build_cli_parser():
+    """Парсер подкоманд score / hotspots / export / plot"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--source', choices=DATA_SOURCES, default='simulated', help='Источник данных')
+    common.add_argument('--neo-months', nargs='*', help="Месяцы 'YYYY-MM' для --source neo")
+    common.add_argument('--sampling', choices=('bilinear', 'nearest'), default='bilinear')
+    common.add_argument('--days', type=int, default=365, help='Длина симулированного ряда (дни)')
+    common.add_argument('--seed', type=int, default=None, help='Зерно генератора')
+    common.add_argument('--locations', help='CSV/Parquet с кастомными точками (name, lat, lon)')
+    common.add_argument('--quiet', action='store_true', help='Не выводить ход работы (по умолчанию — в stderr)')
+
+    parser = argparse.ArgumentParser(description='Модель активности акул NASA: пакетный режим без GUI')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    score = sub.add_parser('score', parents=[common], help='SAI для каждой записи')
+    score.add_argument('--output', default='outputs/sai_scores.parquet', help='Файл .parquet/.json/.csv')
+    score.add_argument('--ensemble-k', type=int, default=None,
+                       help='Добавить сводку ансамбля из K реализаций ε (sai_mean, sai_std, квантили)')
+
+    hotspots = sub.add_parser('hotspots', parents=[common], help='Горячие точки кормёжки')
+    hotspots.add_argument('--output', default='outputs/hotspots.parquet', help='Файл .parquet/.json/.csv')
+    hotspots.add_argument('--percentile', type=float, default=80, help='Перцентиль порога SAI')
+    hotspots.add_argument('--ensemble-k', type=int, default=None, help='Ранжировать по ансамблю из K реализаций ε')
+    hotspots.add_argument('--min-probability', type=float, default=0.5, help='Минимальная P(SAI > порог)')
+
+    export = sub.add_parser('export', parents=[common], help='Сводка по регионам')
+    export.add_argument('--output', default='outputs/region_summary.json', help='Файл .parquet/.json/.csv')
+
+    plot = sub.add_parser('plot', parents=[common], help='Графики в файл (backend Agg)')
+    plot.add_argument('--kind', choices=('relationships', 'map', 'animation'), default='relationships',
+                      help='animation: помесячная карта (.gif/.mp4 или каталог PNG)')
+    plot.add_argument('--projection', default='PlateCarree', help='Проекция cartopy.crs для map/animation')
+    plot.add_argument('--fps', type=float, default=2, help='Кадров в секунду для animation')
+    plot.add_argument('--mode', choices=PLOT_MODES, default='auto',
+                      help='relationships: точки или растр плотности (auto — по числу строк)')
+    plot.add_argument('--output', default=None, help='PNG/SVG/PDF (по умолчанию outputs/<kind>.png)')
+    plot.add_argument('--dpi', type=int, default=150)
+    return parser
+
+
+def run_cli(argv=None):
+    """Пакетный запуск: результаты пишутся в файлы, ничего не показывается"""
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+    if args.command != 'plot' and Path(args.output).suffix.lower() not in FRAME_FORMATS:
+        parser.error(f"--output: ожидается файл {'/'.join(FRAME_FORMATS)}")
+    # ExitStack закрывает devnull и возвращает stdout и при исключении в команде
+    with contextlib.ExitStack() as stack:
+        log_stream = stack.enter_context(open(os.devnull, 'w')) if args.quiet else sys.stderr
+        stack.enter_context(contextlib.redirect_stdout(log_stream))
+        model = SharkActivityModel(data_source=args.source, neo_months=args.neo_months,
+                                   sampling=args.sampling, seed=args.seed)
+        if args.locations:
+            model.add_locations_from_file(args.locations)
+        data = model.collect_global_data(days=args.days)
+
+        if args.command == 'score':
+            if args.ensemble_k:
+                data = data.join(model.calculate_shark_activity_ensemble(data, k=args.ensemble_k))
+            result = data
+        elif args.command == 'hotspots':
+            threshold = np.percentile(data['shark_activity'], args.percentile)
+            result = model.generate_hotspot_predictions(data, threshold=threshold, ensemble_k=args.ensemble_k,
+                                                        min_probability=args.min_probability)
+        elif args.command == 'export':
+            result = model.region_summary(data)
+        else:
+            import matplotlib
+            matplotlib.use('Agg')
+            result = None
+            if args.kind == 'animation':
+                output = model.animate_global_map(data, output=args.output or 'outputs/sai_map_animation.gif',
+                                                  fps=args.fps, projection=args.projection, dpi=args.dpi)
+            else:
+                if args.kind == 'map':
+                    fig = model.create_global_map(data, show=False, projection=args.projection)
+                else:
+                    fig = model.plot_relationships(data, show=False, mode=args.mode)
+                output = Path(args.output or f'outputs/{args.kind}.png')
+                output.parent.mkdir(parents=True, exist_ok=True)
+                fig.savefig(output, dpi=args.dpi)
+
+        if result is not None:
+            output = write_frame(result, args.output)
+    return output
+
 # 🚀 ИНТЕРАКТИВНЫЙ ЗАПУСК
 def interactive_analysis():
     """Интерактивный запуск модели с кастомными точками"""
@@ -452,6 +877,11 @@ def interactive_analysis():
     return shark_model, nasa_data
 
 if __name__ == "__main__":
+    # Подкоманды (score/hotspots/export/plot) — пакетный режим без GUI
+    if len(sys.argv) > 1:
+        run_cli()
+        sys.exit(0)
+
     # Запуск интерактивного анализа
     model, data = interactive_analysis()
 
@@ -470,4 +900,7 @@ if __name__ == "__main__":
 
     # Затем перезапустите сбор данных:
     new_data = model.collect_global_data()
+
+    # Реальные месячные сетки NASA NEO вместо симуляции:
+    neo_data = model.collect_global_data(data_source='neo')
     """)
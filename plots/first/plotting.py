@@ -1,125 +1,214 @@
-﻿import json
+﻿import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
-import xarray as xr
+import matplotlib
 import numpy as np
-import matplotlib.pyplot as plt
+import xarray as xr
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from binary_payload import encode_grid  # noqa: E402
+from grid_pyramid import DEFAULT_STEPS, mean_pool, write_pyramid  # noqa: E402
+from spectral_kernels import compute_oc4  # noqa: E402
 
-# === 1. Загружаем файлы ===
-files = [
+# === 1. Файлы ===
+FILES = [
     "/content/pace_data/PACE_OCI.20250905T204743.L2.OC_AOP.V3_1.NRT.nc",
     "/content/pace_data/PACE_OCI.20250907T201930.L2.OC_AOP.V3_1.NRT.nc",
     "/content/pace_data/PACE_OCI.20250909T213432.L2.OC_AOP.V3_1.NRT.nc",
     "/content/pace_data/PACE_OCI.20250914T211303.L2.OC_AOP.V3_1.NRT.nc"
 ]
 
-datasets = [xr.open_dataset(f, group="geophysical_data") for f in files]
-nav_data = [xr.open_dataset(f, group="navigation_data") for f in files]
-
-# === 2. Берём ключевые переменные ===
-vars = ["nflh", "avw"]
-data = [{v: ds[v].values for v in vars} for ds in datasets]
-
-# === 3. Карты nflh и avw (сравнение 05 и 09 сентября) ===
-fig, axs = plt.subplots(2, 2, figsize=(12, 10))
-for i, v in enumerate(vars):
-    im1 = axs[i, 0].imshow(data[0][v], cmap="viridis")
-    axs[i, 0].set_title(f"{v} — 05 Sep")
-    plt.colorbar(im1, ax=axs[i, 0])
-
-    im2 = axs[i, 1].imshow(data[2][v], cmap="viridis")
-    axs[i, 1].set_title(f"{v} — 09 Sep")
-    plt.colorbar(im2, ax=axs[i, 1])
-
-plt.tight_layout()
-plt.savefig("plots_nflh_avw_comparison.png", dpi=300)  # сохранение
-plt.show()
-
-# === 3b. Отдельное сохранение каждой переменной ===
-for i, v in enumerate(vars):
-    for j, date in zip([0, 2], ["05Sep", "09Sep"]):
-        plt.figure(figsize=(6, 5))
-        plt.imshow(data[j][v], cmap="viridis")
-        plt.title(f"{v} — {date}")
-        plt.colorbar(label=v)
-        plt.savefig(f"{v}_{date}.png", dpi=300)
-        plt.close()
-
-# === 4. Разница (heatmap Δnflh) ===
-delta_nflh = data[2]["nflh"] - data[0]["nflh"]
-plt.figure(figsize=(8, 6))
-plt.imshow(delta_nflh, cmap="RdBu", vmin=-np.nanmax(abs(delta_nflh)), vmax=np.nanmax(abs(delta_nflh)))
-plt.title("Δnflh (09 Sep - 05 Sep)")
-plt.colorbar(label="Change in Chlorophyll Proxy")
-plt.savefig("plot_delta_nflh.png", dpi=300)
-plt.show()
-
-# === 5. Усреднённые спектры (Rrs) ===
-rrs_05 = xr.open_dataset(files[0], group="geophysical_data")["Rrs"].mean(axis=(0, 1))
-rrs_09 = xr.open_dataset(files[2], group="geophysical_data")["Rrs"].mean(axis=(0, 1))
-
-wavelengths = xr.open_dataset(files[0], group="sensor_band_parameters")["wavelength"]
-wavelengths = wavelengths[: rrs_05.shape[0]]  # Match длину с Rrs
-
-plt.figure(figsize=(10, 6))
-plt.plot(wavelengths, rrs_05, label="05 Sep")
-plt.plot(wavelengths, rrs_09, label="09 Sep")
-plt.xlabel("Wavelength (nm)")
-plt.ylabel("Rrs")
-plt.title("Mean Water Reflectance Spectrum")
-plt.legend()
-plt.grid(True)
-plt.savefig("plot_mean_rrs.png", dpi=300)
-plt.show()
+# === 2. Ключевые переменные ===
+VARS = ["nflh", "avw"]
+PAYLOAD_PATH = Path(__file__).resolve().parents[2] / "src" / "data" / "pacePlotData.json"
 
-# === 6. Hotspots (топ-3 зоны роста nflh) ===
-lat = nav_data[0]["latitude"].values
-lon = nav_data[0]["longitude"].values
 
-if lat.shape != delta_nflh.shape:
-    lat = np.mean(lat, axis=1)
-    lon = np.mean(lon, axis=1)
+# === Загрузка: каждая группа файла открывается один раз ===
 
-flat_idx = np.argpartition(delta_nflh.flatten(), -3)[-3:]
-top_coords = [(lat.flat[i], lon.flat[i], delta_nflh.flat[i]) for i in flat_idx]
+def load_granule(path: str, extras: bool = False) -> dict:
+    """Читает nflh/avw и OC4; для пары сравнения (extras) ещё средний Rrs, длины волн и координаты.
 
-print("=== Hotspots роста фитопланктона (09-05 Sep) ===")
-for i, (la, lo, val) in enumerate(top_coords, 1):
-    print(f"{i}) Lat: {la:.3f}, Lon: {lo:.3f}, Δnflh: {val:.3f}")
+    Rrs (строки × пиксели × каналы) целиком не загружается: OC4 считается
+    общим ядром spectral_kernels по блокам строк (только 4 канала), а для
+    пары Rrs сворачивается в средний спектр. В кэше остаются двумерные поля и один вектор.
+    """
+    arrays = {}
+    with xr.open_dataset(path, group="sensor_band_parameters") as bands:
+        wavelengths = bands["wavelength"].values
+    with xr.open_dataset(path, group="geophysical_data") as ds:
+        for v in VARS:
+            arrays[v] = ds[v].values
+        arrays["oc4"] = compute_oc4(ds["Rrs"].variable, wavelengths)
+        if extras:
+            arrays["rrs_mean"] = ds["Rrs"].mean(axis=(0, 1)).values
+    if extras:
+        with xr.open_dataset(path, group="navigation_data") as nav:
+            arrays["latitude"] = nav["latitude"].values
+            arrays["longitude"] = nav["longitude"].values
+        arrays["wavelength"] = wavelengths
+    return arrays
+
+
+def load_granules(files: list[str], extras: set[str], workers: int = 1) -> dict[str, dict]:
+    """Общий кэш {путь: переменные}; при workers > 1 файлы читаются параллельно."""
+    flags = [f in extras for f in files]
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            loaded = list(pool.map(load_granule, files, flags))
+    else:
+        loaded = [load_granule(f, flag) for f, flag in zip(files, flags)]
+    return dict(zip(files, loaded))
+
+
+def granule_labels(files: list[str]) -> list[str]:
+    """«05Sep» из имени PACE_OCI.20250905T204743...; при нескольких гранулах за день — «05Sep_2047»."""
+    stamps = [datetime.strptime(Path(f).name.split(".")[1], "%Y%m%dT%H%M%S") for f in files]
+    days = [s.strftime("%d%b") for s in stamps]
+    return [d if days.count(d) == 1 else f"{d}_{s:%H%M}" for d, s in zip(days, stamps)]
+
+
+# === 3–5. Рисование (каждая функция — отдельная задача для воркера) ===
+
+def _day(label: str) -> str:
+    return f"{label[:2]} {label[2:]}"
+
+
+def _finish(fig, path: Path, show: bool) -> None:
+    import matplotlib.pyplot as plt
+
+    fig.savefig(path, dpi=300)
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def plot_comparison(fields: dict, labels: tuple[str, str], path: Path, show: bool = False) -> Path:
+    """Карты nflh и avw для двух дат (2×2)."""
+    import matplotlib.pyplot as plt
+
+    fig, axs = plt.subplots(2, 2, figsize=(12, 10))
+    for i, v in enumerate(VARS):
+        for j, label in enumerate(labels):
+            im = axs[i, j].imshow(fields[label][v], cmap="viridis")
+            axs[i, j].set_title(f"{v} — {_day(label)}")
+            plt.colorbar(im, ax=axs[i, j])
+    fig.tight_layout()
+    _finish(fig, path, show)
+    return path
+
+
+def plot_field(arr: np.ndarray, v: str, label: str, path: Path, show: bool = False) -> Path:
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(6, 5))
+    plt.imshow(arr, cmap="viridis")
+    plt.title(f"{v} — {label}")
+    plt.colorbar(label=v)
+    _finish(fig, path, show)
+    return path
+
+
+def plot_delta(delta: np.ndarray, labels: tuple[str, str], path: Path, show: bool = False) -> Path:
+    """Heatmap Δnflh, симметричная шкала RdBu."""
+    import matplotlib.pyplot as plt
+
+    limit = np.nanmax(abs(delta))
+    fig = plt.figure(figsize=(8, 6))
+    plt.imshow(delta, cmap="RdBu", vmin=-limit, vmax=limit)
+    plt.title(f"Δnflh ({_day(labels[1])} - {_day(labels[0])})")
+    plt.colorbar(label="Change in Chlorophyll Proxy")
+    _finish(fig, path, show)
+    return path
+
+
+def plot_spectra(wavelengths: np.ndarray, spectra: dict, path: Path, show: bool = False) -> Path:
+    """Усреднённые спектры Rrs."""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(10, 6))
+    for label, rrs in spectra.items():
+        plt.plot(wavelengths, rrs, label=_day(label))
+    plt.xlabel("Wavelength (nm)")
+    plt.ylabel("Rrs")
+    plt.title("Mean Water Reflectance Spectrum")
+    plt.legend()
+    plt.grid(True)
+    _finish(fig, path, show)
+    return path
+
+
+def _init_worker() -> None:
+    matplotlib.use("Agg")
 
-# === 7. Экспорт данных для интерактивных графиков ===
 
-def downsample_grid(arr: np.ndarray, step: int = 6) -> list[list[float | None]]:
-    sample = arr[::step, ::step]
-    return [[float(v) if np.isfinite(v) else None for v in row] for row in sample]
+def _run_job(job) -> Path:
+    func, args = job
+    return func(*args)
 
 
+def render(jobs: list, workers: int = 1) -> list[Path]:
+    """Выполняет задачи рисования; при workers > 1 — в процессах на бэкенде Agg."""
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker) as pool:
+            return list(pool.map(_run_job, jobs))
+    return [_run_job(job) for job in jobs]
+
+
+# === 6. Hotspots (топ-3 зоны роста nflh) ===
+
+def find_hotspots(delta: np.ndarray, lat: np.ndarray, lon: np.ndarray, top: int = 3) -> np.ndarray:
+    if lat.shape != delta.shape:
+        lat = np.mean(lat, axis=1)
+        lon = np.mean(lon, axis=1)
+
+    flat_idx = np.argpartition(delta.flatten(), -top)[-top:]
+    top_coords = [(lat.flat[i], lon.flat[i], delta.flat[i]) for i in flat_idx]
+
+    print("=== Hotspots роста фитопланктона ===")
+    for i, (la, lo, val) in enumerate(top_coords, 1):
+        print(f"{i}) Lat: {la:.3f}, Lon: {lo:.3f}, Δnflh: {val:.3f}")
+    return flat_idx
+
+
+# === 7. Экспорт данных для интерактивных графиков ===
+
 def normalize_line(arr: np.ndarray) -> list[float]:
     return [float(v) for v in arr]
 
-try:
-    step = 6
-    grids = {
-        "nflh_05Sep": {"data": downsample_grid(data[0]["nflh"], step), "xLabel": "Column", "yLabel": "Row"},
-        "nflh_09Sep": {"data": downsample_grid(data[2]["nflh"], step), "xLabel": "Column", "yLabel": "Row"},
-        "avw_05Sep": {"data": downsample_grid(data[0]["avw"], step), "xLabel": "Column", "yLabel": "Row"},
-        "avw_09Sep": {"data": downsample_grid(data[2]["avw"], step), "xLabel": "Column", "yLabel": "Row"},
-        "delta_from_pairs": {"data": downsample_grid(delta_nflh, step), "xLabel": "Column", "yLabel": "Row"},
-    }
 
-    # Добавляем OC4-прокси из второго набора, если PNG не открывается, этот блок можно дополнить позже
-    oc4_early = xr.open_dataset(files[0], group="geophysical_data")["nflh"].values
-    oc4_late = xr.open_dataset(files[3], group="geophysical_data")["nflh"].values
-    grids["chlorophyll-2025-09-01AND2025-09-07"] = {
-        "data": downsample_grid(oc4_early, step),
-        "xLabel": "Column",
-        "yLabel": "Row",
-    }
-    grids["chlorophyll-2025-09-08AND2025-09-14"] = {
-        "data": downsample_grid(oc4_late, step),
-        "xLabel": "Column",
-        "yLabel": "Row",
-    }
+def pyramid_grid(name: str, arr: np.ndarray) -> dict:
+    """Пирамида 1/2/4/8/16 в public/data/pace; на страницу идёт самый грубый уровень."""
+    manifest = write_pyramid(name, arr)
+    overview = manifest.pop("overview")
+    return {**overview, "xLabel": "Column", "yLabel": "Row", "pyramid": manifest}
+
+
+def overview_grid(arr: np.ndarray, step: int) -> dict:
+    return {**encode_grid(mean_pool(arr, step)), "step": step, "xLabel": "Column", "yLabel": "Row"}
+
+
+def export_payload(cache: dict, files: list[str], pair: tuple[str, str], labels: dict,
+                   delta_nflh: np.ndarray, flat_idx: np.ndarray, wavelengths: np.ndarray) -> None:
+    early, late = pair
+    step = max(DEFAULT_STEPS)
+    grids = {}
+    for v in VARS:
+        for f in pair:
+            key = f"{v}_{labels[f]}"
+            grids[key] = pyramid_grid(key, cache[f][v])
+    grids["delta_from_pairs"] = pyramid_grid("delta_from_pairs", delta_nflh)
+
+    # OC4-прокси хлорофилла (то же ядро, что в plotting-2.py) для первой и последней гранулы
+    grids["chlorophyll-2025-09-01AND2025-09-07"] = overview_grid(cache[files[0]]["oc4"], step)
+    grids["chlorophyll-2025-09-08AND2025-09-14"] = overview_grid(cache[files[-1]]["oc4"], step)
 
     rows, cols = delta_nflh.shape
     delta_flat = delta_nflh.flatten()
@@ -141,18 +230,74 @@ try:
         "grids": grids,
         "lines": {
             "rrs_mean": {
-                "wavelength": normalize_line(wavelengths.values),
-                "rrs05": normalize_line(rrs_05.values),
-                "rrs09": normalize_line(rrs_09.values),
+                "wavelength": normalize_line(wavelengths),
+                "rrs05": normalize_line(cache[early]["rrs_mean"]),
+                "rrs09": normalize_line(cache[late]["rrs_mean"]),
             }
         },
         "hotspots": hotspots,
     }
 
-    out_path = Path(__file__).resolve().parents[2] / "src" / "data" / "pacePlotData.json"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
+    PAYLOAD_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with PAYLOAD_PATH.open("w", encoding="utf-8") as f:
         json.dump(payload, f)
-    print(f"PACE plotly payload written to {out_path}")
-except Exception as exc:  # pragma: no cover
-    print(f"[WARN] Failed to export Plotly payload: {exc}")
+    print(f"PACE plotly payload written to {PAYLOAD_PATH}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="PACE L2: карты nflh/avw, Δnflh, спектры Rrs и экспорт для сайта")
+    parser.add_argument("files", nargs="*", default=FILES, help="Гранулы PACE L2 OC_AOP (.nc)")
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Без plt.show(): бэкенд Agg, карты nflh/avw для каждой гранулы, рисование в --workers процессах",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Процессы для чтения и рисования в --batch")
+    parser.add_argument("--pair", type=int, nargs=2, default=(0, 2), metavar=("EARLY", "LATE"),
+                        help="Индексы гранул для сравнения, Δnflh и спектров (default: 0 2)")
+    parser.add_argument("--out-dir", default=".", help="Каталог для PNG (default: текущий)")
+    parser.add_argument("--no-export", action="store_true", help="Не писать pacePlotData.json и тайлы")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    files = list(args.files)
+    workers = max(1, args.workers) if args.batch else 1
+    if args.batch:
+        matplotlib.use("Agg")
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    pair = (files[args.pair[0]], files[args.pair[1]])
+    labels = dict(zip(files, granule_labels(files)))
+    pair_labels = (labels[pair[0]], labels[pair[1]])
+    cache = load_granules(files, set(pair), workers)
+
+    delta_nflh = cache[pair[1]]["nflh"] - cache[pair[0]]["nflh"]
+    rrs_len = cache[pair[0]]["rrs_mean"].shape[0]
+    wavelengths = cache[pair[0]]["wavelength"][:rrs_len]  # Match длину с Rrs
+
+    # Интерактивный режим: как раньше, только пара сравнения и plt.show() для сводных графиков
+    show = not args.batch
+    field_files = files if args.batch else list(pair)
+    jobs = [
+        (plot_comparison, ({labels[f]: cache[f] for f in pair}, pair_labels, out_dir / "plots_nflh_avw_comparison.png", show)),
+        *[(plot_field, (cache[f][v], v, labels[f], out_dir / f"{v}_{labels[f]}.png")) for v in VARS for f in field_files],
+        (plot_delta, (delta_nflh, pair_labels, out_dir / "plot_delta_nflh.png", show)),
+        (plot_spectra, (wavelengths, {labels[f]: cache[f]["rrs_mean"] for f in pair}, out_dir / "plot_mean_rrs.png", show)),
+    ]
+    written = render(jobs, workers)
+    print(f"{len(written)} figures written to {out_dir.resolve()}")
+
+    flat_idx = find_hotspots(delta_nflh, cache[pair[0]]["latitude"], cache[pair[0]]["longitude"])
+
+    if not args.no_export:
+        try:
+            export_payload(cache, files, pair, labels, delta_nflh, flat_idx, wavelengths)
+        except Exception as exc:  # pragma: no cover
+            print(f"[WARN] Failed to export Plotly payload: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import earthaccess
 import h5netcdf
 import numpy as np
@@ -5,23 +8,19 @@ import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from spectral_kernels import compute_oc4  # noqa: E402
+
 # Авторизация (один раз)
 earthaccess.login()
 
-# Функция расчета хлорофилла (OC4V6)
+# Функция расчета хлорофилла (OC4V6): общее ядро scripts/spectral_kernels.py,
+# читает из файла только 4 канала Rrs блоками строк
 def compute_chlor_oc4(rrs, wavelengths):
-    idx_443 = np.argmin(np.abs(wavelengths - 443))
-    idx_490 = np.argmin(np.abs(wavelengths - 490))
-    idx_510 = np.argmin(np.abs(wavelengths - 510))
-    idx_555 = np.argmin(np.abs(wavelengths - 555))
-
-    R = np.log10(np.maximum.reduce([rrs[..., idx_443],
-                                    rrs[..., idx_490],
-                                    rrs[..., idx_510]]) / rrs[..., idx_555])
-
-    a0, a1, a2, a3, a4 = 0.3272, -2.9940, 2.7218, -1.2259, -0.5683
-    chl = 10 ** (a0 + a1*R + a2*R**2 + a3*R**3 + a4*R**4)
-    return chl
+    return compute_oc4(rrs, wavelengths)
 
 # Загрузка PACE L2 (несколько гранул)
 def get_pace_oc4(short_name, temporal, bbox, max_granules=5):
@@ -44,7 +43,7 @@ def get_pace_oc4(short_name, temporal, bbox, max_granules=5):
     for f in files:
         try:
             with h5netcdf.File(f, "r") as ds:
-                rrs = ds["geophysical_data"]["Rrs"][:]
+                rrs = ds["geophysical_data"]["Rrs"]
                 wavelengths = ds["sensor_band_parameters"]["wavelength"][:]
                 lat = ds["navigation_data"]["latitude"][:]
                 lon = ds["navigation_data"]["longitude"][:]
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Typed-array packing for front-end payloads.
+
+``ArrayPacker`` concatenates NumPy arrays into one little-endian binary
+buffer (every array aligned to 8 bytes, so the browser can view it with
+``Float32Array``/``Uint16Array``/``Int32Array`` without copying) and describes
+each array in a JSON manifest::
+
+    {"name": "timeSeries.activity", "dtype": "uint16", "offset": 1024, "length": 2920,
+     "scale": 3.1e-05, "min": -1.8}
+
+``uint16`` arrays are linearly quantised: ``value = min + q * scale`` with
+``q = 65535`` reserved for NaN. ``write_payload`` stores the buffer and the
+manifest with precompressed ``.gz`` siblings, plus ``.br`` when the optional
+``brotli`` package is installed.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+DTYPES = ("float32", "uint16", "int32", "uint8")
+UINT16_NAN = 65535
+ALIGNMENT = 8
+
+LOGGER = logging.getLogger(__name__)
+
+
+def quantize(
+    values: np.ndarray,
+    dtype: str = "uint16",
+    value_range: tuple[float, float] | None = None,
+) -> tuple[np.ndarray, float, float]:
+    """Linear quantisation to ``uint8``/``uint16``; the top code marks NaN. Returns ``(q, scale, min)``.
+
+    ``value_range`` fixes ``(min, max)`` so several arrays (e.g. tiles of one
+    layer) share a scale; values outside it are clipped.
+    """
+    nan_code = np.iinfo(dtype).max
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if value_range is not None:
+        lo, hi = map(float, value_range)
+    else:
+        lo = float(values[finite].min()) if finite.any() else 0.0
+        hi = float(values[finite].max()) if finite.any() else 0.0
+    scale = (hi - lo) / (nan_code - 1) or 1.0
+    q = np.full(values.shape, nan_code, dtype=dtype)
+    q[finite] = np.clip(np.rint((values[finite] - lo) / scale), 0, nan_code - 1).astype(dtype)
+    return q, scale, lo
+
+
+def encode_grid(
+    grid: np.ndarray,
+    dtype: str = "uint8",
+    value_range: tuple[float, float] | None = None,
+) -> dict:
+    """JSON-ready quantised 2-D grid: base64 little-endian codes, ``value = offset + q * scale``.
+
+    Decoded in the browser by ``src/data/quantizedGrid.js``.
+    """
+    grid = np.asarray(grid)
+    q, scale, offset = quantize(grid, dtype, value_range)
+    return {
+        "shape": list(grid.shape),
+        "dtype": dtype,
+        "scale": scale,
+        "offset": offset,
+        "values": base64.b64encode(q.astype(q.dtype.newbyteorder("<")).tobytes()).decode("ascii"),
+    }
+
+
+def quantize_uint16(values: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """Linear uint16 quantisation; returns ``(q, scale, min)``."""
+    return quantize(values, "uint16")
+
+
+def dequantize(q: np.ndarray, scale: float, lo: float) -> np.ndarray:
+    out = lo + q.astype(np.float64) * scale
+    out[q == np.iinfo(q.dtype).max] = np.nan
+    return out
+
+
+def dequantize_uint16(q: np.ndarray, scale: float, lo: float) -> np.ndarray:
+    return dequantize(q, scale, lo)
+
+
+class ArrayPacker:
+    """Collects named arrays into one aligned binary buffer plus manifest entries."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self.arrays: List[Dict] = []
+
+    def add(self, name: str, values, dtype: str = "float32") -> Dict:
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {DTYPES}")
+        entry: Dict = {"name": name, "dtype": dtype}
+        if dtype == "uint16":
+            data, entry["scale"], entry["min"] = quantize_uint16(values)
+        else:
+            data = np.asarray(values).astype(dtype, copy=False)
+        data = np.ascontiguousarray(data.ravel()).astype(data.dtype.newbyteorder("<"), copy=False)
+
+        padding = -self._size % ALIGNMENT
+        if padding:
+            self._chunks.append(b"\0" * padding)
+            self._size += padding
+        entry.update(offset=self._size, length=int(data.size))
+        self._chunks.append(data.tobytes())
+        self._size += data.nbytes
+        self.arrays.append(entry)
+        return entry
+
+    @property
+    def nbytes(self) -> int:
+        return self._size
+
+    def tobytes(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+def unpack(buffer: bytes, arrays: List[Dict]) -> Dict[str, np.ndarray]:
+    """Inverse of ``ArrayPacker`` (uint16 arrays are dequantised to float64)."""
+    out = {}
+    for entry in arrays:
+        dtype = np.dtype(entry["dtype"]).newbyteorder("<")
+        data = np.frombuffer(buffer, dtype=dtype, count=entry["length"], offset=entry["offset"])
+        if entry["dtype"] == "uint16":
+            data = dequantize_uint16(data, entry["scale"], entry["min"])
+        out[entry["name"]] = data
+    return out
+
+
+def write_compressed(path: Path, data: bytes) -> List[Path]:
+    """Write ``data`` to ``path`` plus ``.gz`` (and ``.br`` if available) siblings."""
+    path.write_bytes(data)
+    written = [path, path.with_name(path.name + ".gz")]
+    written[1].write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        br_path = path.with_name(path.name + ".br")
+        br_path.write_bytes(brotli.compress(data, quality=11))
+        written.append(br_path)
+    return written
+
+
+def write_payload(directory: Path | str, stem: str, manifest: Dict, packer: ArrayPacker) -> List[Path]:
+    """Write ``{stem}.bin`` and ``{stem}.json`` (with compressed siblings) into ``directory``."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        **manifest,
+        "buffer": {"file": f"{stem}.bin", "byteLength": packer.nbytes, "endianness": "little"},
+        "arrays": packer.arrays,
+    }
+    written = write_compressed(directory / f"{stem}.bin", packer.tobytes())
+    written += write_compressed(
+        directory / f"{stem}.json",
+        json.dumps(manifest, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+    )
+    if brotli is None:
+        LOGGER.info("brotli not installed; wrote .gz siblings only")
+    return written
+
+
+__all__ = [
+    "ArrayPacker",
+    "dequantize",
+    "dequantize_uint16",
+    "encode_grid",
+    "quantize",
+    "quantize_uint16",
+    "unpack",
+    "write_compressed",
+    "write_payload",
+]
@@ -1,13 +1,22 @@
-﻿import json
+﻿import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import matplotlib.image as mpimg
 import numpy as np
 
+from binary_payload import encode_grid
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 PLOTS_FIRST = BASE_DIR / "plots" / "first"
 PLOTS_SECOND = BASE_DIR / "plots" / "second"
 OUT_PATH = BASE_DIR / "src" / "data" / "pacePlotData.json"
+CACHE_DIR = BASE_DIR / "outputs" / "plotly_cache"
+CACHE_VERSION = 1
+GRID_DTYPES = ("uint8", "uint16")
 
 PNG_SPECS = {
   "nflh_05Sep": (PLOTS_FIRST / "nflh_05Sep.png", 0.04, 6),
@@ -39,41 +48,96 @@ def _find_bbox(gray: np.ndarray, threshold: float = 0.05) -> tuple[int, int, int
     return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
 
 
-def _prep_heatmap(arr: np.ndarray, step: int, threshold: float) -> list[list[float]]:
+def _prep_heatmap(arr: np.ndarray, step: int, threshold: float) -> np.ndarray:
     gray = arr.mean(axis=2)
     r0, r1, c0, c1 = _find_bbox(gray, threshold)
     crop = gray[r0:r1, c0:c1]
     if crop.size == 0:
         crop = gray
     data = (crop - crop.min()) / (crop.max() - crop.min() + 1e-8)
-    downsample = data[::step, ::step]
-    return downsample.tolist()
+    return np.ascontiguousarray(data[::step, ::step])
 
 
-def build_payload() -> dict:
-    grids = {}
-    delta_grid = None
+def _process_png(path: Path, threshold: float, step: int) -> np.ndarray:
+    """Decode, crop, normalise and downsample one PNG (runs in a worker process)."""
+    return _prep_heatmap(_load_png(path), step=step, threshold=threshold)
+
+
+def _cache_file(path: Path, threshold: float, step: int) -> Path:
+    key = f"{path.resolve()}|{threshold!r}|{step}|{CACHE_VERSION}"
+    return CACHE_DIR / f"{path.stem}.{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.npz"
+
+
+def _cache_stamp(path: Path) -> np.ndarray:
+    stat = path.stat()
+    return np.array([stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def _read_cache(path: Path, threshold: float, step: int) -> np.ndarray | None:
+    cache_file = _cache_file(path, threshold, step)
+    if not path.exists() or not cache_file.exists():
+        return None
+    try:
+        with np.load(cache_file) as cached:
+            if np.array_equal(cached["stamp"], _cache_stamp(path)):
+                return cached["grid"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
 
+
+def _write_cache(path: Path, threshold: float, step: int, grid: np.ndarray) -> None:
+    cache_file = _cache_file(path, threshold, step)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(cache_file.name + ".tmp.npz")
+    np.savez(tmp_file, grid=grid, stamp=_cache_stamp(path))
+    os.replace(tmp_file, cache_file)
+
+
+def load_grids(workers: int | None = None, use_cache: bool = True) -> dict[str, np.ndarray]:
+    """Heatmap grids for every ``PNG_SPECS`` entry.
+
+    Grids are cached per PNG under ``outputs/plotly_cache`` keyed by path,
+    ``(threshold, step)`` and the PNG's mtime/size; only missing or stale ones
+    are decoded, in parallel across a process pool.
+    """
+    grids = {}
+    pending = {}
     for key, (path, threshold, step) in PNG_SPECS.items():
-        arr = _load_png(path)
-        if key == "plot_delta_nflh":
-            delta_grid = _prep_heatmap(arr, step=step, threshold=threshold)
-            continue
-        grids[key] = {
-            "data": _prep_heatmap(arr, step=step, threshold=threshold),
-            "xLabel": "Column",
-            "yLabel": "Row",
-        }
-
-    if delta_grid is None:
+        cached = _read_cache(path, threshold, step) if use_cache else None
+        if cached is not None:
+            grids[key] = cached
+        else:
+            pending[key] = (path, threshold, step)
+
+    if pending:
+        workers = min(len(pending), workers or os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(_process_png, *spec) for key, spec in pending.items()}
+                computed = {key: future.result() for key, future in futures.items()}
+        else:
+            computed = {key: _process_png(*spec) for key, spec in pending.items()}
+        for key, grid in computed.items():
+            _write_cache(*pending[key], grid)
+            grids[key] = grid
+
+    return {key: grids[key] for key in PNG_SPECS}
+
+
+def encode_heatmap(grid: np.ndarray, dtype: str = "uint8") -> dict:
+    """Quantised grid: ``value = offset + q * scale``; the dtype's max code is NaN."""
+    return {**encode_grid(grid, dtype), "xLabel": "Column", "yLabel": "Row"}
+
+
+def build_payload(workers: int | None = None, dtype: str = "uint8", use_cache: bool = True) -> dict:
+    arrays = load_grids(workers, use_cache)
+    if "plot_delta_nflh" not in arrays:
         raise RuntimeError("Delta NFLH grid missing")
-    grids["delta_from_pairs"] = {
-        "data": delta_grid,
-        "xLabel": "Column",
-        "yLabel": "Row",
-    }
+    d = arrays.pop("plot_delta_nflh")
+    arrays["delta_from_pairs"] = d
+    grids = {key: encode_heatmap(grid, dtype) for key, grid in arrays.items()}
 
-    d = np.array(delta_grid)
     flat = d.flatten()
     top_idx = np.argpartition(flat, -3)[-3:]
     hotspots = []
@@ -90,8 +154,8 @@ def build_payload() -> dict:
             }
         )
 
-    nflh05 = np.array(grids["nflh_05Sep"]["data"])
-    nflh09 = np.array(grids["nflh_09Sep"]["data"])
+    nflh05 = arrays["nflh_05Sep"]
+    nflh09 = arrays["nflh_09Sep"]
     num_points = nflh05.shape[1]
     wavelengths = list(range(410, 410 + num_points * 10, 10))
 
@@ -100,17 +164,31 @@ def build_payload() -> dict:
         "lines": {
             "rrs_mean": {
                 "wavelength": wavelengths,
-                "rrs05": nflh05.mean(axis=0).tolist(),
-                "rrs09": nflh09.mean(axis=0).tolist(),
+                "rrs05": nflh05.mean(axis=0).round(5).tolist(),
+                "rrs09": nflh09.mean(axis=0).round(5).tolist(),
             }
         },
         "hotspots": hotspots,
     }
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert PACE PNG outputs into Plotly-ready JSON")
+    parser.add_argument("--workers", type=int, default=None, help="Decoder processes (default: CPU count)")
+    parser.add_argument(
+        "--dtype",
+        choices=GRID_DTYPES,
+        default="uint8",
+        help="Grid quantisation (default: %(default)s)",
+    )
+    parser.add_argument("--refresh", action="store_true", help=f"Ignore the PNG cache in {CACHE_DIR}")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    payload = build_payload()
+    args = parse_args()
+    payload = build_payload(args.workers, args.dtype, use_cache=not args.refresh)
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     with OUT_PATH.open("w", encoding="utf-8") as f:
-        json.dump(payload, f)
+        json.dump(payload, f, separators=(",", ":"))
     print(f"Interactive payload written to {OUT_PATH}")
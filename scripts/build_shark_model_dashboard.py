@@ -3,14 +3,44 @@
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import re
+import sys
+import zlib
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
+from typing import Iterable
+
+from binary_payload import ArrayPacker, write_payload
+from downsample import METHODS as DOWNSAMPLE_METHODS, downsample_indices
+from nasa_simulator import simulate_batch
+from streaming_stats import QuantileSketch
+from sai_formula import (
+    CHL_SATURATION,
+    NOISE_SIGMA,
+    SST_OPTIMUM,
+    SST_SIGMA,
+    WEIGHTS,
+    productivity_response,
+    temperature_preference,
+)
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 OUTPUT_PATH = BASE_DIR / "src" / "data" / "sharkModelDashboard.json"
+BINARY_DIR = BASE_DIR / "public" / "data" / "shark-model"
+BINARY_STEM = "sharkModelDashboard"
+SHARD_DIR = BINARY_DIR / "regions"
+SHARD_INDEX = "index.json"
+SHARD_VERSION = 3
+SHARD_INPUTS = ("date", "lat", "lon", "sst", "chlorophyll", "sea_level_anomaly", "is_custom")
+SHARD_PATTERN = re.compile(r"^.+\.[0-9a-f]{12}\.json$")
+TIMESERIES_POINTS = 32
+ZOOM_LEVELS = (32, 128, 512)
+DOWNSAMPLE_METHOD = "lttb"
+HOTSPOT_PERCENTILE = 80
 
 REGIONS = {
     "gulf_stream": (35.0, -75.0),
@@ -29,76 +59,76 @@ FORMULA_CARDS = [
         "expression": "SAI = w1 · g(SST) + w2 · h(Chl-a) + w3 · k(|SLA|) + ε",
         "description": "Weighted blend of thermal preference, chlorophyll productivity, and sea-level anomaly magnitude.",
         "details": [
-            "w1 = 0.35, w2 = 0.40, w3 = 0.25",
-            "g(SST): Gaussian preference around 22 °C (σ = 6 °C)",
-            "h(Chl-a): Productivity response log(1 + Chl-a) · (1 - exp(-Chl-a/0.3))",
+            "w1 = {:.2f}, w2 = {:.2f}, w3 = {:.2f}".format(*WEIGHTS),
+            f"g(SST): Gaussian preference around {SST_OPTIMUM:g} °C (σ = {SST_SIGMA:g} °C)",
+            f"h(Chl-a): Productivity response log(1 + Chl-a) · (1 - exp(-Chl-a/{CHL_SATURATION:g}))",
             "k(|SLA|): Normalised eddy energy proxy",
-            "ε ~ N(0, 0.2)"
+            f"ε ~ N(0, {NOISE_SIGMA:g})"
         ]
     },
     {
         "title": "Thermal preference",
         "expression": "g(SST) = exp(-0.5 · ((SST - μ) / σ)^2)",
         "description": "Captures preference for mild waters.",
-        "details": ["μ = 22 °C", "σ = 6 °C"]
+        "details": [f"μ = {SST_OPTIMUM:g} °C", f"σ = {SST_SIGMA:g} °C"]
     },
     {
         "title": "Productivity response",
         "expression": "h(Chl-a) = log(1 + Chl-a) · (1 - exp(-Chl-a / κ))",
         "description": "Links phytoplankton biomass to feeding opportunities.",
-        "details": ["κ = 0.3", "Chl-a in mg m⁻³"]
+        "details": [f"κ = {CHL_SATURATION:g}", "Chl-a in mg m⁻³"]
     }
 ]
 
 
-def simulate_nasa_satellite_data(lat: float, lon: float, days: int = 365) -> pd.DataFrame:
-    dates = pd.date_range(end=datetime.utcnow(), periods=days, freq="D")
-    t = np.arange(days)
-    seasonal = np.sin(2 * np.pi * t / 365)
-
-    sst_base = 15 + 10 * (1 + np.sin(np.radians(lat))) / 2
-    sst = sst_base + 5 * seasonal + np.random.normal(0, 1, days)
-
-    chlor_base = 0.1 + 0.5 * np.abs(np.sin(np.radians(lat)))
-    chlorophyll = np.maximum(0.01, chlor_base + 0.3 * seasonal + np.random.normal(0, 0.1, days))
+def _activity_terms(df: pd.DataFrame) -> dict:
+    return {
+        "sst": df["sst"],
+        "chlorophyll": df["chlorophyll"],
+        "sla": np.abs(df["sea_level_anomaly"]),
+        "temp_pref": temperature_preference(df["sst"]),
+        "productivity": productivity_response(df["chlorophyll"]),
+    }
 
-    sla = np.random.normal(0, 0.15, days) + 0.1 * seasonal
-    salinity = 35 + 2 * np.random.normal(0, 0.5, days)
 
-    return pd.DataFrame(
-        {
-            "date": dates,
-            "lat": lat,
-            "lon": lon,
-            "sst": sst,
-            "chlorophyll": chlorophyll,
-            "sea_level_anomaly": sla,
-            "salinity": salinity,
-        }
+def _raw_activity(terms: dict, stats: dict) -> pd.Series:
+    norm = {name: (terms[name] - stats[name]["mean"]) / stats[name]["std"] for name in terms}
+    w1, w2, w3 = WEIGHTS
+    return (
+        w1 * norm["temp_pref"] + w2 * norm["productivity"] + w3 * norm["sla"]
+        + 0.15 * norm["sst"] + 0.10 * norm["chlorophyll"]
     )
 
 
-def calculate_shark_activity(df: pd.DataFrame) -> pd.Series:
-    sst_norm = (df["sst"] - df["sst"].mean()) / df["sst"].std()
-    chlor_norm = (df["chlorophyll"] - df["chlorophyll"].mean()) / df["chlorophyll"].std()
-    sla_norm = (np.abs(df["sea_level_anomaly"]) - np.abs(df["sea_level_anomaly"]).mean()) / np.abs(df["sea_level_anomaly"]).std()
+def activity_stats(df: pd.DataFrame) -> dict:
+    """Global normalisation constants of ``calculate_shark_activity`` (z-scores and min/max)."""
+    terms = _activity_terms(df)
+    stats = {name: {"mean": float(values.mean()), "std": float(values.std())} for name, values in terms.items()}
+    activity = _raw_activity(terms, stats)
+    stats["activity"] = {"min": float(activity.min()), "max": float(activity.max())}
+    return stats
 
-    temp_pref = np.exp(-0.5 * ((df["sst"] - 22) / 6) ** 2)
-    temp_pref_norm = (temp_pref - temp_pref.mean()) / temp_pref.std()
 
-    productivity = np.log(1 + df["chlorophyll"]) * (1 - np.exp(-df["chlorophyll"] / 0.3))
-    prod_norm = (productivity - productivity.mean()) / productivity.std()
+def calculate_shark_activity(df: pd.DataFrame, stats: dict | None = None) -> pd.Series:
+    """Min-max scaled SAI; ``stats`` from a larger frame lets a subset be scored consistently."""
+    stats = stats or activity_stats(df)
+    activity = _raw_activity(_activity_terms(df), stats)
+    lo, hi = stats["activity"]["min"], stats["activity"]["max"]
+    return (activity - lo) / (hi - lo + 1e-8)
 
-    activity = 0.35 * temp_pref_norm + 0.40 * prod_norm + 0.25 * sla_norm + 0.15 * sst_norm + 0.10 * chlor_norm
-    return (activity - activity.min()) / (activity.max() - activity.min() + 1e-8)
 
+def region_generators(coords: np.ndarray, seed: int | None = None) -> list | np.random.Generator:
+    """One generator per region derived from ``seed`` and its coordinates (fresh entropy without a seed)."""
+    if seed is None:
+        return np.random.default_rng()
+    return [np.random.default_rng([seed, zlib.crc32(f"{lat:.6f},{lon:.6f}".encode())]) for lat, lon in coords]
 
-def build_dataset() -> pd.DataFrame:
-    frames = []
-    for region, (lat, lon) in REGIONS.items():
-        region_df = simulate_nasa_satellite_data(lat, lon)
-        region_df["region"] = region
-        region_df["is_custom"] = region not in {
+
+def build_dataset(seed: int | None = None) -> pd.DataFrame:
+    names = list(REGIONS)
+    coords = np.array([REGIONS[name] for name in names])
+    is_custom = [
+        region not in {
             "gulf_stream",
             "california_current",
             "great_barrier_reef",
@@ -106,30 +136,74 @@ def build_dataset() -> pd.DataFrame:
             "south_africa",
             "galapagos",
         }
-        frames.append(region_df)
-    data = pd.concat(frames, ignore_index=True)
+        for region in names
+    ]
+    # Whole UTC days and one generator per region (keyed by seed and coordinates), so a
+    # seeded run is reproducible and adding a region leaves the other regions' shards alone.
+    end = pd.Timestamp.now(tz="UTC").normalize().tz_localize(None)
+    series = simulate_batch(coords[:, 0], coords[:, 1], end=end, rng=region_generators(coords, seed))
+    data = series.to_long(names, is_custom)
     data["shark_activity"] = calculate_shark_activity(data)
     return data
 
 
-def downsample_timeseries(df: pd.DataFrame, step: int = 14) -> pd.DataFrame:
-    idx = np.arange(0, len(df), step)
-    return df.iloc[idx]
-
-
-def build_payload() -> dict:
-    df = build_dataset()
-
-    time_series = {}
-    for region, group in df.groupby("region"):
-        group = group.sort_values("date")
-        sample = downsample_timeseries(group)
-        time_series[region] = {
-            "date": sample["date"].dt.strftime("%Y-%m-%d").tolist(),
-            "activity": sample["shark_activity"].round(3).tolist(),
-            "sst": sample["sst"].round(2).tolist(),
-            "chlorophyll": sample["chlorophyll"].round(3).tolist(),
-        }
+def _epoch_days(dates: pd.Series) -> np.ndarray:
+    return dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def downsample_timeseries(
+    df: pd.DataFrame, points: int = TIMESERIES_POINTS, method: str = DOWNSAMPLE_METHOD
+) -> pd.DataFrame:
+    """Keep ``points`` samples of one date-sorted region, chosen on the activity curve."""
+    idx = downsample_indices(df["shark_activity"].to_numpy(), points, method, x=_epoch_days(df["date"]))
+    return df.iloc[np.unique(idx)]
+
+
+def sample_positions(ordered: pd.DataFrame, points: int = TIMESERIES_POINTS, method: str = DOWNSAMPLE_METHOD) -> np.ndarray:
+    """Row positions of ``ordered`` (sorted by region, date) kept by the downsampler.
+
+    Regions with equal history length are downsampled together as one
+    (regions, dates) array.
+    """
+    lengths = ordered.groupby("region", sort=True).size().to_numpy()
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    activity = ordered["shark_activity"].to_numpy(dtype=np.float64)
+    days = _epoch_days(ordered["date"]).astype(np.float64)
+    positions = []
+    for length in np.unique(lengths):
+        group_starts = starts[lengths == length]
+        rows = group_starts[:, None] + np.arange(length)[None, :]
+        idx = downsample_indices(activity[rows], points, method, x=days[rows])
+        # min/max marks a region's empty (all-NaN) buckets with -1
+        positions.append((group_starts[:, None] + idx)[idx >= 0])
+    return np.unique(np.concatenate(positions)) if positions else np.empty(0, dtype=np.intp)
+
+
+def hotspot_threshold(batches: Iterable[pd.DataFrame], percentile: float = HOTSPOT_PERCENTILE) -> float:
+    """``percentile`` of ``shark_activity`` over a stream of batches via a mergeable ``QuantileSketch``.
+
+    Matches ``np.percentile`` to the sketch's documented rank error without
+    holding more than one batch at a time.
+    """
+    sketch = QuantileSketch()
+    for batch in batches:
+        sketch.update(batch["shark_activity"].to_numpy())
+    return float(sketch.percentile(percentile))
+
+
+def summarize(
+    df: pd.DataFrame,
+    points: int = TIMESERIES_POINTS,
+    method: str = DOWNSAMPLE_METHOD,
+    threshold: float | None = None,
+) -> dict:
+    """Vectorised building blocks shared by the JSON and binary payloads.
+
+    ``threshold`` is the hotspot cut-off on ``shark_activity``; by default it
+    is streamed over the regions with ``hotspot_threshold``.
+    """
+    ordered = df.sort_values(["region", "date"], kind="stable")
+    samples = ordered.iloc[sample_positions(ordered, points, method)]
 
     region_stats = (
         df.groupby("region")
@@ -146,23 +220,66 @@ def build_payload() -> dict:
         .reset_index()
     )
 
-    region_summary = [
+    if threshold is None:
+        threshold = hotspot_threshold(group for _, group in df.groupby("region", sort=False))
+    hotspots = df[df["shark_activity"] > threshold].sort_values("shark_activity", ascending=False).head(10)
+
+    return {
+        "samples": samples,
+        "region_stats": region_stats,
+        "scatter": df.sample(n=min(len(df), 400), random_state=42),
+        "hotspots": hotspots,
+    }
+
+
+def hotspot_records(hotspots: pd.DataFrame) -> list:
+    return pd.DataFrame(
         {
-            "region": row["region"],
-            "lat": round(float(row["lat"]), 2),
-            "lon": round(float(row["lon"]), 2),
-            "activityMean": round(float(row["activity_mean"]), 3),
-            "activityMax": round(float(row["activity_max"]), 3),
-            "sstMean": round(float(row["sst_mean"]), 2),
-            "chlorMean": round(float(row["chlor_mean"]), 3),
-            "sampleCount": int(row["count"]),
-            "isCustom": bool(row["is_custom"]),
+            "region": hotspots["region"],
+            "date": hotspots["date"].dt.strftime("%Y-%m-%d"),
+            "activity": hotspots["shark_activity"].astype(float).round(3),
+            "sst": hotspots["sst"].astype(float).round(2),
+            "chlorophyll": hotspots["chlorophyll"].astype(float).round(3),
         }
-        for _, row in region_stats.iterrows()
-    ]
+    ).to_dict(orient="records")
+
+
+def build_payload(
+    df: pd.DataFrame | None = None, method: str = DOWNSAMPLE_METHOD, threshold: float | None = None
+) -> dict:
+    df = build_dataset() if df is None else df
+    parts = summarize(df, method=method, threshold=threshold)
+
+    time_series = {region: timeseries_record(sample) for region, sample in parts["samples"].groupby("region")}
+
+    return {
+        "generatedAt": pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "formulas": FORMULA_CARDS,
+        "regions": region_records(parts["region_stats"]),
+        "timeSeries": time_series,
+        "scatter": scatter_records(parts["scatter"]),
+        "hotspots": hotspot_records(parts["hotspots"]),
+    }
+
+
+def region_records(region_stats: pd.DataFrame) -> list:
+    return pd.DataFrame(
+        {
+            "region": region_stats["region"],
+            "lat": region_stats["lat"].astype(float).round(2),
+            "lon": region_stats["lon"].astype(float).round(2),
+            "activityMean": region_stats["activity_mean"].astype(float).round(3),
+            "activityMax": region_stats["activity_max"].astype(float).round(3),
+            "sstMean": region_stats["sst_mean"].astype(float).round(2),
+            "chlorMean": region_stats["chlor_mean"].astype(float).round(3),
+            "sampleCount": region_stats["count"].astype(int),
+            "isCustom": region_stats["is_custom"].astype(bool),
+        }
+    ).to_dict(orient="records")
 
-    sample_df = df.sample(n=min(len(df), 400), random_state=42)
-    scatter_payload = {
+
+def scatter_records(sample_df: pd.DataFrame) -> dict:
+    return {
         "sst": sample_df["sst"].round(2).tolist(),
         "chlorophyll": sample_df["chlorophyll"].round(3).tolist(),
         "activity": sample_df["shark_activity"].round(3).tolist(),
@@ -170,34 +287,237 @@ def build_payload() -> dict:
         "isCustom": sample_df["is_custom"].tolist(),
     }
 
-    threshold = np.percentile(df["shark_activity"], 80)
-    hotspots_df = df[df["shark_activity"] > threshold].sort_values("shark_activity", ascending=False).head(10)
-    hotspots = [
-        {
-            "region": row["region"],
-            "date": row["date"].strftime("%Y-%m-%d"),
-            "activity": round(float(row["shark_activity"]), 3),
-            "sst": round(float(row["sst"]), 2),
-            "chlorophyll": round(float(row["chlorophyll"]), 3),
-        }
-        for _, row in hotspots_df.iterrows()
-    ]
 
+def timeseries_record(sample: pd.DataFrame) -> dict:
     return {
-        "generatedAt": pd.Timestamp.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "date": sample["date"].dt.strftime("%Y-%m-%d").tolist(),
+        "activity": sample["shark_activity"].round(3).tolist(),
+        "sst": sample["sst"].round(2).tolist(),
+        "chlorophyll": sample["chlorophyll"].round(3).tolist(),
+    }
+
+
+def shard_hash(region: str, group: pd.DataFrame, stats: dict, method: str = DOWNSAMPLE_METHOD) -> str:
+    """Hash of everything a region shard depends on: its inputs, the global stats and the formula."""
+    digest = hashlib.sha256()
+    settings = {
+        "version": SHARD_VERSION,
+        "region": region,
+        "stats": stats,
+        "weights": WEIGHTS,
+        "constants": [SST_OPTIMUM, SST_SIGMA, CHL_SATURATION],
+        "points": TIMESERIES_POINTS,
+        "levels": ZOOM_LEVELS,
+        "method": method,
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for column in SHARD_INPUTS:
+        digest.update(np.ascontiguousarray(group[column].to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def _load_index(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def build_shards(
+    df: pd.DataFrame | None = None,
+    directory: Path = SHARD_DIR,
+    pin_stats: bool = False,
+    method: str = DOWNSAMPLE_METHOD,
+    threshold: float | None = None,
+) -> dict:
+    """Write one JSON shard per region plus ``index.json``; unchanged shards are skipped.
+
+    Shards are named ``{region}.{hash[:12]}.json`` after ``shard_hash``, so a
+    region is only serialised again when its inputs, the global normalisation
+    or the formula change, and stale shards are deleted. The index carries the
+    normalisation stats, the region summaries, the shard file and hash of every
+    region, and the global scatter/hotspot blocks.
+
+    Each shard carries its time series only as ``levels`` keyed by target point
+    count (``ZOOM_LEVELS``; the coarsest equals the monolithic ``timeSeries``).
+    The index lists the levels, and the consumer fetches the one it needs
+    (``/api/shark-model/<region>?points=32`` first, finer ones on zoom).
+
+    The SAI is normalised over all regions, so new inputs for one region
+    normally re-key every shard. ``pin_stats=True`` scores against the stats
+    stored in the existing index instead, so only regions whose own inputs
+    changed are rewritten; a given hotspot ``threshold`` is then recomputed
+    because the activity is rescored.
+    """
+    df = build_dataset() if df is None else df
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    index_path = directory / SHARD_INDEX
+    previous_index = _load_index(index_path)
+    previous = {entry["region"]: entry for entry in previous_index.get("regions", [])}
+
+    if pin_stats and "stats" in previous_index:
+        stats = previous_index["stats"]
+        df = df.assign(shark_activity=calculate_shark_activity(df, stats))
+        threshold = None
+    else:
+        stats = activity_stats(df)
+    parts = summarize(df, method=method, threshold=threshold)
+    summaries = {entry["region"]: entry for entry in region_records(parts["region_stats"])}
+    entries, written, skipped = [], 0, 0
+    for region, group in df.groupby("region", sort=True):
+        digest = shard_hash(region, group, stats, method)
+        filename = f"{re.sub(r'[^A-Za-z0-9_-]', '_', region)}.{digest[:12]}.json"
+        entries.append({**summaries[region], "shard": filename, "hash": digest})
+        old = previous.get(region)
+        if old is not None and old.get("hash") == digest and (directory / filename).exists():
+            skipped += 1
+            continue
+        ordered = group.sort_values("date")
+        shard = {
+            "region": region,
+            "hash": digest,
+            "summary": summaries[region],
+            "levels": {
+                str(level): timeseries_record(downsample_timeseries(ordered, level, method)) for level in ZOOM_LEVELS
+            },
+        }
+        (directory / filename).write_text(json.dumps(shard, separators=(",", ":")), encoding="utf-8")
+        written += 1
+
+    index = {
+        "format": "shark-model-shards/1",
+        "generatedAt": pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ"),
         "formulas": FORMULA_CARDS,
-        "regions": region_summary,
-        "timeSeries": time_series,
-        "scatter": scatter_payload,
-        "hotspots": hotspots,
+        "stats": stats,
+        "levels": list(ZOOM_LEVELS),
+        "regions": entries,
+        "scatter": scatter_records(parts["scatter"]),
+        "hotspots": hotspot_records(parts["hotspots"]),
     }
+    tmp_path = index_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    tmp_path.replace(index_path)
+
+    keep = {entry["shard"] for entry in entries}
+    removed = 0
+    for path in directory.glob("*.json"):
+        if path.name not in keep and SHARD_PATTERN.match(path.name):
+            path.unlink()
+            removed += 1
+    return {"written": written, "skipped": skipped, "removed": removed}
+
+
+def build_binary_payload(
+    df: pd.DataFrame | None = None, method: str = DOWNSAMPLE_METHOD, threshold: float | None = None
+) -> tuple[dict, ArrayPacker]:
+    """Typed-array variant of ``build_payload``: a JSON manifest plus one packed buffer.
+
+    Summary statistics are float32, time-series and scatter values uint16 with
+    scale/min, dates int32 days since 1970-01-01, region references indices into
+    ``regions.names``. ``src/data/sharkModelBinary.js`` rebuilds the JSON shape.
+    """
+    df = build_dataset() if df is None else df
+    parts = summarize(df, method=method, threshold=threshold)
+    packer = ArrayPacker()
+
+    region_stats = parts["region_stats"]
+    names = region_stats["region"].tolist()
+    code_dtype = "uint8" if len(names) < 256 else "int32"
+    codes = {name: i for i, name in enumerate(names)}
+    for key, column, dtype in (
+        ("lat", "lat", "float32"),
+        ("lon", "lon", "float32"),
+        ("activityMean", "activity_mean", "float32"),
+        ("activityMax", "activity_max", "float32"),
+        ("sstMean", "sst_mean", "float32"),
+        ("chlorMean", "chlor_mean", "float32"),
+        ("sampleCount", "count", "int32"),
+        ("isCustom", "is_custom", "uint8"),
+    ):
+        packer.add(f"regions.{key}", region_stats[column].to_numpy(), dtype)
+
+    samples = parts["samples"]
+    counts = samples.groupby("region").size().reindex(names, fill_value=0).to_numpy()
+    offsets = np.concatenate([[0], np.cumsum(counts)]).tolist()
+    epoch_days = samples["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    packer.add("timeSeries.date", epoch_days, "int32")
+    packer.add("timeSeries.activity", samples["shark_activity"].to_numpy(), "uint16")
+    packer.add("timeSeries.sst", samples["sst"].to_numpy(), "uint16")
+    packer.add("timeSeries.chlorophyll", samples["chlorophyll"].to_numpy(), "uint16")
+
+    scatter = parts["scatter"]
+    packer.add("scatter.sst", scatter["sst"].to_numpy(), "uint16")
+    packer.add("scatter.chlorophyll", scatter["chlorophyll"].to_numpy(), "uint16")
+    packer.add("scatter.activity", scatter["shark_activity"].to_numpy(), "uint16")
+    packer.add("scatter.region", scatter["region"].map(codes).to_numpy(), code_dtype)
+    packer.add("scatter.isCustom", scatter["is_custom"].to_numpy(), "uint8")
+
+    manifest = {
+        "format": "shark-model-binary/1",
+        "generatedAt": pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "formulas": FORMULA_CARDS,
+        "regions": {"names": names},
+        "timeSeries": {"offsets": offsets, "dateUnit": "days-since-epoch"},
+        "hotspots": hotspot_records(parts["hotspots"]),
+    }
+    return manifest, packer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the Shark Activity dashboard payload")
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=("json", "binary", "shards"),
+        default=["json"],
+        help=(
+            "json: src/data/sharkModelDashboard.json; binary: typed arrays + manifest in %s; "
+            "shards: per-region files + index.json in %s (default: json)" % (BINARY_DIR, SHARD_DIR)
+        ),
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the simulated inputs")
+    parser.add_argument(
+        "--downsample",
+        choices=DOWNSAMPLE_METHODS,
+        default=DOWNSAMPLE_METHOD,
+        help="Time-series downsampler: Largest-Triangle-Three-Buckets or per-bucket min/max (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--expect-unchanged",
+        action="store_true",
+        help="shards: exit with status 1 if any shard had to be written (e.g. a repeated --seed run)",
+    )
+    parser.add_argument(
+        "--pin-stats",
+        action="store_true",
+        help="shards: reuse the normalisation stats of the existing index so only changed regions are rebuilt",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
-    payload = build_payload()
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-    print(f"Shark model dashboard payload written to {OUTPUT_PATH}")
+    args = parse_args()
+    df = build_dataset(args.seed)
+    threshold = hotspot_threshold(group for _, group in df.groupby("region", sort=False))
+    if "json" in args.format:
+        payload = build_payload(df, args.downsample, threshold)
+        OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        OUTPUT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"Shark model dashboard payload written to {OUTPUT_PATH}")
+    if "binary" in args.format:
+        manifest, packer = build_binary_payload(df, args.downsample, threshold)
+        written = write_payload(BINARY_DIR, BINARY_STEM, manifest, packer)
+        sizes = ", ".join(f"{path.name} ({path.stat().st_size} B)" for path in written)
+        print(f"Binary shark model payload written to {BINARY_DIR}: {sizes}")
+    if "shards" in args.format:
+        counts = build_shards(df, pin_stats=args.pin_stats, method=args.downsample, threshold=threshold)
+        print(
+            f"Region shards in {SHARD_DIR}: {counts['written']} written, "
+            f"{counts['skipped']} unchanged, {counts['removed']} removed"
+        )
+        if args.expect_unchanged and (counts["written"] or counts["removed"]):
+            sys.exit("Region shards changed although --expect-unchanged was given")
 
 
 if __name__ == "__main__":
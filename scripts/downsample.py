@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Shape-preserving time-series downsampling.
+
+``lttb_indices`` implements Largest-Triangle-Three-Buckets: the first and last
+samples are always kept and every bucket in between contributes the point that
+forms the largest triangle with the previously kept point and the mean of the
+next bucket, so spikes survive where fixed-stride decimation would drop them.
+``minmax_indices`` keeps the minimum and maximum of each bucket instead;
+buckets without a finite sample are dropped (``-1`` in the 2-D form).
+
+Both accept a 2-D ``y`` of shape (series, samples), with ``x`` either shared
+(samples,) or per series, and work on all series at once; only LTTB's bucket
+walk is a Python loop (one iteration per output point).
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _as_2d(y) -> tuple[np.ndarray, bool]:
+    y = np.asarray(y, dtype=np.float64)
+    return (y[None, :], True) if y.ndim == 1 else (y, False)
+
+
+def lttb_indices(y, n_out: int, x=None) -> np.ndarray:
+    """Indices of the ``n_out`` LTTB points per series (shape (series, n_out) or (n_out,))."""
+    y, squeeze = _as_2d(y)
+    rows, n = y.shape
+    if n_out >= n or n_out < 3:
+        idx = np.broadcast_to(np.arange(n), (rows, n)).copy()
+        return idx[0] if squeeze else idx
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    x = np.broadcast_to(x, (rows, n))
+    filled = np.where(np.isfinite(y), y, np.nanmean(y, axis=1, keepdims=True))
+    filled = np.nan_to_num(filled)
+
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.intp) + 1
+    edges[-1] = n - 1
+    out = np.empty((rows, n_out), dtype=np.intp)
+    out[:, 0] = 0
+    out[:, -1] = n - 1
+    a = np.zeros(rows, dtype=np.intp)
+    row = np.arange(rows)
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        xc = x[:, hi:next_hi].mean(axis=1)
+        yc = filled[:, hi:next_hi].mean(axis=1)
+        xa, ya = x[row, a], filled[row, a]
+        area = np.abs(
+            (xa - xc)[:, None] * (filled[:, lo:hi] - ya[:, None])
+            - (xa[:, None] - x[:, lo:hi]) * (yc - ya)[:, None]
+        )
+        a = lo + np.argmax(area, axis=1)
+        out[:, i + 1] = a
+    return out[0] if squeeze else out
+
+
+def minmax_indices(y, n_out: int) -> np.ndarray:
+    """Indices of per-bucket minima and maxima (``n_out // 2`` buckets), in time order.
+
+    Buckets with no finite sample contribute nothing: a 1-D ``y`` returns only
+    the kept indices, a 2-D ``y`` keeps its rectangular shape with ``-1`` in the
+    slots of a row's empty buckets.
+    """
+    y, squeeze = _as_2d(y)
+    rows, n = y.shape
+    buckets = max(1, n_out // 2)
+    if 2 * buckets >= n:
+        idx = np.broadcast_to(np.arange(n), (rows, n)).copy()
+        return idx[0] if squeeze else idx
+    size = -(-n // buckets)
+    padded = np.full((rows, buckets * size), np.nan)
+    padded[:, :n] = np.where(np.isfinite(y), y, np.nan)
+    blocks = padded.reshape(rows, buckets, size)
+    all_nan = np.isnan(blocks).all(axis=2, keepdims=True)
+    safe = np.where(all_nan, 0.0, blocks)
+    lo = np.nanargmin(np.where(np.isnan(safe), np.inf, safe), axis=2)
+    hi = np.nanargmax(np.where(np.isnan(safe), -np.inf, safe), axis=2)
+    base = (np.arange(buckets) * size)[None, :]
+    idx = np.sort(np.stack([base + lo, base + hi], axis=2), axis=2)
+    idx = np.where(all_nan, -1, idx).reshape(rows, -1)
+    if squeeze:
+        return np.unique(idx[0][idx[0] >= 0])
+    return idx
+
+
+def downsample_indices(y, n_out: int, method: str = "lttb", x=None) -> np.ndarray:
+    if method == "lttb":
+        return lttb_indices(y, n_out, x)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+
+
+def zoom_levels(y, levels: Sequence[int], method: str = "lttb", x=None) -> Dict[int, np.ndarray]:
+    """Indices for several target sizes (coarse to fine); levels above the length keep every sample."""
+    return {int(level): downsample_indices(y, level, method, x) for level in sorted(levels)}
+
+
+__all__ = ["METHODS", "downsample_indices", "lttb_indices", "minmax_indices", "zoom_levels"]
@@ -15,18 +15,74 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import xarray as xr
 import yaml
 
+from grid_deltas import DeltaFeature, GridRingBuffer, add_delta_features, parse_delta_features
+from spectral_kernels import spectral_features
+from swath_binning import BinnedGranule, GridSpec, PixelIndexCache, bin_granule, merge_bins, to_frame
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_CONFIG = "configs/pipeline.yml"
 
+# Fixed schema of the per-pixel feature table (--per-pixel); every granule is cast to it
+# so row groups from different files concatenate without type drift.
+FEATURE_SCHEMA = pa.schema(
+    [
+        ("lat", pa.float32()),
+        ("lon", pa.float32()),
+        ("nflh", pa.float32()),
+        ("avw", pa.float32()),
+        ("oc4", pa.float32()),
+        ("oc4_ratio", pa.float32()),
+        ("pace_predator_coupling_index", pa.float32()),
+        ("pace_file", pa.string()),
+    ]
+)
+# Gridded table (one row per occupied cell and time window), see swath_binning;
+# grid_schema appends the configured delta_* columns.
+GRID_FEATURE_SCHEMA = pa.schema(
+    [
+        ("window_start", pa.timestamp("s")),
+        ("cell", pa.int64()),
+        ("lat", pa.float32()),
+        ("lon", pa.float32()),
+        ("pixel_count", pa.int32()),
+        ("nflh", pa.float32()),
+        ("avw", pa.float32()),
+        ("oc4", pa.float32()),
+        ("oc4_ratio", pa.float32()),
+        ("pace_predator_coupling_index", pa.float32()),
+        ("sst", pa.float32()),
+    ]
+)
+BINNED_COLUMNS = ("nflh", "avw", "oc4", "oc4_ratio", "pace_predator_coupling_index")
+SST_VARIABLE = "sst"
+ROW_GROUP_ROWS = 1 << 20
+
+# Per-process cache of pixel-to-cell indices (worker processes each get one;
+# the .npz files under outputs/bin_index are shared between them).
+_INDEX_CACHE = PixelIndexCache()
+
+
+def grid_schema(deltas: List[DeltaFeature]) -> pa.Schema:
+    schema = GRID_FEATURE_SCHEMA
+    for delta in deltas:
+        schema = schema.append(pa.field(delta.name, pa.float32()))
+    return schema
+
 
 def _load_config(path: str | Path) -> Dict:
     cfg_path = Path(path)
@@ -47,23 +103,6 @@ def _open_dataset(path: Path, group: str | None = None) -> xr.Dataset:
     return xr.open_dataset(path, group=group) if group else xr.open_dataset(path)
 
 
-def _compute_oc4(rrs: xr.DataArray, wavelengths: xr.DataArray) -> xr.DataArray:
-    """Compute OC4 proxy using standard 443/490/510/555 nm bands."""
-    target_bands = {}
-    for nm in (443, 490, 510, 555):
-        idx = int(np.nanargmin(np.abs(wavelengths.values - nm)))
-        target_bands[nm] = rrs.isel(band=idx)
-
-    numerator = xr.concat(
-        [target_bands[443], target_bands[490], target_bands[510]],
-        dim="band_max",
-    ).max(dim="band_max")
-    ratio = numerator / target_bands[555]
-    a0, a1, a2, a3, a4 = 0.3272, -2.9940, 2.7218, -1.2259, -0.5683
-    log_r = np.log10(ratio.clip(min=1e-6))
-    return 10 ** (a0 + a1 * log_r + a2 * log_r**2 + a3 * log_r**3 + a4 * log_r**4)
-
-
 def _pace_derived_fields(pace_path: Path) -> Tuple[pd.DataFrame, xr.DataArray, xr.Dataset]:
     geo = _open_dataset(pace_path, group="geophysical_data")
     nav = _open_dataset(pace_path, group="navigation_data")
@@ -71,10 +110,10 @@ def _pace_derived_fields(pace_path: Path) -> Tuple[pd.DataFrame, xr.DataArray, x
 
     nflh = geo["nflh"].load()
     avw = geo["avw"].load()
-    rrs = geo["Rrs"].load()
-    wavelengths = sensor["wavelength"].load()
+    wavelengths = sensor["wavelength"].values
 
-    oc4 = _compute_oc4(rrs, wavelengths)
+    # Rrs stays lazy: the kernel reads the four OC4 bands block by block.
+    spectral = spectral_features(geo["Rrs"].variable, wavelengths, nflh.values, avw.values)
 
     df = pd.DataFrame(
         {
@@ -82,35 +121,157 @@ def _pace_derived_fields(pace_path: Path) -> Tuple[pd.DataFrame, xr.DataArray, x
             "lon": nav["longitude"].values.flatten(),
             "nflh": nflh.values.flatten(),
             "avw": avw.values.flatten(),
-            "oc4": oc4.values.flatten(),
+            **{name: values.ravel() for name, values in spectral.items()},
         }
     )
     df["pace_file"] = pace_path.name
     return df, nflh, nav
 
 
-def _aggregate_features(cfg: Dict) -> Tuple[pd.DataFrame, List[Dict]]:
+def _granule_time(pace_path: Path) -> datetime:
+    """Start time from OBPG names (``PACE_OCI.YYYYMMDDTHHMMSS...``, ``AQUA_MODIS.…``) or ``time_coverage_start``."""
+    parts = pace_path.name.split(".")
+    if len(parts) > 1:
+        try:
+            return datetime.strptime(parts[1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    with _open_dataset(pace_path) as root:
+        stamp = pd.Timestamp(root.attrs["time_coverage_start"])
+    # Always tz-aware UTC, like the filename parse, so granules sort together.
+    stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp.tz_convert("UTC")
+    return stamp.to_pydatetime()
+
+
+def _granule_task(pace_path: Path) -> Tuple[pd.DataFrame, xr.DataArray, np.ndarray, np.ndarray]:
+    """``_pace_derived_fields`` reduced to picklable results (no open file handles)."""
+    logger.info("Processing %s", pace_path)
+    df, nflh, nav = _pace_derived_fields(pace_path)
+    lat_values = nav["latitude"].values.flatten()
+    lon_values = nav["longitude"].values.flatten()
+    nav.close()
+    return df, nflh, lat_values, lon_values
+
+
+def _grid_task(item: Tuple[Path, str], spec: GridSpec) -> BinnedGranule:
+    """Bin one PACE (``nflh``/``avw``/``oc4``) or SST granule onto the grid.
+
+    Runs in the worker, so only the per-cell sums and counts travel back.
+    """
+    path, kind = item
+    logger.info("Processing %s", path)
+    window = spec.window_start(_granule_time(path))
+    if kind == "sst":
+        with _open_dataset(path, group="geophysical_data") as geo, _open_dataset(path, group="navigation_data") as nav:
+            lat = nav["latitude"].values.ravel()
+            lon = nav["longitude"].values.ravel()
+            values = {SST_VARIABLE: geo[SST_VARIABLE].values}
+    else:
+        df, _, nav = _pace_derived_fields(path)
+        nav.close()
+        lat, lon = df["lat"].to_numpy(), df["lon"].to_numpy()
+        values = {name: df[name].to_numpy() for name in BINNED_COLUMNS}
+    return bin_granule(_INDEX_CACHE.get(lat, lon, spec), values, window)
+
+
+def _map_ordered(task: Callable, items: List, workers: int = 1) -> Iterator:
+    """``task(item)`` for every item, in order, computed in up to ``workers`` processes.
+
+    Results are yielded in submission order, so the caller sees the same
+    sequence as a serial run. At most ``workers`` items are in flight: the
+    next one is submitted only after the head result has been handed out, so
+    granules that finish early do not pile up in the parent process.
+    """
+    if workers > 1 and len(items) > 1:
+        workers = min(workers, len(items))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque(pool.submit(task, item) for item in items[:workers])
+            for item in items[workers:]:
+                result = pending.popleft().result()
+                pending.append(pool.submit(task, item))
+                yield result
+                del result
+            while pending:
+                yield pending.popleft().result()
+    else:
+        for item in items:
+            yield task(item)
+
+
+class FeatureWriter:
+    """Appends feature frames to one Parquet file as row groups under a fixed schema.
+
+    Only the frame being written is held in memory. The file is written to a
+    ``.partial`` sibling and moved into place by ``close``, so an interrupted run
+    never leaves a truncated table behind; if nothing was written, ``close``
+    leaves an empty placeholder file as before.
+    """
+
+    def __init__(self, path: str | Path, schema: pa.Schema = FEATURE_SCHEMA, row_group_rows: int = ROW_GROUP_ROWS) -> None:
+        self.path = Path(path)
+        self.schema = schema
+        self.row_group_rows = row_group_rows
+        self.rows = 0
+        self._partial = self.path.with_name(self.path.name + ".partial")
+        self._writer: pq.ParquetWriter | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._partial, self.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_rows)
+        self.rows += table.num_rows
+
+    def close(self) -> int:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._partial.replace(self.path)
+        elif not self.rows:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(b"")
+        return self.rows
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._partial.unlink(missing_ok=True)
+
+    def __enter__(self) -> "FeatureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _aggregate_features(cfg: Dict, writer: FeatureWriter, workers: int = 1, spec: GridSpec | None = None) -> List[Dict]:
+    """Stream every granule's features into ``writer``; returns the hotspot records."""
+    if spec is not None:
+        return _aggregate_grid(cfg, writer, spec, workers)
+
     pace_files = _glob_files(cfg["input"]["pace_l2_glob"])
-    feature_frames: List[pd.DataFrame] = []
     hotspots: List[Dict] = []
 
     previous_nflh = None
-    previous_nav = None
     previous_meta = None
     top_n = cfg["processing"].get("hot_spot_top_n", 20)
 
-    for path in pace_files:
-        logger.info("Processing %s", path)
-        df, nflh, nav = _pace_derived_fields(path)
-        feature_frames.append(df)
+    for path, (df, nflh, lat_values, lon_values) in zip(pace_files, _map_ordered(_granule_task, pace_files, workers)):
+        writer.write(df)
+        del df
 
         if previous_nflh is not None:
             delta = nflh - previous_nflh
             flattened = delta.values.flatten()
             if flattened.size:
                 top_idx = np.argpartition(flattened, -top_n)[-top_n:]
-                lat_values = nav["latitude"].values.flatten()
-                lon_values = nav["longitude"].values.flatten()
                 for rank, flat_index in enumerate(top_idx, start=1):
                     hotspots.append(
                         {
@@ -123,30 +284,96 @@ def _aggregate_features(cfg: Dict) -> Tuple[pd.DataFrame, List[Dict]]:
                         }
                     )
         previous_nflh = nflh
-        previous_nav = nav
         previous_meta = path.name
 
-    if not feature_frames:
-        logger.warning("No PACE features constructed; returning empty frame")
-        return pd.DataFrame(), hotspots
-
-    combined = pd.concat(feature_frames, ignore_index=True)
-    return combined, hotspots
+    if not writer.rows:
+        logger.warning("No PACE features constructed; writing empty table")
+    return hotspots
 
 
-def build_features(cfg: Dict) -> None:
-    feature_table, hotspots = _aggregate_features(cfg)
+def _grid_hotspots(frame: pd.DataFrame, delta: DeltaFeature, window: pd.Timestamp, top_n: int) -> List[Dict]:
+    """Top ``top_n`` cells of a window by ``delta``, largest first."""
+    values = frame[delta.name].to_numpy()
+    finite = np.flatnonzero(np.isfinite(values))
+    if not finite.size:
+        return []
+    top = finite[np.argsort(values[finite])[::-1][:top_n]]
+    return [
+        {
+            "rank": rank,
+            "lat": float(frame["lat"].iat[i]),
+            "lon": float(frame["lon"].iat[i]),
+            "delta_nflh": float(values[i]),
+            "window_start": window.isoformat(),
+            "reference": (window - delta.lag).isoformat(),
+        }
+        for rank, i in enumerate(top, start=1)
+    ]
+
+
+def _aggregate_grid(cfg: Dict, writer: FeatureWriter, spec: GridSpec, workers: int = 1) -> List[Dict]:
+    """Gridded table: PACE and SST granules binned per time window, plus delta features.
+
+    Granules are processed in time order; when the window changes, the
+    finished window's parts are merged, its ``delta_*`` columns are looked up
+    in the ring buffer of earlier windows, and it is written and buffered.
+    Hotspots are the cells with the largest ``delta_nflh_*`` per window.
+    """
+    items = [(path, "pace") for path in _glob_files(cfg["input"]["pace_l2_glob"])]
+    if cfg["input"].get("sst_products"):
+        items += [(path, "sst") for path in _glob_files(cfg["input"]["sst_products"])]
+    items.sort(key=lambda item: (_granule_time(item[0]), item[0].name))
+
+    deltas = parse_delta_features(cfg["processing"].get("derived_features") or [])
+    tolerance = pd.Timedelta(hours=spec.time_window_hours)
+    horizon = max((d.lag for d in deltas), default=pd.Timedelta(0)) + tolerance
+    history = GridRingBuffer(pd.Timedelta(hours=spec.time_window_hours), horizon)
+    hotspot_delta = next((d for d in deltas if d.variable == "nflh"), None)
+    top_n = cfg["processing"].get("hot_spot_top_n", 20)
 
+    hotspots: List[Dict] = []
+    window_parts: List[BinnedGranule] = []
+
+    def flush_window() -> None:
+        if not window_parts:
+            return
+        merged = merge_bins(window_parts)
+        window_parts.clear()
+        frame = to_frame(merged, spec)
+        add_delta_features(frame, merged.window, history, deltas, tolerance)
+        history.put(merged.window, merged.cells, {name: frame[name].to_numpy() for name in merged.sums})
+        if hotspot_delta is not None:
+            hotspots.extend(_grid_hotspots(frame, hotspot_delta, merged.window, top_n))
+        writer.write(frame.reindex(columns=writer.schema.names))
+
+    for binned in _map_ordered(partial(_grid_task, spec=spec), items, workers):
+        if window_parts and binned.window != window_parts[0].window:
+            flush_window()
+        window_parts.append(binned)
+    flush_window()
+
+    if not writer.rows:
+        logger.warning("No gridded features constructed; writing empty table")
+    return hotspots
+
+
+def build_features(cfg: Dict, workers: int = 1, per_pixel: bool = False) -> None:
+    """Write the feature table and hotspots.
+
+    The table is gridded on ``processing.grid`` (one row per cell and time
+    window) unless ``per_pixel`` is set or the config has no grid.
+    """
     feature_path = Path(cfg["output"]["feature_table"])
     hotspot_path = Path(cfg["output"]["hotspot_geojson"])
-
-    feature_path.parent.mkdir(parents=True, exist_ok=True)
     hotspot_path.parent.mkdir(parents=True, exist_ok=True)
 
-    if not feature_table.empty:
-        feature_table.to_parquet(feature_path, index=False)
+    spec = None if per_pixel or "grid" not in cfg["processing"] else GridSpec.from_config(cfg)
+    if spec is None:
+        schema = FEATURE_SCHEMA
     else:
-        feature_path.write_bytes(b"")
+        schema = grid_schema(parse_delta_features(cfg["processing"].get("derived_features") or []))
+    with FeatureWriter(feature_path, schema) as writer:
+        hotspots = _aggregate_features(cfg, writer, workers, spec)
 
     hotspot_geojson = {
         "type": "FeatureCollection",
@@ -164,7 +391,7 @@ def build_features(cfg: Dict) -> None:
     }
     hotspot_path.write_text(json.dumps(hotspot_geojson, indent=2), encoding="utf-8")
 
-    logger.info("Wrote %s", feature_path)
+    logger.info("Wrote %s (%d rows)", feature_path, writer.rows)
     logger.info("Wrote %s", hotspot_path)
 
 
@@ -175,6 +402,17 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_CONFIG,
         help="Path to YAML configuration (default: %(default)s)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for per-granule processing; output matches a serial run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--per-pixel",
+        action="store_true",
+        help="Write one row per swath pixel instead of binning onto the processing.grid cells",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -187,7 +425,7 @@ def main() -> None:
     args = parse_args()
     logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
     cfg = _load_config(args.config)
-    build_features(cfg)
+    build_features(cfg, args.workers, args.per_pixel)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Temporal delta features on the binned grid (``delta_nflh_48h``, ``delta_sst_72h``).
+
+``pipeline.yml`` lists deltas as ``delta_<variable>_<hours>h``. Each one is
+
+    delta(cell, t) = x(cell, t) - x(cell, t - lag)
+
+where ``t`` is a time window of ``swath_binning.GridSpec`` and ``x(cell, t -
+lag)`` is the cell's mean in the window ``lag`` earlier, or, if that window
+did not observe the cell, the most recent window within ``tolerance`` before
+it.
+
+``GridRingBuffer`` keeps the per-window cell means of the last ``lag +
+tolerance`` hours in a bounded, time-ordered buffer, so a new window costs a
+``searchsorted`` lookup per candidate past window and one vectorised
+subtraction instead of reopening old granules.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+_DELTA_NAME = re.compile(r"^delta_(?P<var>[a-z0-9_]+?)_(?P<hours>\d+)h$")
+
+
+@dataclass(frozen=True)
+class DeltaFeature:
+    name: str
+    variable: str
+    lag: pd.Timedelta
+
+
+def parse_delta_features(names: Iterable[str]) -> List[DeltaFeature]:
+    """``DeltaFeature`` for every ``delta_<var>_<N>h`` entry; other names are ignored."""
+    out = []
+    for name in names:
+        match = _DELTA_NAME.match(name)
+        if match:
+            out.append(DeltaFeature(name, match["var"], pd.Timedelta(hours=int(match["hours"]))))
+    return out
+
+
+class GridRingBuffer:
+    """Bounded time-indexed buffer of ``window -> (sorted cells, {variable: means})``."""
+
+    def __init__(self, window: pd.Timedelta, horizon: pd.Timedelta) -> None:
+        self.window = pd.Timedelta(window)
+        self.horizon = pd.Timedelta(horizon)
+        self.capacity = int(self.horizon / self.window) + 1
+        self._frames: "OrderedDict[pd.Timestamp, Tuple[np.ndarray, Dict[str, np.ndarray]]]" = OrderedDict()
+
+    def put(self, window: pd.Timestamp, cells: np.ndarray, fields: Dict[str, np.ndarray]) -> None:
+        """Store a window's fields; ``cells`` must be sorted (as ``BinnedGranule.cells`` are)."""
+        self._frames[window] = (np.asarray(cells), fields)
+        self._frames.move_to_end(window)
+        cutoff = window - self.horizon
+        while self._frames and (len(self._frames) > self.capacity or next(iter(self._frames)) < cutoff):
+            self._frames.popitem(last=False)
+
+    def lookup(
+        self,
+        window: pd.Timestamp,
+        cells: np.ndarray,
+        variable: str,
+        lag: pd.Timedelta,
+        tolerance: pd.Timedelta = pd.Timedelta(0),
+    ) -> np.ndarray:
+        """Values of ``variable`` at ``cells`` as of ``window - lag`` (NaN where unobserved)."""
+        target = window - lag
+        out = np.full(len(cells), np.nan)
+        missing = np.ones(len(cells), dtype=bool)
+        for stamp in reversed(self._frames):
+            if stamp > target:
+                continue
+            if stamp < target - tolerance or not missing.any():
+                break
+            past_cells, fields = self._frames[stamp]
+            values = fields.get(variable)
+            if values is None or not past_cells.size:
+                continue
+            pos = np.clip(np.searchsorted(past_cells, cells), 0, past_cells.size - 1)
+            hit = missing & (past_cells[pos] == cells) & np.isfinite(values[pos])
+            out[hit] = values[pos[hit]]
+            missing &= ~hit
+        return out
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+def add_delta_features(
+    frame: pd.DataFrame,
+    window: pd.Timestamp,
+    buffer: GridRingBuffer,
+    deltas: Iterable[DeltaFeature],
+    tolerance: pd.Timedelta = pd.Timedelta(0),
+) -> pd.DataFrame:
+    """Add one column per delta to a window's gridded frame (NaN when the variable is absent)."""
+    cells = frame["cell"].to_numpy()
+    for delta in deltas:
+        if delta.variable not in frame:
+            frame[delta.name] = np.nan
+            continue
+        past = buffer.lookup(window, cells, delta.variable, delta.lag, tolerance)
+        frame[delta.name] = frame[delta.variable].to_numpy(dtype=np.float64) - past
+    return frame
+
+
+__all__ = ["DeltaFeature", "GridRingBuffer", "add_delta_features", "parse_delta_features"]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""NaN-aware mean-pooled multi-resolution pyramids for 2-D grids.
+
+``build_pyramid`` reduces a grid (e.g. a PACE L2 ``nflh`` swath) by block
+means at increasing steps such as 1/2/4/8/16. Each level is computed from the
+previous one by reshaping into ``(rows, s, cols, s)`` blocks and summing, with
+running per-cell sums and finite-value counts, so a cell's value is the mean
+of every finite source pixel it covers (not a mean of means) and a block with
+no finite pixel stays NaN. Ragged edges are padded with NaN.
+
+``write_pyramid`` stores every level as square tiles in the quantised grid
+format of ``binary_payload.encode_grid`` (decoded by
+``src/data/quantizedGrid.js``) under one shared value range, plus a
+``pyramid.json`` manifest, so the page can embed the coarsest level and fetch
+finer tiles on zoom::
+
+    public/data/pace/nflh_05Sep/pyramid.json
+    public/data/pace/nflh_05Sep/4/0_1.json   # level step 4, tile row 0, col 1
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from binary_payload import encode_grid
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_TILE_DIR = BASE_DIR / "public" / "data" / "pace"
+DEFAULT_STEPS = (1, 2, 4, 8, 16)
+TILE_SIZE = 256
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _pool_sums(sums: np.ndarray, counts: np.ndarray, factor: int) -> Tuple[np.ndarray, np.ndarray]:
+    rows, cols = sums.shape
+    out_rows, out_cols = -(-rows // factor), -(-cols // factor)
+    pad = ((0, out_rows * factor - rows), (0, out_cols * factor - cols))
+    sums = np.pad(sums, pad).reshape(out_rows, factor, out_cols, factor).sum(axis=(1, 3))
+    counts = np.pad(counts, pad).reshape(out_rows, factor, out_cols, factor).sum(axis=(1, 3))
+    return sums, counts
+
+
+def _mean(sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    out = np.full(sums.shape, np.nan, dtype=np.float32)
+    np.divide(sums, counts, out=out, where=counts > 0, casting="unsafe")
+    return out
+
+
+def mean_pool(grid, step: int) -> np.ndarray:
+    """Block mean over ``step``×``step`` cells ignoring NaN (float32)."""
+    return build_pyramid(grid, (step,))[step]
+
+
+def build_pyramid(grid, steps: Sequence[int] = DEFAULT_STEPS) -> Dict[int, np.ndarray]:
+    """``{step: pooled grid}`` for increasing steps, each dividing the next."""
+    steps = sorted({int(s) for s in steps})
+    if not steps or steps[0] < 1:
+        raise ValueError(f"Steps must be positive integers, got {steps}")
+    for coarse, fine in zip(steps[1:], steps):
+        if coarse % fine:
+            raise ValueError(f"Step {coarse} is not a multiple of {fine}")
+
+    grid = np.asarray(grid, dtype=np.float64)
+    if grid.ndim != 2:
+        raise ValueError(f"Expected a 2-D grid, got shape {grid.shape}")
+    finite = np.isfinite(grid)
+    sums, counts = np.where(finite, grid, 0.0), finite.astype(np.int32)
+
+    levels: Dict[int, np.ndarray] = {}
+    current = 1
+    for step in steps:
+        if step > current:
+            sums, counts = _pool_sums(sums, counts, step // current)
+            current = step
+        levels[step] = _mean(sums, counts)
+    return levels
+
+
+def value_range(grid) -> Tuple[float, float]:
+    """Finite ``(min, max)`` of a grid (``(0, 0)`` when empty)."""
+    grid = np.asarray(grid)
+    finite = np.isfinite(grid)
+    if not finite.any():
+        return 0.0, 0.0
+    return float(grid[finite].min()), float(grid[finite].max())
+
+
+def write_pyramid(
+    name: str,
+    grid,
+    directory: Path | str = DEFAULT_TILE_DIR,
+    steps: Sequence[int] = DEFAULT_STEPS,
+    tile_size: int = TILE_SIZE,
+    dtype: str = "uint16",
+    url_prefix: str = "/data/pace",
+) -> Dict:
+    """Write every level of ``grid`` as ``{step}/{row}_{col}.json`` tiles plus ``pyramid.json``.
+
+    Returns the manifest, with the coarsest level embedded as ``overview``
+    (an ``encode_grid`` dict on the same value range as the tiles).
+    """
+    levels = build_pyramid(grid, steps)
+    lo, hi = value_range(levels[min(levels)])
+    root = Path(directory) / name
+    root.mkdir(parents=True, exist_ok=True)
+
+    manifest_levels = []
+    for step, level in levels.items():
+        level_dir = root / str(step)
+        level_dir.mkdir(exist_ok=True)
+        for stale in level_dir.glob("*.json"):
+            stale.unlink()
+        rows, cols = level.shape
+        tiles = (-(-rows // tile_size), -(-cols // tile_size))
+        for ty in range(tiles[0]):
+            for tx in range(tiles[1]):
+                tile = level[ty * tile_size:(ty + 1) * tile_size, tx * tile_size:(tx + 1) * tile_size]
+                (level_dir / f"{ty}_{tx}.json").write_text(
+                    json.dumps(encode_grid(tile, dtype, (lo, hi)), separators=(",", ":")),
+                    encoding="utf-8",
+                )
+        manifest_levels.append({"step": step, "shape": [rows, cols], "tiles": list(tiles)})
+
+    coarsest = max(levels)
+    manifest = {
+        "name": name,
+        "shape": list(np.shape(grid)),
+        "range": [lo, hi],
+        "tileSize": tile_size,
+        "tileUrl": f"{url_prefix}/{name}/{{step}}/{{row}}_{{col}}.json",
+        "levels": manifest_levels,
+    }
+    (root / "pyramid.json").write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    LOGGER.info("Wrote %s pyramid (%d levels) to %s", name, len(levels), root)
+    return {**manifest, "overview": {"step": coarsest, **encode_grid(levels[coarsest], dtype, (lo, hi))}}
+
+
+__all__ = [
+    "DEFAULT_STEPS",
+    "TILE_SIZE",
+    "build_pyramid",
+    "mean_pool",
+    "value_range",
+    "write_pyramid",
+]
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""Cached cartopy basemaps and frame-by-frame map animation.
+
+Rasterising LAND/OCEAN/COASTLINE/BORDERS dominates the cost of a cartopy map.
+``BasemapCache`` renders those layers once per (projection, extent, size, dpi,
+features) into an RGBA image, keeps it in memory and as a PNG under
+``outputs/basemaps/``, and ``basemap_axes`` puts it back under a new axes as a
+single ``imshow``. Animations build the figure once and only update the data
+artist between frames, so a 12-month sequence pays the feature cost at most
+once in total.
+
+Example::
+
+    python scripts/map_animation.py --raster outputs/sai/sai_raster.npy --output outputs/sai/sai_animation.gif
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_DIR = BASE_DIR / "outputs" / "basemaps"
+DEFAULT_RASTER = BASE_DIR / "outputs" / "sai" / "sai_raster.npy"
+GLOBAL_EXTENT = (-180.0, 180.0, -90.0, 90.0)
+DEFAULT_FEATURES = ("land", "coastline", "borders", "ocean")
+
+# Same styling as SharkActivityModel.create_global_map used to apply per call
+FEATURE_STYLES = {
+    "land": ("LAND", {"color": "lightgray"}),
+    "coastline": ("COASTLINE", {"linewidth": 0.5}),
+    "borders": ("BORDERS", {"linewidth": 0.3}),
+    "ocean": ("OCEAN", {"color": "lightblue", "alpha": 0.3}),
+}
+
+LOGGER = logging.getLogger(__name__)
+
+BasemapKey = Tuple[str, Tuple[float, ...], Tuple[float, float], int, Tuple[str, ...]]
+
+
+@dataclass
+class Basemap:
+    image: np.ndarray
+    extent: Tuple[float, float, float, float]
+    projection: str
+
+
+def make_projection(name: str):
+    import cartopy.crs as ccrs
+
+    return getattr(ccrs, name)()
+
+
+def render_basemap(
+    projection: str = "PlateCarree",
+    extent: Sequence[float] | None = GLOBAL_EXTENT,
+    figsize: Tuple[float, float] = (16, 10),
+    dpi: int = 100,
+    features: Sequence[str] = DEFAULT_FEATURES,
+) -> Basemap:
+    """Rasterise the static feature layers; the image covers exactly the axes area."""
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1], projection=make_projection(projection))
+    if extent is None:
+        ax.set_global()
+    else:
+        ax.set_extent(extent, crs=ccrs.PlateCarree())
+    for name in features:
+        attr, style = FEATURE_STYLES[name]
+        ax.add_feature(getattr(cfeature, attr), **style)
+    ax.spines["geo"].set_visible(False)
+
+    fig.canvas.draw()
+    buffer = np.asarray(fig.canvas.buffer_rgba())
+    bbox = ax.get_window_extent()
+    height = buffer.shape[0]
+    x0, x1 = int(round(bbox.x0)), int(round(bbox.x1))
+    y0, y1 = height - int(round(bbox.y1)), height - int(round(bbox.y0))
+    image = buffer[y0:y1, x0:x1].copy()
+    return Basemap(image=image, extent=(*ax.get_xlim(), *ax.get_ylim()), projection=projection)
+
+
+class BasemapCache:
+    """In-memory plus on-disk PNG cache of rendered basemaps."""
+
+    def __init__(self, cache_dir: Path | str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = Path(cache_dir)
+        self._memory: Dict[BasemapKey, Basemap] = {}
+
+    @staticmethod
+    def key(projection, extent, figsize, dpi, features) -> BasemapKey:
+        extent = tuple(float(v) for v in extent) if extent is not None else ()
+        return projection, extent, tuple(float(v) for v in figsize), int(dpi), tuple(features)
+
+    def path(self, key: BasemapKey) -> Path:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"{key[0]}_{digest}.png"
+
+    def get(
+        self,
+        projection: str = "PlateCarree",
+        extent: Sequence[float] | None = GLOBAL_EXTENT,
+        figsize: Tuple[float, float] = (16, 10),
+        dpi: int = 100,
+        features: Sequence[str] = DEFAULT_FEATURES,
+    ) -> Basemap:
+        from matplotlib import image as mpimg
+
+        key = self.key(projection, extent, figsize, dpi, features)
+        basemap = self._memory.get(key)
+        if basemap is not None:
+            return basemap
+
+        path = self.path(key)
+        meta_path = path.with_suffix(".json")
+        if path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            image = (mpimg.imread(path) * 255).round().astype(np.uint8)
+            basemap = Basemap(image=image, extent=tuple(meta["extent"]), projection=projection)
+        else:
+            LOGGER.info("Rendering %s basemap (%s)", projection, path.name)
+            basemap = render_basemap(projection, extent, figsize, dpi, features)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            mpimg.imsave(path, basemap.image)
+            meta_path.write_text(json.dumps({"key": list(map(str, key)), "extent": basemap.extent}), encoding="utf-8")
+        self._memory[key] = basemap
+        return basemap
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+
+def basemap_axes(fig, basemap: Basemap, rect=None):
+    """GeoAxes in ``fig`` with ``basemap`` drawn underneath as a single image."""
+    crs = make_projection(basemap.projection)
+    ax = fig.add_subplot(1, 1, 1, projection=crs) if rect is None else fig.add_axes(rect, projection=crs)
+    ax.imshow(basemap.image, extent=basemap.extent, transform=crs, origin="upper", zorder=0, interpolation="none")
+    ax.set_xlim(basemap.extent[:2])
+    ax.set_ylim(basemap.extent[2:])
+    return ax
+
+
+def write_frames(fig, update: Callable[[int], None], n_frames: int, output: Path | str, fps: float = 2, dpi=None) -> Path:
+    """Call ``update(i)`` and capture the figure for each frame.
+
+    ``.gif`` uses Pillow, ``.mp4`` needs ffmpeg on PATH; any other path is a
+    directory that receives ``frame_000.png``, ``frame_001.png``, ...
+    """
+    from matplotlib import animation
+
+    output = Path(output)
+    suffix = output.suffix.lower()
+    if suffix in (".gif", ".mp4"):
+        if suffix == ".mp4" and not animation.FFMpegWriter.isAvailable():
+            raise RuntimeError("ffmpeg not found on PATH; write a .gif or a PNG frame directory instead")
+        writer = animation.PillowWriter(fps=fps) if suffix == ".gif" else animation.FFMpegWriter(fps=fps)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with writer.saving(fig, str(output), dpi or fig.dpi):
+            for i in range(n_frames):
+                update(i)
+                writer.grab_frame()
+    else:
+        output.mkdir(parents=True, exist_ok=True)
+        for i in range(n_frames):
+            update(i)
+            fig.savefig(output / f"frame_{i:03d}.png", dpi=dpi or fig.dpi)
+    LOGGER.info("Wrote %d frames to %s", n_frames, output)
+    return output
+
+
+def animate_raster(
+    raster: np.ndarray,
+    labels: Sequence[str],
+    output: Path | str,
+    projection: str = "PlateCarree",
+    step: int = 2,
+    fps: float = 2,
+    dpi: int = 100,
+    cmap: str = "hot",
+    cache: BasemapCache | None = None,
+    features: Sequence[str] = DEFAULT_FEATURES,
+) -> Path:
+    """Animate a (months, 1800, 3600) global grid such as the ``sai_raster`` output.
+
+    ``step`` subsamples the grid for display; NaN cells (land) stay transparent
+    so the cached basemap shows through.
+    """
+    import cartopy.crs as ccrs
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figsize = (16, 9)
+    cache = cache or BasemapCache()
+    basemap = cache.get(projection, GLOBAL_EXTENT, figsize, dpi, features)
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = basemap_axes(fig, basemap)
+    ax.gridlines(linewidth=0.5, color="gray", alpha=0.5)
+
+    preview = np.asarray(raster[:, :: step * 8, :: step * 8], dtype=np.float64)
+    vmin, vmax = np.nanpercentile(preview, [2, 98]) if np.isfinite(preview).any() else (0.0, 1.0)
+    image = ax.imshow(
+        np.asarray(raster[0, ::step, ::step]),
+        extent=GLOBAL_EXTENT,
+        transform=ccrs.PlateCarree(),
+        origin="upper",
+        cmap=cmap,
+        vmin=vmin,
+        vmax=vmax,
+        zorder=1,
+        interpolation="nearest",
+    )
+    fig.colorbar(image, ax=ax, shrink=0.6, label="Shark Activity Index")
+    title = ax.set_title("", fontsize=14, fontweight="bold")
+
+    def update(i: int) -> None:
+        image.set_data(np.asarray(raster[i, ::step, ::step]))
+        title.set_text(f"Shark Activity Index — {labels[i]}")
+
+    return write_frames(fig, update, len(labels), output, fps=fps, dpi=dpi)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Animate the monthly SAI raster over a cached basemap")
+    parser.add_argument("--raster", default=str(DEFAULT_RASTER), help="sai_raster .npy (default: %(default)s)")
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_RASTER.with_name("sai_animation.gif")),
+        help=".gif, .mp4 (needs ffmpeg) or a directory for a PNG sequence (default: %(default)s)",
+    )
+    parser.add_argument("--projection", default="PlateCarree", help="cartopy.crs projection name")
+    parser.add_argument("--step", type=int, default=2, help="Grid subsampling for display (default: %(default)s)")
+    parser.add_argument("--fps", type=float, default=2)
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ...)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+    raster_path = Path(args.raster)
+    meta = json.loads(raster_path.with_suffix(".json").read_text(encoding="utf-8"))
+    raster = np.load(raster_path, mmap_mode="r")
+    animate_raster(raster, meta["months"], args.output, args.projection, args.step, args.fps, args.dpi)
+
+
+__all__ = [
+    "Basemap",
+    "BasemapCache",
+    "animate_raster",
+    "basemap_axes",
+    "render_basemap",
+    "write_frames",
+]
+
+
+if __name__ == "__main__":
+    main()
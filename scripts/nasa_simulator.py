@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Batched synthetic NASA satellite inputs for many regions at once.
+
+``simulate_batch`` produces SST, chlorophyll, sea-level anomaly and salinity
+for N regions x D days as 2-D arrays in one call, using the same formulas as
+``SharkActivityModel.simulate_nasa_satellite_data``. Nothing is materialised as
+a DataFrame until ``RegionSeries.to_long`` is called, so stress tests with
+10^5 synthetic sites spend their time in NumPy, not in pandas construction.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+VARIABLES = ("sst", "chlorophyll", "sea_level_anomaly", "salinity")
+
+
+@dataclass
+class RegionSeries:
+    """Per-region time series on a shared date axis; every variable is (regions, dates)."""
+
+    dates: pd.DatetimeIndex
+    lat: np.ndarray
+    lon: np.ndarray
+    values: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.lat), len(self.dates)
+
+    def to_long(self, names: Sequence[str] | None = None, is_custom: Sequence[bool] | None = None) -> pd.DataFrame:
+        """Region-major long frame with the ``simulate_nasa_satellite_data`` columns."""
+        n_regions, n_dates = self.shape
+        data = {
+            "date": np.tile(self.dates.values, n_regions),
+            "lat": np.repeat(self.lat, n_dates),
+            "lon": np.repeat(self.lon, n_dates),
+        }
+        for var, arr in self.values.items():
+            data[var] = arr.ravel()
+        if names is not None:
+            data["region"] = np.repeat(np.asarray(names, dtype=object), n_dates)
+        if is_custom is not None:
+            data["is_custom"] = np.repeat(np.asarray(is_custom, dtype=bool), n_dates)
+        return pd.DataFrame(data)
+
+
+def draw_normal(rng, scale: float, shape: tuple) -> np.ndarray:
+    """N(0, scale) draws of ``shape``; a sequence of generators draws one row each."""
+    if isinstance(rng, (list, tuple)):
+        return np.stack([g.normal(0, scale, shape[1]) for g in rng]) if rng else np.empty(shape)
+    return rng.normal(0, scale, shape)
+
+
+def simulate_batch(
+    lats: Sequence[float],
+    lons: Sequence[float],
+    days: int = 365,
+    end: datetime | pd.Timestamp | None = None,
+    rng: np.random.Generator | Sequence[np.random.Generator] | int | None = None,
+) -> RegionSeries:
+    """Simulate every variable for all regions in one vectorised call.
+
+    ``rng`` may be a ``numpy.random.Generator``, an integer seed, ``None`` (fresh
+    entropy) or one generator per region; the per-region form reproduces what a
+    region would get from ``simulate_nasa_satellite_data`` with that generator.
+    """
+    if rng is None or isinstance(rng, (int, np.integer)):
+        rng = np.random.default_rng(rng)
+    lat = np.asarray(lats, dtype=np.float64).ravel()
+    lon = np.asarray(lons, dtype=np.float64).ravel()
+    shape = (lat.size, days)
+
+    dates = pd.date_range(end=end or datetime.now(), periods=days, freq="D")
+    seasonal = np.sin(2 * np.pi * np.arange(days) / 365)[None, :]
+    lat_rad = np.radians(lat)[:, None]
+
+    # Sea Surface Temperature (MODIS/Aqua)
+    sst = 15 + 10 * (1 + np.sin(lat_rad)) / 2 + 5 * seasonal + draw_normal(rng, 1, shape)
+    # Chlorophyll-a (Ocean Color)
+    chlor_base = 0.1 + 0.5 * np.abs(np.sin(lat_rad))
+    chlorophyll = np.maximum(0.01, chlor_base + 0.3 * seasonal + draw_normal(rng, 0.1, shape))
+    # Sea Level Anomaly (Jason-3)
+    sla = draw_normal(rng, 0.15, shape) + 0.1 * seasonal
+    # Salinity (SMAP)
+    salinity = 35 + 2 * draw_normal(rng, 0.5, shape)
+
+    return RegionSeries(
+        dates=dates,
+        lat=lat,
+        lon=lon,
+        values={"sst": sst, "chlorophyll": chlorophyll, "sea_level_anomaly": sla, "salinity": salinity},
+    )
+
+
+__all__ = ["RegionSeries", "VARIABLES", "draw_normal", "simulate_batch"]
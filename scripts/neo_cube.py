@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Chunked (time, lat, lon) cube over the NEO monthly SST and chlorophyll grids.
+
+The cube stores every (variable, month) plane as one ``.npz`` archive whose
+members are individually deflated spatial chunks (``r{row}_c{col}``). numpy
+opens ``.npz`` archives lazily, so ``NeoCube.read`` only inflates the chunks that
+intersect the requested bounding box and only for the requested months. Read cost
+therefore depends on the window, not on how many months the archive holds, and
+new months are appended without touching existing ones.
+
+Layout::
+
+    data/cube/cube.json                     grid/chunk geometry + month index
+    data/cube/sst/sst_2024-09.npz           one file per variable and month
+    data/cube/chlorophyll/chlorophyll_2024-09.npz
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from neo_grids import BASE_DIR, DATASETS, GRID_SHAPE, RAW_DIR, RESOLUTION_DEG, list_months, load_month
+
+logger = logging.getLogger(__name__)
+
+CUBE_DIR = BASE_DIR / "data" / "cube"
+MANIFEST_NAME = "cube.json"
+DEFAULT_CHUNK_SHAPE = (180, 360)
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass
+class CubeWindow:
+    """Result of a cube read: ``values`` is (time, lat, lon) with NaN for missing cells."""
+
+    var: str
+    months: List[str]
+    lat: np.ndarray
+    lon: np.ndarray
+    values: np.ndarray
+
+
+def bbox_to_slices(bbox: BBox) -> List[Tuple[slice, slice]]:
+    """Convert ``(lon_min, lat_min, lon_max, lat_max)`` into grid row/column slices.
+
+    A box with ``lon_min > lon_max`` crosses the antimeridian and yields two
+    column ranges. ``lat_min > lat_max`` has no such meaning and is rejected.
+    """
+    lon_min, lat_min, lon_max, lat_max = bbox
+    if lat_min > lat_max:
+        raise ValueError(
+            f"bbox lat_min ({lat_min}) is greater than lat_max ({lat_max}); "
+            "expected (lon_min, lat_min, lon_max, lat_max)"
+        )
+    rows, cols = GRID_SHAPE
+    r0 = max(0, int(math.floor((90.0 - lat_max) / RESOLUTION_DEG)))
+    r1 = min(rows, int(math.ceil((90.0 - lat_min) / RESOLUTION_DEG)))
+
+    def _cols(west: float, east: float) -> slice:
+        c0 = max(0, int(math.floor((west + 180.0) / RESOLUTION_DEG)))
+        c1 = min(cols, int(math.ceil((east + 180.0) / RESOLUTION_DEG)))
+        return slice(c0, c1)
+
+    if lon_min <= lon_max:
+        return [(slice(r0, r1), _cols(lon_min, lon_max))]
+    return [(slice(r0, r1), _cols(lon_min, 180.0)), (slice(r0, r1), _cols(-180.0, lon_max))]
+
+
+class NeoCube:
+    """On-disk chunked cube with lazy window reads."""
+
+    def __init__(self, root: str | Path = CUBE_DIR):
+        self.root = Path(root)
+        self.manifest = self._load_manifest()
+
+    @property
+    def chunk_shape(self) -> Tuple[int, int]:
+        return tuple(self.manifest["chunk_shape"])
+
+    def months(self, var: str) -> List[str]:
+        return list(self.manifest["variables"].get(var, []))
+
+    def _manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def _load_manifest(self) -> Dict:
+        path = self._manifest_path()
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+        return {
+            "grid_shape": list(GRID_SHAPE),
+            "chunk_shape": list(DEFAULT_CHUNK_SHAPE),
+            "resolution_deg": RESOLUTION_DEG,
+            "variables": {},
+        }
+
+    def _save_manifest(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._manifest_path()
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _plane_path(self, var: str, month: str) -> Path:
+        return self.root / var / f"{var}_{month}.npz"
+
+    # ------------------------------------------------------------------ write
+    def write_month(self, var: str, month: str, grid: np.ndarray) -> None:
+        """Store one global plane, split into compressed chunks."""
+        if tuple(grid.shape) != GRID_SHAPE:
+            raise ValueError(f"Expected grid of shape {GRID_SHAPE}, got {grid.shape}")
+        ch, cw = self.chunk_shape
+        chunks = {
+            f"r{r // ch}_c{c // cw}": np.ascontiguousarray(grid[r:r + ch, c:c + cw], dtype=np.float32)
+            for r in range(0, GRID_SHAPE[0], ch)
+            for c in range(0, GRID_SHAPE[1], cw)
+        }
+        target = self._plane_path(var, month)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.stem + ".tmp.npz")
+        np.savez_compressed(tmp_path, **chunks)
+        os.replace(tmp_path, target)
+
+        months = set(self.manifest["variables"].get(var, []))
+        months.add(month)
+        self.manifest["variables"][var] = sorted(months)
+        self._save_manifest()
+
+    def build(
+        self,
+        variables: Iterable[str] = tuple(DATASETS),
+        raw_dir: Path = RAW_DIR,
+        refresh: bool = False,
+    ) -> None:
+        """Append every raw month not yet in the cube (or all of them with ``refresh``)."""
+        for var in variables:
+            present = set(self.months(var))
+            for month in list_months(var, raw_dir):
+                if month in present and not refresh and self._plane_path(var, month).exists():
+                    continue
+                logger.info("Adding %s %s to cube", var, month)
+                self.write_month(var, month, np.asarray(load_month(var, month, raw_dir)))
+
+    # ------------------------------------------------------------------- read
+    def _read_plane(self, var: str, month: str, rows: slice, cols: slice) -> np.ndarray:
+        ch, cw = self.chunk_shape
+        out = np.full((rows.stop - rows.start, cols.stop - cols.start), np.nan, dtype=np.float32)
+        if out.size == 0:
+            return out
+        with np.load(self._plane_path(var, month)) as archive:
+            for cr in range(rows.start // ch, (rows.stop - 1) // ch + 1):
+                for cc in range(cols.start // cw, (cols.stop - 1) // cw + 1):
+                    chunk = archive[f"r{cr}_c{cc}"]
+                    r0, c0 = cr * ch, cc * cw
+                    rs = slice(max(rows.start, r0), min(rows.stop, r0 + chunk.shape[0]))
+                    cs = slice(max(cols.start, c0), min(cols.stop, c0 + chunk.shape[1]))
+                    out[rs.start - rows.start:rs.stop - rows.start, cs.start - cols.start:cs.stop - cols.start] = (
+                        chunk[rs.start - r0:rs.stop - r0, cs.start - c0:cs.stop - c0]
+                    )
+        return out
+
+    def read_rows_cols(self, var: str, rows: slice, cols: slice, months: Sequence[str] | None = None) -> np.ndarray:
+        """Read a raw (time, row, col) block addressed by grid indices."""
+        months = self._resolve_months(var, months)
+        out = np.empty((len(months), rows.stop - rows.start, cols.stop - cols.start), dtype=np.float32)
+        for t, month in enumerate(months):
+            out[t] = self._read_plane(var, month, rows, cols)
+        return out
+
+    def read(self, var: str, bbox: BBox | None = None, months: Sequence[str] | None = None) -> CubeWindow:
+        """Read ``var`` inside ``bbox`` = (lon_min, lat_min, lon_max, lat_max) for ``months``.
+
+        ``bbox=None`` reads the global grid and ``months=None`` every stored month.
+        """
+        months = self._resolve_months(var, months)
+        bbox = bbox if bbox is not None else (-180.0, -90.0, 180.0, 90.0)
+        parts = bbox_to_slices(bbox)
+        values = np.concatenate([self.read_rows_cols(var, rows, cols, months) for rows, cols in parts], axis=2)
+
+        rows = parts[0][0]
+        lat = 90.0 - (np.arange(rows.start, rows.stop) + 0.5) * RESOLUTION_DEG
+        lon = np.concatenate(
+            [-180.0 + (np.arange(cols.start, cols.stop) + 0.5) * RESOLUTION_DEG for _, cols in parts]
+        )
+        return CubeWindow(var=var, months=months, lat=lat, lon=lon, values=values)
+
+    def _resolve_months(self, var: str, months: Sequence[str] | None) -> List[str]:
+        available = self.months(var)
+        if not available:
+            raise KeyError(f"Variable '{var}' is not in the cube at {self.root}")
+        if months is None:
+            return available
+        missing = sorted(set(months) - set(available))
+        if missing:
+            raise KeyError(f"Months not in cube for '{var}': {', '.join(missing)}")
+        return list(months)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the chunked NEO SST/chlorophyll cube")
+    parser.add_argument(
+        "--cube-dir",
+        default=str(CUBE_DIR),
+        help="Output directory for the cube (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--raw-dir",
+        default=str(RAW_DIR),
+        help="Directory holding the NEO dataset folders (default: %(default)s)",
+    )
+    parser.add_argument("--refresh", action="store_true", help="Rewrite months already in the cube")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ...)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+    NeoCube(args.cube_dir).build(raw_dir=Path(args.raw_dir), refresh=args.refresh)
+
+
+__all__ = ["CubeWindow", "NeoCube", "bbox_to_slices"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Loader for the NASA NEO monthly CSV.gz grids (MYD28M SST, MY1DMM_CHLORA).
+
+Each raw file is a 1800x3600 comma-separated text grid on a 0.1° lat/lon raster
+(row 0 = 90°N, column 0 = 180°W) with ``99999.0`` marking land, ice and cloud.
+Parsing the gzip text is slow, so every file is decoded once into a float32
+``.npy`` array (NaN for fill cells) stored next to the raw file. Subsequent
+loads memory-map the cache, which makes opening a month nearly free.
+
+The cache carries a small JSON sidecar with the source size, mtime and SHA-256.
+A cache whose recorded mtime no longer matches is revalidated by hash and
+rebuilt when the content differs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+RAW_DIR = BASE_DIR / "data" / "raw"
+
+DATASETS: Dict[str, str] = {
+    "sst": "MYD28M",
+    "chlorophyll": "MY1DMM_CHLORA",
+}
+
+GRID_SHAPE = (1800, 3600)
+RESOLUTION_DEG = 0.1
+FILL_VALUE = 99999.0
+
+CACHE_SUFFIX = ".npy"
+META_SUFFIX = ".npy.json"
+
+
+def neo_path(var: str, month: str, raw_dir: Path = RAW_DIR) -> Path:
+    """Return the raw CSV.gz path for ``var`` (``sst``/``chlorophyll``) and ``YYYY-MM``."""
+    if var not in DATASETS:
+        raise KeyError(f"Unknown NEO variable '{var}' (expected one of {sorted(DATASETS)})")
+    code = DATASETS[var]
+    return raw_dir / code / f"{code}_{month}.CSV.gz"
+
+
+def list_months(var: str, raw_dir: Path = RAW_DIR) -> List[str]:
+    """List the ``YYYY-MM`` months available on disk for ``var``, oldest first."""
+    code = DATASETS[var]
+    prefix = f"{code}_"
+    months = [
+        path.name[len(prefix):-len(".CSV.gz")]
+        for path in (raw_dir / code).glob(f"{code}_*.CSV.gz")
+    ]
+    return sorted(months)
+
+
+def cache_path(raw_path: Path) -> Path:
+    name = raw_path.name
+    stem = name[: -len(".CSV.gz")] if name.endswith(".CSV.gz") else raw_path.stem
+    return raw_path.with_name(stem + CACHE_SUFFIX)
+
+
+def _meta_path(raw_path: Path) -> Path:
+    target = cache_path(raw_path)
+    return target.with_name(target.stem + META_SUFFIX)
+
+
+def _file_digest(path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as stream:
+        for block in iter(lambda: stream.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def parse_neo_csv(path: Path) -> np.ndarray:
+    """Parse one NEO CSV(.gz) grid into a float32 array with NaN for fill values."""
+    frame = pd.read_csv(path, header=None, dtype=np.float32, engine="c")
+    grid = frame.to_numpy(dtype=np.float32, copy=False)
+    if grid.shape != GRID_SHAPE:
+        raise ValueError(f"Unexpected grid shape {grid.shape} in {path} (expected {GRID_SHAPE})")
+    grid = np.ascontiguousarray(grid)
+    grid[grid >= FILL_VALUE] = np.nan
+    return grid
+
+
+def _cache_is_valid(raw_path: Path, meta_path: Path) -> bool:
+    if not cache_path(raw_path).exists() or not meta_path.exists():
+        return False
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+
+    signature = _source_signature(raw_path)
+    if meta.get("size") == signature["size"] and meta.get("mtime_ns") == signature["mtime_ns"]:
+        return True
+
+    # mtime moved (copy, checkout, re-download): only the content hash decides.
+    if meta.get("size") == signature["size"] and meta.get("sha256") == _file_digest(raw_path):
+        meta.update(signature)
+        meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return True
+    return False
+
+
+def _write_cache(raw_path: Path, grid: np.ndarray) -> None:
+    target = cache_path(raw_path)
+    tmp_path = target.with_name(target.name + ".tmp")
+    with tmp_path.open("wb") as stream:
+        np.save(stream, grid)
+    os.replace(tmp_path, target)
+
+    meta = {**_source_signature(raw_path), "sha256": _file_digest(raw_path), "shape": list(grid.shape)}
+    _meta_path(raw_path).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
+def load_grid(raw_path: str | Path, refresh: bool = False) -> np.ndarray:
+    """Return the grid for ``raw_path`` as a read-only memory-mapped float32 array.
+
+    The ``.npy`` cache is (re)built from the CSV.gz when it is missing, stale, or
+    ``refresh`` is set.
+    """
+    raw_path = Path(raw_path)
+    if not raw_path.exists():
+        raise FileNotFoundError(f"NEO grid not found: {raw_path}")
+
+    if refresh or not _cache_is_valid(raw_path, _meta_path(raw_path)):
+        logger.info("Parsing %s", raw_path)
+        _write_cache(raw_path, parse_neo_csv(raw_path))
+    return np.load(cache_path(raw_path), mmap_mode="r")
+
+
+def load_month(var: str, month: str, raw_dir: Path = RAW_DIR, refresh: bool = False) -> np.ndarray:
+    """Shortcut for ``load_grid(neo_path(var, month))``."""
+    return load_grid(neo_path(var, month, raw_dir), refresh=refresh)
+
+
+def cell_centers() -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude (per row) and longitude (per column) of the grid cell centres."""
+    rows, cols = GRID_SHAPE
+    lat = 90.0 - (np.arange(rows) + 0.5) * RESOLUTION_DEG
+    lon = -180.0 + (np.arange(cols) + 0.5) * RESOLUTION_DEG
+    return lat, lon
+
+
+def _fractional_index(lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    row = (90.0 - lat) / RESOLUTION_DEG - 0.5
+    col = (np.mod(lon + 180.0, 360.0)) / RESOLUTION_DEG - 0.5
+    return row, col
+
+
+def _nearest_valid(grid: np.ndarray, rows: np.ndarray, cols: np.ndarray, max_radius: int) -> np.ndarray:
+    """Value of the closest non-NaN cell around each (row, col), searched ring by ring."""
+    n_rows, n_cols = grid.shape
+    values = np.full(rows.shape, np.nan, dtype=np.float32)
+    pending = np.arange(rows.size)
+    for radius in range(1, max_radius + 1):
+        if pending.size == 0:
+            break
+        dr, dc = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        ring = np.maximum(np.abs(dr), np.abs(dc)) == radius
+        dr, dc = dr[ring], dc[ring]
+
+        rr = rows[pending, None] + dr[None, :]
+        cc = np.mod(cols[pending, None] + dc[None, :], n_cols)
+        inside = (rr >= 0) & (rr < n_rows)
+        window = np.full(rr.shape, np.nan, dtype=np.float32)
+        window[inside] = grid[rr[inside], cc[inside]]
+
+        dist = np.where(np.isfinite(window), (dr**2 + dc**2)[None, :], np.inf)
+        best = np.argmin(dist, axis=1)
+        found = np.isfinite(dist[np.arange(pending.size), best])
+        values[pending[found]] = window[found, best[found]]
+        pending = pending[~found]
+    return values
+
+
+def sample_points(
+    grid: np.ndarray,
+    lat: np.ndarray,
+    lon: np.ndarray,
+    method: str = "bilinear",
+    max_radius: int = 30,
+) -> np.ndarray:
+    """Sample ``grid`` at arbitrary (lat, lon) points in one vectorised lookup.
+
+    ``method`` is ``"bilinear"`` (NaN corners are dropped and the remaining
+    weights renormalised) or ``"nearest"``. Points that still resolve to NaN
+    (land, cloud) take the value of the closest valid cell within
+    ``max_radius`` grid cells; ``max_radius=0`` disables the fallback.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    n_rows, n_cols = grid.shape
+    row_f, col_f = _fractional_index(lat.ravel(), lon.ravel())
+    nearest_r = np.clip(np.rint(row_f), 0, n_rows - 1).astype(np.intp)
+    nearest_c = np.mod(np.rint(col_f), n_cols).astype(np.intp)
+
+    if method == "nearest":
+        values = np.asarray(grid[nearest_r, nearest_c], dtype=np.float32)
+    elif method == "bilinear":
+        r0 = np.floor(row_f).astype(np.intp)
+        c0 = np.floor(col_f).astype(np.intp)
+        fr = row_f - r0
+        fc = col_f - c0
+        total = np.zeros(row_f.shape)
+        weight_sum = np.zeros(row_f.shape)
+        for dr, dc, weight in (
+            (0, 0, (1 - fr) * (1 - fc)),
+            (0, 1, (1 - fr) * fc),
+            (1, 0, fr * (1 - fc)),
+            (1, 1, fr * fc),
+        ):
+            corner = np.asarray(grid[np.clip(r0 + dr, 0, n_rows - 1), np.mod(c0 + dc, n_cols)], dtype=np.float64)
+            valid = np.isfinite(corner)
+            total += np.where(valid, corner * weight, 0.0)
+            weight_sum += np.where(valid, weight, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = (total / weight_sum).astype(np.float32)
+        values[weight_sum == 0] = np.nan
+    else:
+        raise ValueError(f"Unknown sampling method '{method}' (expected 'bilinear' or 'nearest')")
+
+    missing = ~np.isfinite(values)
+    if max_radius > 0 and missing.any():
+        values[missing] = _nearest_valid(grid, nearest_r[missing], nearest_c[missing], max_radius)
+    return values.reshape(lat.shape)
+
+
+def warm_cache(raw_dir: Path = RAW_DIR, refresh: bool = False) -> None:
+    """Build the ``.npy`` cache for every month of every dataset."""
+    for var in DATASETS:
+        for month in list_months(var, raw_dir):
+            load_month(var, month, raw_dir, refresh=refresh)
+
+
+__all__ = [
+    "DATASETS",
+    "FILL_VALUE",
+    "GRID_SHAPE",
+    "RESOLUTION_DEG",
+    "cell_centers",
+    "list_months",
+    "load_grid",
+    "load_month",
+    "neo_path",
+    "parse_neo_csv",
+    "sample_points",
+    "warm_cache",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the memory-mapped cache for NEO grids")
+    parser.add_argument(
+        "--raw-dir",
+        default=str(RAW_DIR),
+        help="Directory holding the NEO dataset folders (default: %(default)s)",
+    )
+    parser.add_argument("--refresh", action="store_true", help="Re-parse every file")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ...)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+    warm_cache(Path(args.raw_dir), refresh=args.refresh)
+
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""LRU cache of per-region model inputs for ``SharkActivityModel.collect_global_data``.
+
+Entries are keyed by ``(lat, lon, data source, date range, sampling, seed)``,
+where ``sampling`` is the NEO grid interpolation (``None`` for simulated
+data), so a region is only fetched or simulated again when one of those
+changes. Each entry keeps the region's input series as plain arrays (copies,
+not views into the batch they were produced in, so evicting an entry frees
+its memory), its ε noise draw and the ``RunningMoments`` of the SAI
+components, which lets the global z-score statistics be rebuilt by merging
+per-region moments instead of rescanning the concatenated frame.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable
+
+import numpy as np
+
+from streaming_stats import RunningMoments
+
+
+@dataclass
+class RegionEntry:
+    dates: np.ndarray
+    values: Dict[str, np.ndarray]
+    noise: np.ndarray
+    moments: Dict[str, RunningMoments]
+
+
+class RegionDataCache:
+    """Bounded least-recently-used mapping ``key -> RegionEntry``."""
+
+    def __init__(self, max_regions: int = 4096) -> None:
+        self.max_regions = max_regions
+        self._entries: "OrderedDict[Hashable, RegionEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> RegionEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, entry: RegionEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_regions:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+__all__ = ["RegionDataCache", "RegionEntry"]
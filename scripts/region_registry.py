@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Columnar registry of monitoring regions for ``SharkActivityModel``.
+
+Regions live in parallel NumPy columns (lat, lon, custom flag, active flag)
+plus an interned name table with a ``name -> row`` dict, so tens of thousands
+of sites cost a few bytes each, bulk loads are array copies and lookups by
+name are O(1). ``within_km`` answers radius queries through a lazily built
+1° bucket index followed by a vectorised haversine filter.
+
+``RegionView`` exposes the registry through the ``dict`` API the model used to
+have (``model.regions``, ``model.custom_regions``), without copying.
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG_LAT = np.pi * EARTH_RADIUS_KM / 180.0
+INDEX_CELL_DEG = 1.0
+
+
+class RegionRegistry:
+    """Append-friendly columnar store of named (lat, lon) regions."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        self._lat = np.empty(capacity)
+        self._lon = np.empty(capacity)
+        self._custom = np.zeros(capacity, dtype=bool)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self._name_array: np.ndarray | None = None
+        self._spatial_index: Tuple[np.ndarray, np.ndarray] | None = None
+
+    # ----------------------------------------------------------------- insert
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = len(self._lat)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for attr in ("_lat", "_lon", "_custom", "_active"):
+            old = getattr(self, attr)
+            grown = np.zeros(new_capacity, dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, attr, grown)
+
+    def add(self, name: str, lat: float, lon: float, custom: bool = False) -> None:
+        """Insert or overwrite a single region."""
+        self.add_many([name], [lat], [lon], custom)
+
+    def add_many(
+        self,
+        names: Sequence[str],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        custom: bool | Sequence[bool] = False,
+    ) -> int:
+        """Bulk insert from parallel arrays; existing names are overwritten in place.
+
+        Returns the number of regions written.
+        """
+        names = [sys.intern(str(name)) for name in names]
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        custom = np.broadcast_to(np.asarray(custom, dtype=bool), lats.shape)
+        if not (len(names) == lats.size == lons.size):
+            raise ValueError("names, lats and lons must have the same length")
+
+        # Later duplicates win, like successive dict assignments.
+        last = {name: i for i, name in enumerate(names)}
+        order = np.fromiter(last.values(), dtype=np.intp, count=len(last))
+        rows = np.empty(order.size, dtype=np.intp)
+        new_names = []
+        for k, i in enumerate(order):
+            row = self._rows.get(names[i])
+            if row is None:
+                row = self._size + len(new_names)
+                new_names.append(names[i])
+            rows[k] = row
+
+        self._reserve(len(new_names))
+        for name in new_names:
+            self._rows[name] = len(self._names)
+            self._names.append(name)
+        self._size += len(new_names)
+        if new_names:
+            self._name_array = None
+
+        self._lat[rows] = lats[order]
+        self._lon[rows] = lons[order]
+        self._custom[rows] = custom[order]
+        self._active[rows] = True
+        self._spatial_index = None
+        return int(order.size)
+
+    def add_frame(
+        self,
+        frame: pd.DataFrame,
+        custom: bool = True,
+        name_col: str = "name",
+        lat_col: str = "lat",
+        lon_col: str = "lon",
+    ) -> int:
+        return self.add_many(frame[name_col].astype(str).tolist(), frame[lat_col], frame[lon_col], custom)
+
+    def add_from_file(self, path: str | Path, custom: bool = True, **columns: str) -> int:
+        """Bulk insert from a CSV or Parquet file with name/lat/lon columns."""
+        path = Path(path)
+        if path.suffix == ".parquet":
+            frame = pd.read_parquet(path)
+        elif path.suffix in {".csv", ".txt"}:
+            frame = pd.read_csv(path)
+        else:
+            raise ValueError(f"Unsupported region file extension: {path.suffix}")
+        return self.add_frame(frame, custom=custom, **columns)
+
+    def remove(self, name: str) -> None:
+        row = self._rows.pop(name)
+        self._active[row] = False
+        self._spatial_index = None
+
+    # ----------------------------------------------------------------- lookup
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._rows
+
+    def row(self, name: str) -> int:
+        return self._rows[name]
+
+    def coords(self, name: str) -> Tuple[float, float]:
+        row = self._rows[name]
+        return float(self._lat[row]), float(self._lon[row])
+
+    def is_custom(self, name: str) -> bool:
+        return bool(self._custom[self._rows[name]])
+
+    def _names_for(self, rows: np.ndarray) -> np.ndarray:
+        if self._name_array is None:
+            self._name_array = np.empty(len(self._names), dtype=object)
+            self._name_array[:] = self._names
+        return self._name_array[rows]
+
+    def _active_rows(self, custom: bool | None = None) -> np.ndarray:
+        mask = self._active[: self._size].copy()
+        if custom is not None:
+            mask &= self._custom[: self._size] == custom
+        return np.flatnonzero(mask)
+
+    def columns(self, custom: bool | None = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """``(names, lats, lons, is_custom)`` arrays of active regions in insertion order."""
+        rows = self._active_rows(custom)
+        return self._names_for(rows), self._lat[rows], self._lon[rows], self._custom[rows]
+
+    def to_frame(self) -> pd.DataFrame:
+        names, lats, lons, custom = self.columns()
+        return pd.DataFrame({"name": names, "lat": lats, "lon": lons, "is_custom": custom})
+
+    # ---------------------------------------------------------------- spatial
+    def _build_spatial_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self._active_rows()
+        cells = _cell_ids(self._lat[rows], self._lon[rows])
+        order = np.argsort(cells, kind="stable")
+        self._spatial_index = (cells[order], rows[order])
+        return self._spatial_index
+
+    def within_km(self, lat: float, lon: float, radius_km: float) -> pd.DataFrame:
+        """Regions within ``radius_km`` of (lat, lon), nearest first, with a ``distance_km`` column."""
+        sorted_cells, sorted_rows = self._spatial_index or self._build_spatial_index()
+        n_lon_cells = int(round(360 / INDEX_CELL_DEG))
+
+        dlat = radius_km / KM_PER_DEG_LAT
+        lat_lo = max(-90.0, lat - dlat)
+        lat_hi = min(90.0, lat + dlat)
+        max_abs_lat = max(abs(lat_lo), abs(lat_hi))
+        coslat = np.cos(np.radians(max_abs_lat))
+        dlon = radius_km / (KM_PER_DEG_LAT * coslat) if coslat > 1e-9 else 180.0
+
+        lat_cells = range(_lat_cell(lat_lo), _lat_cell(lat_hi) + 1)
+        if dlon >= 180.0:
+            lon_ranges = [(0, n_lon_cells - 1)]
+        else:
+            c0, c1 = _lon_cell(lon - dlon), _lon_cell(lon + dlon)
+            lon_ranges = [(c0, c1)] if c0 <= c1 else [(c0, n_lon_cells - 1), (0, c1)]
+
+        candidates = []
+        for lat_cell in lat_cells:
+            for c0, c1 in lon_ranges:
+                lo = np.searchsorted(sorted_cells, lat_cell * n_lon_cells + c0, side="left")
+                hi = np.searchsorted(sorted_cells, lat_cell * n_lon_cells + c1, side="right")
+                candidates.append(sorted_rows[lo:hi])
+        rows = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.intp)
+
+        distance = haversine_km(lat, lon, self._lat[rows], self._lon[rows])
+        keep = distance <= radius_km
+        rows, distance = rows[keep], distance[keep]
+        order = np.argsort(distance, kind="stable")
+        rows, distance = rows[order], distance[order]
+        return pd.DataFrame(
+            {
+                "name": self._names_for(rows),
+                "lat": self._lat[rows],
+                "lon": self._lon[rows],
+                "is_custom": self._custom[rows],
+                "distance_km": distance,
+            }
+        )
+
+    def view(self, custom: bool | None = None) -> "RegionView":
+        return RegionView(self, custom)
+
+
+class RegionView(MutableMapping):
+    """``dict``-like view ``name -> (lat, lon)`` over a registry (optionally one kind only)."""
+
+    def __init__(self, registry: RegionRegistry, custom: bool | None = None) -> None:
+        self._registry = registry
+        self._custom = custom
+
+    def _owns(self, name: object) -> bool:
+        if name not in self._registry:
+            return False
+        return self._custom is None or self._registry.is_custom(name) == self._custom
+
+    def __getitem__(self, name: str) -> Tuple[float, float]:
+        if not self._owns(name):
+            raise KeyError(name)
+        return self._registry.coords(name)
+
+    def __setitem__(self, name: str, coords: Tuple[float, float]) -> None:
+        lat, lon = coords
+        custom = self._custom if self._custom is not None else (
+            self._registry.is_custom(name) if name in self._registry else True
+        )
+        self._registry.add(name, lat, lon, custom)
+
+    def __delitem__(self, name: str) -> None:
+        if not self._owns(name):
+            raise KeyError(name)
+        self._registry.remove(name)
+
+    def __contains__(self, name: object) -> bool:
+        return self._owns(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._registry.columns(self._custom)[0].tolist())
+
+    def __len__(self) -> int:
+        return int(self._registry._active_rows(self._custom).size)
+
+    def __repr__(self) -> str:
+        return f"RegionView({dict(self.items())!r})"
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _lat_cell(lat: float | np.ndarray) -> int | np.ndarray:
+    n_lat_cells = int(round(180 / INDEX_CELL_DEG))
+    return np.clip(np.floor((np.asarray(lat) + 90.0) / INDEX_CELL_DEG), 0, n_lat_cells - 1).astype(np.intp)
+
+
+def _lon_cell(lon: float | np.ndarray) -> int | np.ndarray:
+    n_lon_cells = int(round(360 / INDEX_CELL_DEG))
+    return (np.floor(np.mod(np.asarray(lon) + 180.0, 360.0) / INDEX_CELL_DEG).astype(np.intp)) % n_lon_cells
+
+
+def _cell_ids(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    return _lat_cell(lats) * int(round(360 / INDEX_CELL_DEG)) + _lon_cell(lons)
+
+
+__all__ = ["RegionRegistry", "RegionView", "haversine_km"]
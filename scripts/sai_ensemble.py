@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Monte Carlo ensemble for the SAI noise term ε ~ N(0, σ).
+
+``SharkActivityModel.calculate_shark_activity`` adds a single ε draw per row.
+``ensemble_summary`` instead draws K realisations for every row in one batched
+array operation and reduces them to per-row mean, standard deviation, chosen
+quantiles and the probability of exceeding a hotspot threshold. Rows are
+processed in blocks so that at most ``max_elements`` (rows x K) values are held
+at any time.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from sai_formula import NOISE_SIGMA
+
+
+@dataclass
+class EnsembleSummary:
+    mean: np.ndarray
+    std: np.ndarray
+    quantiles: Dict[float, np.ndarray] = field(default_factory=dict)
+    exceedance: np.ndarray | None = None
+    threshold: float | None = None
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        data = {"sai_mean": self.mean, "sai_std": self.std}
+        for q, values in self.quantiles.items():
+            data[f"sai_q{int(round(q * 100)):02d}"] = values
+        if self.exceedance is not None:
+            data["p_exceed"] = self.exceedance
+        return pd.DataFrame(data, index=index)
+
+
+def ensemble_summary(
+    deterministic: np.ndarray,
+    k: int = 200,
+    quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+    threshold: float | None = None,
+    sigma: float = NOISE_SIGMA,
+    rng: np.random.Generator | int | None = None,
+    max_elements: int = 2**24,
+) -> EnsembleSummary:
+    """Summarise K noisy realisations ``deterministic + ε`` per row.
+
+    ``deterministic`` is the SAI without the noise term. When ``threshold`` is
+    given, ``exceedance`` holds the fraction of realisations above it.
+    """
+    if rng is None or isinstance(rng, (int, np.integer)):
+        rng = np.random.default_rng(rng)
+    base = np.asarray(deterministic, dtype=np.float64).ravel()
+    n = base.size
+    block_rows = max(1, int(max_elements // max(k, 1)))
+
+    mean = np.empty(n)
+    std = np.empty(n)
+    q_values = {q: np.empty(n) for q in quantiles}
+    exceedance = np.empty(n) if threshold is not None else None
+
+    for start in range(0, n, block_rows):
+        stop = min(n, start + block_rows)
+        draws = base[start:stop, None] + rng.normal(0, sigma, (stop - start, k))
+        mean[start:stop] = draws.mean(axis=1)
+        std[start:stop] = draws.std(axis=1, ddof=1) if k > 1 else 0.0
+        if quantiles:
+            block_q = np.quantile(draws, list(quantiles), axis=1)
+            for q, values in zip(quantiles, block_q):
+                q_values[q][start:stop] = values
+        if exceedance is not None:
+            exceedance[start:stop] = (draws > threshold).mean(axis=1)
+
+    return EnsembleSummary(mean=mean, std=std, quantiles=q_values, exceedance=exceedance, threshold=threshold)
+
+
+__all__ = ["EnsembleSummary", "NOISE_SIGMA", "ensemble_summary"]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Shared constants and component functions of the Shark Activity Index.
+
+    SAI = w1 · z(g(SST)) + w2 · z(h(Chl-a)) + w3 · z(k(|x|)) + ε
+
+with g the Gaussian thermal preference, h the saturating productivity
+response and k the Michaelis-Menten fronts term. The functions accept NumPy
+arrays or pandas Series.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+WEIGHTS = (0.35, 0.40, 0.25)
+SST_OPTIMUM = 22.0
+SST_SIGMA = 6.0
+CHL_SATURATION = 0.3
+SLA_HALF_SATURATION = 0.1
+NOISE_SIGMA = 0.2
+COMPONENTS = ("temp_pref", "productivity", "fronts")
+
+
+def temperature_preference(sst, mu: float = SST_OPTIMUM, sigma: float = SST_SIGMA):
+    """g(SST) = exp(-0.5 · ((SST - μ) / σ)²)"""
+    return np.exp(-0.5 * ((sst - mu) / sigma) ** 2)
+
+
+def productivity_response(chlorophyll, kappa: float = CHL_SATURATION):
+    """h(Chl-a) = log(1 + Chl-a) · (1 - exp(-Chl-a / κ))"""
+    return np.log(1 + chlorophyll) * (1 - np.exp(-chlorophyll / kappa))
+
+
+def front_saturation(magnitude, alpha: float = SLA_HALF_SATURATION):
+    """k(x) = x / (α + x) for a non-negative front strength ``x``"""
+    return magnitude / (alpha + magnitude)
+
+
+__all__ = [
+    "CHL_SATURATION",
+    "COMPONENTS",
+    "NOISE_SIGMA",
+    "SLA_HALF_SATURATION",
+    "SST_OPTIMUM",
+    "SST_SIGMA",
+    "WEIGHTS",
+    "front_saturation",
+    "productivity_response",
+    "temperature_preference",
+]
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Global gridded Shark Activity Index (SAI) on the 0.1° NEO grid.
+
+Evaluates the same formula as ``SharkActivityModel.calculate_shark_activity``
+for every ocean cell of every month::
+
+    SAI = 0.35 · z(g(SST)) + 0.40 · z(h(Chl-a)) + 0.25 · z(k(|∇SST|))
+
+The grids carry no sea-level anomaly, so the fronts term k(·) is applied to
+the SST gradient magnitude (°C per degree), the same proxy used by
+``scripts/build-neo-data.mjs``. The noise term ε is left out so the raster is
+deterministic.
+
+The run has two passes over row bands, fanned out to a process pool:
+
+1. statistics — count/mean/M2 of each component per fixed block of
+   ``STAT_BLOCK_ROWS`` rows (``streaming_stats.RunningMoments``), merged in
+   block order. The block layout does not depend on the evaluation chunk size
+   or worker count, so the global z-score parameters are identical for every
+   run configuration;
+2. scoring — each worker normalises its band with those parameters and writes
+   float32 SAI into a shared memory-mapped ``.npy`` raster (NaN off-ocean).
+
+Every per-cell operation is elementwise, so chunked output is bit-for-bit equal
+to ``evaluate_in_memory``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from neo_grids import BASE_DIR, GRID_SHAPE, RESOLUTION_DEG, list_months, load_month
+from sai_formula import COMPONENTS, WEIGHTS, front_saturation, productivity_response, temperature_preference
+from streaming_stats import RunningMoments
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = BASE_DIR / "outputs" / "sai" / "sai_raster.npy"
+
+# Half-saturation of the fronts term for |∇SST| in °C per degree.
+FRONT_HALF_SATURATION = 1.0
+
+STAT_BLOCK_ROWS = 100
+# Working set while scoring one cell: the SST and chlorophyll inputs (read as
+# float64 by _read_band), the float64 temporaries and the bool masks.
+# score_block peaks at ~98 B per cell under tracemalloc.
+BYTES_PER_CELL = 2 * 8 + 10 * 8 + 4
+
+
+def _read_band(var: str, month: str, start: int, stop: int) -> np.ndarray:
+    return np.asarray(load_month(var, month)[start:stop], dtype=np.float64)
+
+
+def _front_gradient(sst: np.ndarray, halo_top: bool, halo_bottom: bool) -> np.ndarray:
+    """|∇SST| by central differences; missing neighbours fall back to the centre cell.
+
+    ``sst`` includes one halo row above/below when ``halo_top``/``halo_bottom``
+    is set; the returned array excludes them. Columns wrap around the globe.
+    """
+    left = np.roll(sst, 1, axis=1)
+    right = np.roll(sst, -1, axis=1)
+    up = np.vstack([sst[:1], sst[:-1]])
+    down = np.vstack([sst[1:], sst[-1:]])
+    left = np.where(np.isnan(left), sst, left)
+    right = np.where(np.isnan(right), sst, right)
+    up = np.where(np.isnan(up), sst, up)
+    down = np.where(np.isnan(down), sst, down)
+
+    dx = (right - left) / (2 * RESOLUTION_DEG)
+    dy = (down - up) / (2 * RESOLUTION_DEG)
+    gradient = np.sqrt(dx * dx + dy * dy)
+    return gradient[int(halo_top): gradient.shape[0] - int(halo_bottom)]
+
+
+def compute_components(month: str, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Raw (un-normalised) SAI components for grid rows ``[start, stop)``.
+
+    Returns ``temp_pref, productivity, fronts, valid`` with components set to
+    NaN wherever SST or chlorophyll is missing.
+    """
+    lo = max(0, start - 1)
+    hi = min(GRID_SHAPE[0], stop + 1)
+    sst_halo = _read_band("sst", month, lo, hi)
+    sst = sst_halo[start - lo: start - lo + (stop - start)]
+    chl = _read_band("chlorophyll", month, start, stop)
+
+    valid = np.isfinite(sst) & np.isfinite(chl)
+    temp_pref = temperature_preference(sst)
+    productivity = productivity_response(chl)
+    gradient = _front_gradient(sst_halo, halo_top=lo < start, halo_bottom=hi > stop)
+    fronts = front_saturation(gradient, FRONT_HALF_SATURATION)
+
+    for arr in (temp_pref, productivity, fronts):
+        arr[~valid] = np.nan
+    return temp_pref, productivity, fronts, valid
+
+
+def _block_moments(task: Tuple[str, int, int]) -> List[RunningMoments]:
+    month, start, stop = task
+    *components, valid = compute_components(month, start, stop)
+    return [RunningMoments().update(arr[valid]) for arr in components]
+
+
+def _stat_tasks(months: Sequence[str]) -> List[Tuple[str, int, int]]:
+    return [
+        (month, start, min(start + STAT_BLOCK_ROWS, GRID_SHAPE[0]))
+        for month in months
+        for start in range(0, GRID_SHAPE[0], STAT_BLOCK_ROWS)
+    ]
+
+
+def global_statistics(months: Sequence[str], workers: int = 1) -> Dict[str, Dict[str, float]]:
+    """First pass: global mean and sample std of each component over all months."""
+    tasks = _stat_tasks(months)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            block_results = list(pool.map(_block_moments, tasks))
+    else:
+        block_results = [_block_moments(task) for task in tasks]
+
+    stats = {}
+    for idx, name in enumerate(COMPONENTS):
+        merged = RunningMoments()
+        for block in block_results:
+            merged.merge(block[idx])
+        stats[name] = {"count": merged.count, "mean": merged.mean, "std": merged.std() if merged.count > 1 else 1.0}
+    return stats
+
+
+def score_block(
+    month: str,
+    start: int,
+    stop: int,
+    stats: Dict[str, Dict[str, float]],
+    weights: Tuple[float, float, float] = WEIGHTS,
+) -> np.ndarray:
+    """Normalised SAI for rows ``[start, stop)`` of ``month`` (float32, NaN off-ocean)."""
+    *components, valid = compute_components(month, start, stop)
+    sai = np.zeros(valid.shape, dtype=np.float64)
+    for weight, name, arr in zip(weights, COMPONENTS, components):
+        sai += weight * ((arr - stats[name]["mean"]) / stats[name]["std"])
+    sai[~valid] = np.nan
+    return sai.astype(np.float32)
+
+
+def _score_task(task: Tuple[str, int, int, int, Dict, Tuple[float, float, float], str]) -> None:
+    month, month_idx, start, stop, stats, weights, output = task
+    raster = np.load(output, mmap_mode="r+")
+    raster[month_idx, start:stop] = score_block(month, start, stop, stats, weights)
+    raster.flush()
+
+
+def chunk_rows_for_budget(memory_mb: float, workers: int) -> int:
+    """Largest row band whose working set fits ``memory_mb`` across all workers."""
+    per_row = GRID_SHAPE[1] * BYTES_PER_CELL * max(1, workers)
+    return int(max(1, min(GRID_SHAPE[0], memory_mb * 2**20 // per_row)))
+
+
+def build_raster(
+    months: Sequence[str] | None = None,
+    output: str | Path = DEFAULT_OUTPUT,
+    memory_mb: float = 512,
+    workers: int | None = None,
+    weights: Tuple[float, float, float] = WEIGHTS,
+) -> Tuple[np.ndarray, Dict]:
+    """Score every month into a (months, 1800, 3600) float32 memory-mapped raster.
+
+    Returns the read-only raster and the metadata written next to it.
+    """
+    months = list(months) if months else _available_months()
+    workers = workers or os.cpu_count() or 1
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info("Statistics pass over %d months", len(months))
+    stats = global_statistics(months, workers)
+
+    chunk_rows = chunk_rows_for_budget(memory_mb, workers)
+    logger.info("Scoring with %d workers, %d rows per chunk", workers, chunk_rows)
+    raster = np.lib.format.open_memmap(output, mode="w+", dtype=np.float32, shape=(len(months), *GRID_SHAPE))
+    del raster
+
+    tasks = [
+        (month, month_idx, start, min(start + chunk_rows, GRID_SHAPE[0]), stats, weights, str(output))
+        for month_idx, month in enumerate(months)
+        for start in range(0, GRID_SHAPE[0], chunk_rows)
+    ]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_score_task, tasks))
+    else:
+        for task in tasks:
+            _score_task(task)
+
+    meta = {"months": months, "weights": list(weights), "stats": stats, "shape": [len(months), *GRID_SHAPE]}
+    output.with_suffix(".json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    logger.info("Wrote %s", output)
+    return np.load(output, mmap_mode="r"), meta
+
+
+def evaluate_in_memory(
+    months: Sequence[str],
+    stats: Dict[str, Dict[str, float]] | None = None,
+    weights: Tuple[float, float, float] = WEIGHTS,
+) -> np.ndarray:
+    """Reference implementation: each month scored as one full-grid block."""
+    stats = stats or global_statistics(months)
+    return np.stack([score_block(month, 0, GRID_SHAPE[0], stats, weights) for month in months])
+
+
+def _available_months() -> List[str]:
+    return sorted(set(list_months("sst")) & set(list_months("chlorophyll")))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the global gridded Shark Activity Index raster")
+    parser.add_argument("--months", nargs="*", help="Months (YYYY-MM) to score (default: all available)")
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_OUTPUT),
+        help="Output .npy raster (default: %(default)s)",
+    )
+    parser.add_argument("--memory-mb", type=float, default=512, help="Working-set budget (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ...)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+    build_raster(args.months, args.output, args.memory_mb, args.workers)
+
+
+__all__ = [
+    "COMPONENTS",
+    "WEIGHTS",
+    "build_raster",
+    "chunk_rows_for_budget",
+    "compute_components",
+    "evaluate_in_memory",
+    "global_statistics",
+    "score_block",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Weight-sensitivity sweep for the Shark Activity Index.
+
+The z-scored component terms (thermal preference, productivity, fronts) are
+computed once per set of formula constants (μ, σ, κ, α) and cached as an
+(rows x 3) matrix. Any number of weight vectors is then scored as a single
+matrix product, in blocks of weight vectors, and each vector is compared with
+the baseline weights by
+
+* ``jaccard`` — overlap of the hotspot sets (rows above the per-vector
+  ``hotspot_quantile`` score), and
+* ``spearman`` — rank correlation of the full score vectors.
+
+The ε term is left out: it is independent of the weights and would only add
+noise to the comparison.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sai_formula import (
+    CHL_SATURATION,
+    SLA_HALF_SATURATION,
+    SST_OPTIMUM,
+    SST_SIGMA,
+    WEIGHTS,
+    front_saturation,
+    productivity_response,
+    temperature_preference,
+)
+
+Constants = Tuple[float, float, float, float]
+
+
+def simplex_grid(step: float = 0.05) -> np.ndarray:
+    """All weight vectors (w1, w2, w3) on the unit simplex with the given spacing."""
+    n = int(round(1 / step))
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing="ij")
+    mask = i + j <= n
+    w1, w2 = i[mask] / n, j[mask] / n
+    return np.column_stack([w1, w2, 1 - w1 - w2])
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """Column-wise 0-based ranks (ties broken by position)."""
+    order = np.argsort(scores, axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[0])[:, None], axis=0)
+    return ranks
+
+
+def _hotspot_mask(scores: np.ndarray, quantile: float) -> np.ndarray:
+    n = scores.shape[0]
+    kth = min(n - 1, int(np.floor(quantile * (n - 1))))
+    threshold = np.partition(scores, kth, axis=0)[kth]
+    return scores > threshold
+
+
+class WeightSweep:
+    """Cached component matrix plus batched scoring of many weight vectors."""
+
+    def __init__(self, data: pd.DataFrame, front_column: str = "sea_level_anomaly") -> None:
+        self.sst = data["sst"].to_numpy(dtype=np.float64)
+        self.chlorophyll = data["chlorophyll"].to_numpy(dtype=np.float64)
+        self.front = np.abs(data[front_column].to_numpy(dtype=np.float64))
+        self._components: Dict[Constants, np.ndarray] = {}
+
+    def components(
+        self,
+        mu: float = SST_OPTIMUM,
+        sigma: float = SST_SIGMA,
+        kappa: float = CHL_SATURATION,
+        alpha: float = SLA_HALF_SATURATION,
+    ) -> np.ndarray:
+        """(rows x 3) matrix of z-scored component terms, cached per constant set."""
+        key = (float(mu), float(sigma), float(kappa), float(alpha))
+        if key not in self._components:
+            raw = np.column_stack(
+                [
+                    temperature_preference(self.sst, mu, sigma),
+                    productivity_response(self.chlorophyll, kappa),
+                    front_saturation(self.front, alpha),
+                ]
+            )
+            self._components[key] = (raw - raw.mean(axis=0)) / raw.std(axis=0, ddof=1)
+        return self._components[key]
+
+    def scores(self, weights: np.ndarray, constants: Constants | None = None) -> np.ndarray:
+        """(rows x n_weights) SAI scores for every weight vector in one matrix product."""
+        z = self.components(*(constants or ()))
+        return z @ np.atleast_2d(np.asarray(weights, dtype=np.float64)).T
+
+    def evaluate(
+        self,
+        weights: np.ndarray,
+        baseline: Sequence[float] = WEIGHTS,
+        hotspot_quantile: float = 0.8,
+        constants: Constants | None = None,
+        block: int = 256,
+    ) -> pd.DataFrame:
+        """Hotspot-set Jaccard overlap and Spearman correlation against ``baseline``.
+
+        ``weights`` is (n_weights x 3); scoring runs in blocks of ``block``
+        vectors to bound memory at rows x block.
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        base_scores = self.scores(np.asarray(baseline, dtype=np.float64), constants)
+        base_ranks = _ranks(base_scores)[:, 0].astype(np.float64)
+        base_mask = _hotspot_mask(base_scores, hotspot_quantile)[:, 0]
+        n = base_scores.shape[0]
+        centered_base = base_ranks - base_ranks.mean()
+
+        jaccard = np.empty(len(weights))
+        spearman = np.empty(len(weights))
+        hotspots = np.empty(len(weights), dtype=np.int64)
+        for start in range(0, len(weights), block):
+            stop = min(len(weights), start + block)
+            scores = self.scores(weights[start:stop], constants)
+
+            mask = _hotspot_mask(scores, hotspot_quantile)
+            inter = (mask & base_mask[:, None]).sum(axis=0)
+            union = (mask | base_mask[:, None]).sum(axis=0)
+            jaccard[start:stop] = np.where(union > 0, inter / np.maximum(union, 1), 1.0)
+            hotspots[start:stop] = mask.sum(axis=0)
+
+            ranks = _ranks(scores).astype(np.float64)
+            centered = ranks - (n - 1) / 2
+            spearman[start:stop] = (centered * centered_base[:, None]).sum(axis=0) / (
+                np.sqrt((centered**2).sum(axis=0)) * np.sqrt((centered_base**2).sum())
+            )
+
+        return pd.DataFrame(
+            {
+                "w1": weights[:, 0],
+                "w2": weights[:, 1],
+                "w3": weights[:, 2],
+                "jaccard": jaccard,
+                "spearman": spearman,
+                "hotspot_count": hotspots,
+            }
+        )
+
+
+__all__ = ["WeightSweep", "simplex_grid"]
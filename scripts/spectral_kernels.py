@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Fused per-pixel spectral features for PACE L2 ``Rrs``: OC4, ``oc4_ratio`` and PPCI.
+
+OC4 (OC4V6 coefficients) is
+
+    R   = max(Rrs443, Rrs490, Rrs510) / Rrs555      (``oc4_ratio``)
+    chl = 10 ** (a0 + a1 r + a2 r² + a3 r³ + a4 r⁴),  r = log10(R)
+
+and the PACE Predator Coupling Index (PPCI, ``pace_predator_coupling_index``)
+is the mean of three fixed-range [0, 1] scores: log OC4 over 0.01–20 mg m⁻³,
+NFLH over 0–``NFLH_SCALE`` and AVW over 440–580 nm. Fixed ranges keep the
+index comparable between granules and computable pixel by pixel.
+
+``spectral_features`` makes one pass over blocks of scan lines. Each block
+reads only the four OC4 bands (``rrs`` may be a NumPy array, a lazily backed
+xarray ``Variable`` or an h5netcdf variable) and writes into preallocated
+float32 outputs, so the temporaries are a few block-sized buffers instead of
+several full-granule copies. Band positions are resolved once per wavelength
+table and cached.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+
+OC4_BLUE_NM = (443, 490, 510)
+OC4_GREEN_NM = 555
+OC4V6_COEFFS = (0.3272, -2.9940, 2.7218, -1.2259, -0.5683)
+MIN_RATIO = 1e-6
+
+OC4_LOG_RANGE = (np.log10(0.01), np.log10(20.0))
+NFLH_SCALE = 0.5  # W m⁻² µm⁻¹ sr⁻¹
+AVW_RANGE = (440.0, 580.0)
+
+CHUNK_LINES = 256
+
+
+@dataclass(frozen=True)
+class OC4Bands:
+    take: Tuple[int, ...]  # sorted unique band indices read from Rrs
+    blue: Tuple[int, ...]  # positions of the 443/490/510 nm bands within ``take``
+    green: int  # position of the 555 nm band within ``take``
+
+
+@lru_cache(maxsize=16)
+def _bands_for(table: bytes) -> OC4Bands:
+    wavelengths = np.frombuffer(table, dtype=np.float64)
+    nearest = [int(np.nanargmin(np.abs(wavelengths - nm))) for nm in (*OC4_BLUE_NM, OC4_GREEN_NM)]
+    take = tuple(sorted(set(nearest)))
+    positions = [take.index(i) for i in nearest]
+    return OC4Bands(take=take, blue=tuple(positions[:3]), green=positions[3])
+
+
+def oc4_bands(wavelengths) -> OC4Bands:
+    """Nearest-band indices for OC4 in a wavelength table (cached per table)."""
+    return _bands_for(np.asarray(wavelengths, dtype=np.float64).tobytes())
+
+
+def _unit_score(values: np.ndarray, lo: float, hi: float, out: np.ndarray) -> np.ndarray:
+    np.subtract(values, lo, out=out)
+    np.divide(out, hi - lo, out=out)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def spectral_features(
+    rrs,
+    wavelengths,
+    nflh=None,
+    avw=None,
+    chunk_lines: int = CHUNK_LINES,
+) -> Dict[str, np.ndarray]:
+    """``oc4`` and ``oc4_ratio`` (plus ``pace_predator_coupling_index`` when ``nflh`` and ``avw`` are given).
+
+    ``rrs`` has the band axis last (``lines × pixels × bands``); outputs are
+    float32 with the shape of ``rrs`` minus that axis. Negative or zero band
+    ratios are clipped to ``MIN_RATIO``; a NaN blue band is skipped in the max.
+    """
+    # PACE ``wavelength`` can list more bands than ``Rrs`` carries; the leading ones line up.
+    bands = oc4_bands(np.asarray(wavelengths)[: rrs.shape[-1]])
+    shape = tuple(rrs.shape[:-1])
+    ratio = np.empty(shape, dtype=np.float32)
+    oc4 = np.empty(shape, dtype=np.float32)
+    with_ppci = nflh is not None and avw is not None
+    ppci = np.empty(shape, dtype=np.float32) if with_ppci else None
+
+    a0, a1, a2, a3, a4 = (np.float32(a) for a in OC4V6_COEFFS)
+    lines = shape[0]
+    step = max(1, int(chunk_lines))
+    scratch = np.empty((min(step, lines), *shape[1:]), dtype=np.float32)
+    score = np.empty_like(scratch) if with_ppci else None
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, lines, step):
+            stop = min(start + step, lines)
+            block = np.asarray(rrs[start:stop, ..., list(bands.take)], dtype=np.float32)
+            r, o, tmp = ratio[start:stop], oc4[start:stop], scratch[: stop - start]
+
+            np.fmax(block[..., bands.blue[0]], block[..., bands.blue[1]], out=r)
+            np.fmax(r, block[..., bands.blue[2]], out=r)
+            np.divide(r, block[..., bands.green], out=r)
+
+            np.maximum(r, MIN_RATIO, out=tmp)
+            np.log10(tmp, out=tmp)
+            # Horner: a0 + r(a1 + r(a2 + r(a3 + r a4)))
+            np.multiply(tmp, a4, out=o)
+            for coeff in (a3, a2, a1):
+                o += coeff
+                o *= tmp
+            o += a0
+            np.power(np.float32(10.0), o, out=o)
+            del block
+
+            if with_ppci:
+                p, s = ppci[start:stop], score[: stop - start]
+                np.log10(o, out=tmp)
+                _unit_score(tmp, *OC4_LOG_RANGE, out=p)
+                p += _unit_score(np.asarray(nflh[start:stop], dtype=np.float32), 0.0, NFLH_SCALE, out=s)
+                p += _unit_score(np.asarray(avw[start:stop], dtype=np.float32), *AVW_RANGE, out=s)
+                p /= 3.0
+
+    out = {"oc4": oc4, "oc4_ratio": ratio}
+    if with_ppci:
+        out["pace_predator_coupling_index"] = ppci
+    return out
+
+
+def compute_oc4(rrs, wavelengths, chunk_lines: int = CHUNK_LINES) -> np.ndarray:
+    """OC4 chlorophyll proxy only (float32, mg m⁻³)."""
+    return spectral_features(rrs, wavelengths, chunk_lines=chunk_lines)["oc4"]
+
+
+__all__ = [
+    "OC4Bands",
+    "compute_oc4",
+    "oc4_bands",
+    "spectral_features",
+]
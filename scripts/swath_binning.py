@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Swath-to-grid binning on the ``pipeline.yml`` grid.
+
+``configs/pipeline.yml`` defines a regular lat/lon grid (``resolution_deg``)
+and a time window (``time_window_hours``). ``GridSpec`` turns those into a
+global cell numbering (row 0 at 90°N, column 0 at 180°W, like the NEO grids)
+and window start times.
+
+Binning a granule has two parts:
+
+1. the pixel-to-cell index — every pixel's flat cell number, deduplicated
+   with ``np.unique`` into ``(cells, inverse)``. This sort is the expensive
+   step and depends only on the granule geometry, so ``PixelIndexCache``
+   keeps it in an LRU keyed by a digest of the lat/lon arrays (and on disk
+   as ``.npz`` so re-runs and worker processes share it);
+2. the reductions — ``np.bincount`` over ``inverse`` gives per-cell pixel
+   counts, finite-value counts and sums for every variable in one pass each.
+
+``BinnedGranule`` holds sums and counts, so granules falling into the same
+window merge exactly (``merge_bins``) before the means are taken. Medians do
+not merge; ``bin_median`` computes them for a single granule with one
+``lexsort``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_INDEX_DIR = BASE_DIR / "outputs" / "bin_index"
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    resolution_deg: float = 0.1
+    time_window_hours: float = 6.0
+
+    @classmethod
+    def from_config(cls, cfg: Mapping) -> "GridSpec":
+        """Read ``processing.grid`` from a pipeline config (defaults when absent)."""
+        grid = (cfg.get("processing") or {}).get("grid") or {}
+        return cls(
+            resolution_deg=float(grid.get("resolution_deg", cls.resolution_deg)),
+            time_window_hours=float(grid.get("time_window_hours", cls.time_window_hours)),
+        )
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return int(round(180.0 / self.resolution_deg)), int(round(360.0 / self.resolution_deg))
+
+    def cell_of(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Flat cell number of each point (``-1`` for non-finite or out-of-range coordinates)."""
+        rows, cols = self.shape
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        valid = np.isfinite(lat) & np.isfinite(lon) & (np.abs(lat) <= 90.0)
+        lon = np.where(valid, (lon + 180.0) % 360.0 - 180.0, 0.0)
+        row = np.clip(((90.0 - np.where(valid, lat, 0.0)) / self.resolution_deg).astype(np.int64), 0, rows - 1)
+        col = np.clip(((lon + 180.0) / self.resolution_deg).astype(np.int64), 0, cols - 1)
+        return np.where(valid, row * cols + col, -1)
+
+    def cell_centers(self, cells: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        _, cols = self.shape
+        row, col = np.divmod(np.asarray(cells, dtype=np.int64), cols)
+        return 90.0 - (row + 0.5) * self.resolution_deg, -180.0 + (col + 0.5) * self.resolution_deg
+
+    def window_start(self, timestamp) -> pd.Timestamp:
+        """Start of the time window containing ``timestamp`` (UTC, windows aligned to the epoch)."""
+        ts = pd.Timestamp(timestamp)
+        ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+        return ts.floor(pd.Timedelta(hours=self.time_window_hours))
+
+
+@dataclass
+class PixelIndex:
+    cells: np.ndarray  # sorted unique cell numbers, int64
+    inverse: np.ndarray  # per pixel: position in ``cells`` or -1, int32
+
+    @property
+    def n_cells(self) -> int:
+        return int(self.cells.size)
+
+
+def build_index(lat: np.ndarray, lon: np.ndarray, spec: GridSpec) -> PixelIndex:
+    flat = spec.cell_of(np.ravel(lat), np.ravel(lon))
+    valid = flat >= 0
+    cells, inverse = np.unique(flat[valid], return_inverse=True)
+    full = np.full(flat.shape, -1, dtype=np.int32)
+    full[valid] = inverse
+    return PixelIndex(cells=cells, inverse=full)
+
+
+def geometry_key(lat: np.ndarray, lon: np.ndarray, spec: GridSpec) -> str:
+    digest = hashlib.sha1(repr((spec.resolution_deg, np.shape(lat))).encode("ascii"))
+    digest.update(np.ascontiguousarray(lat).tobytes())
+    digest.update(np.ascontiguousarray(lon).tobytes())
+    return digest.hexdigest()
+
+
+class PixelIndexCache:
+    """LRU of ``PixelIndex`` by granule geometry, backed by ``.npz`` files."""
+
+    def __init__(self, max_entries: int = 8, cache_dir: Path | str | None = DEFAULT_INDEX_DIR) -> None:
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries: "OrderedDict[str, PixelIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, lat: np.ndarray, lon: np.ndarray, spec: GridSpec) -> PixelIndex:
+        key = geometry_key(lat, lon, spec)
+        index = self._entries.get(key)
+        if index is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return index
+
+        path = self.cache_dir / f"{key[:20]}.npz" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            with np.load(path) as stored:
+                index = PixelIndex(cells=stored["cells"], inverse=stored["inverse"])
+            self.hits += 1
+        else:
+            index = build_index(lat, lon, spec)
+            self.misses += 1
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.stem + ".tmp.npz")
+                np.savez(tmp, cells=index.cells, inverse=index.inverse)
+                tmp.replace(path)
+
+        self._entries[key] = index
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+@dataclass
+class BinnedGranule:
+    window: pd.Timestamp
+    cells: np.ndarray
+    pixels: np.ndarray
+    sums: Dict[str, np.ndarray] = field(default_factory=dict)
+    counts: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def means(self) -> Dict[str, np.ndarray]:
+        out = {}
+        for name, total in self.sums.items():
+            mean = np.full(total.shape, np.nan, dtype=np.float64)
+            np.divide(total, self.counts[name], out=mean, where=self.counts[name] > 0)
+            out[name] = mean
+        return out
+
+
+def bin_granule(index: PixelIndex, values: Mapping[str, np.ndarray], window: pd.Timestamp) -> BinnedGranule:
+    """Per-cell pixel counts and per-variable finite counts and sums."""
+    inverse = index.inverse
+    valid = inverse >= 0
+    target = inverse[valid]
+    n = index.n_cells
+    binned = BinnedGranule(
+        window=window,
+        cells=index.cells,
+        pixels=np.bincount(target, minlength=n).astype(np.int64),
+    )
+    for name, arr in values.items():
+        flat = np.ravel(arr)[valid].astype(np.float64, copy=False)
+        finite = np.isfinite(flat)
+        binned.counts[name] = np.bincount(target[finite], minlength=n).astype(np.int64)
+        binned.sums[name] = np.bincount(target[finite], weights=flat[finite], minlength=n)
+    return binned
+
+
+def bin_median(index: PixelIndex, values: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Per-cell median of each variable for one granule (NaN where a cell has no finite value)."""
+    valid = index.inverse >= 0
+    out = {}
+    for name, arr in values.items():
+        flat = np.ravel(arr)[valid].astype(np.float64, copy=False)
+        target = index.inverse[valid]
+        finite = np.isfinite(flat)
+        flat, target = flat[finite], target[finite]
+        order = np.lexsort((flat, target))
+        flat, target = flat[order], target[order]
+        counts = np.bincount(target, minlength=index.n_cells)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        median = np.full(index.n_cells, np.nan)
+        has = counts > 0
+        lo = starts[has] + (counts[has] - 1) // 2
+        hi = starts[has] + counts[has] // 2
+        median[has] = 0.5 * (flat[lo] + flat[hi])
+        out[name] = median
+    return out
+
+
+def merge_bins(parts: Sequence[BinnedGranule]) -> BinnedGranule:
+    """Combine granules of the same window; sums and counts add per cell.
+
+    Parts may carry different variables (e.g. PACE and SST granules); a
+    variable missing from a part contributes nothing to its cells.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    cells, inverse = np.unique(np.concatenate([p.cells for p in parts]), return_inverse=True)
+    n = cells.size
+
+    def combine(arrays: List[np.ndarray]) -> np.ndarray:
+        return np.bincount(inverse, weights=np.concatenate(arrays), minlength=n)
+
+    merged = BinnedGranule(
+        window=parts[0].window,
+        cells=cells,
+        pixels=combine([p.pixels for p in parts]).astype(np.int64),
+    )
+    names = list(dict.fromkeys(name for p in parts for name in p.sums))
+    for name in names:
+        zeros = [np.zeros(p.cells.size) for p in parts]
+        merged.sums[name] = combine([p.sums.get(name, z) for p, z in zip(parts, zeros)])
+        merged.counts[name] = combine([p.counts.get(name, z) for p, z in zip(parts, zeros)]).astype(np.int64)
+    return merged
+
+
+def to_frame(binned: BinnedGranule, spec: GridSpec) -> pd.DataFrame:
+    """One row per occupied cell: window, cell, centre lat/lon, pixel count and variable means."""
+    lat, lon = spec.cell_centers(binned.cells)
+    frame = pd.DataFrame(
+        {
+            "window_start": np.full(binned.cells.size, binned.window.tz_convert(None).to_datetime64()),
+            "cell": binned.cells,
+            "lat": lat,
+            "lon": lon,
+            "pixel_count": binned.pixels,
+        }
+    )
+    for name, mean in binned.means().items():
+        frame[name] = mean
+    return frame
+
+
+__all__ = [
+    "BinnedGranule",
+    "GridSpec",
+    "PixelIndex",
+    "PixelIndexCache",
+    "bin_granule",
+    "bin_median",
+    "build_index",
+    "merge_bins",
+    "to_frame",
+]
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""XYZ raster tiles for the global NEO SST/chlorophyll and SAI grids.
+
+Tiles are 256×256 images in either tiling scheme:
+
+* ``webmercator`` — the Leaflet/OSM default (EPSG:3857), ``2^z × 2^z`` tiles;
+* ``epsg4326`` — plate carrée, ``2^(z+1) × 2^z`` tiles of ``180 / 2^z`` degrees.
+
+Every tile pixel takes the value of the 0.1° cell under its centre, read from
+a NaN-aware mean-pooled copy of the grid (``grid_pyramid``) whose cell size is
+just below the pixel size, so zoomed-out tiles average the cells they cover
+instead of aliasing. Each layer has a fixed colour map and value range, so
+tiles rendered at different times match; NaN (land, cloud) is transparent.
+
+``TileCache`` renders tiles lazily: a tile is looked up in memory, then on
+disk under ``outputs/tiles/``, and only rendered on a miss. Both levels are
+least-recently-used caches with a size budget. Disk paths include a token of
+the source file's size and mtime, so tiles of a rebuilt grid are never served
+stale (the orphaned ones age out of the LRU).
+
+Examples::
+
+    python scripts/xyz_tiles.py build --layer sst --month 2024-09 --zooms 0 1 2 3
+    python scripts/xyz_tiles.py serve --port 8765
+    # http://localhost:8765/tiles/webmercator/sst/2024-09/3/4/2.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Sequence, Tuple
+
+import numpy as np
+
+from grid_pyramid import build_pyramid
+from neo_grids import BASE_DIR, RESOLUTION_DEG, cache_path, list_months, load_month, neo_path
+from sai_raster import DEFAULT_OUTPUT as SAI_RASTER
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TILE_DIR = BASE_DIR / "outputs" / "tiles"
+SCHEMES = ("webmercator", "epsg4326")
+FORMATS = ("png", "webp")
+TILE_SIZE = 256
+PYRAMID_STEPS = (1, 2, 4, 8, 16)
+
+_TILE_PATH = re.compile(r"^/tiles/(?P<scheme>[\w]+)/(?P<layer>[\w]+)/(?P<month>\d{4}-\d{2})/"
+                        r"(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.(?P<fmt>png|webp)$")
+
+
+@dataclass(frozen=True)
+class LayerStyle:
+    cmap: str
+    vmin: float
+    vmax: float
+    log: bool = False
+    label: str = ""
+
+
+LAYER_STYLES: Dict[str, LayerStyle] = {
+    "sst": LayerStyle("turbo", -2.0, 32.0, label="Sea surface temperature (°C)"),
+    "chlorophyll": LayerStyle("viridis", 0.01, 20.0, log=True, label="Chlorophyll-a (mg/m³)"),
+    "sai": LayerStyle("hot", -1.5, 1.5, label="Shark Activity Index"),
+}
+
+
+def source_path(layer: str, month: str) -> Path:
+    """File the layer's grid is read from (used for the staleness token)."""
+    if layer == "sai":
+        return Path(SAI_RASTER)
+    return cache_path(neo_path(layer, month))
+
+
+def load_layer(layer: str, month: str) -> np.ndarray:
+    """The (1800, 3600) grid of ``layer`` for ``month`` (NaN off-ocean)."""
+    if layer == "sai":
+        meta = json.loads(Path(SAI_RASTER).with_suffix(".json").read_text(encoding="utf-8"))
+        if month not in meta["months"]:
+            raise KeyError(f"Month {month} is not in {SAI_RASTER}")
+        return np.load(SAI_RASTER, mmap_mode="r")[meta["months"].index(month)]
+    if layer not in LAYER_STYLES:
+        raise KeyError(f"Unknown layer {layer!r}; expected one of {sorted(LAYER_STYLES)}")
+    return load_month(layer, month)
+
+
+def available_months(layer: str) -> list[str]:
+    if layer == "sai":
+        meta_path = Path(SAI_RASTER).with_suffix(".json")
+        return json.loads(meta_path.read_text(encoding="utf-8"))["months"] if meta_path.exists() else []
+    return list_months(layer)
+
+
+def colormap_lut(name: str) -> np.ndarray:
+    """(257, 4) uint8 RGBA table: 256 colours plus a transparent entry for NaN."""
+    from matplotlib import colormaps
+
+    lut = np.zeros((257, 4), dtype=np.uint8)
+    lut[:256] = (colormaps[name](np.linspace(0.0, 1.0, 256)) * 255).round().astype(np.uint8)
+    return lut
+
+
+def tile_count(scheme: str, z: int) -> Tuple[int, int]:
+    """Number of tiles ``(nx, ny)`` at zoom ``z``."""
+    if scheme == "webmercator":
+        return 2**z, 2**z
+    if scheme == "epsg4326":
+        return 2 ** (z + 1), 2**z
+    raise ValueError(f"Unknown scheme {scheme!r}; expected one of {SCHEMES}")
+
+
+def pixel_centers(scheme: str, z: int, x: int, y: int, size: int = TILE_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude (per tile row) and longitude (per tile column) of the pixel centres.
+
+    Both schemes are separable, so one vector per axis describes the tile.
+    """
+    nx, ny = tile_count(scheme, z)
+    frac = (np.arange(size) + 0.5) / size
+    lon = (x + frac) / nx * 360.0 - 180.0
+    if scheme == "webmercator":
+        lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * (y + frac) / ny))))
+    else:
+        lat = 90.0 - (y + frac) / ny * 180.0
+    return lat, lon
+
+
+def pyramid_step(scheme: str, z: int, size: int = TILE_SIZE) -> int:
+    """Coarsest pooling step whose cells are no larger than one tile pixel."""
+    nx, _ = tile_count(scheme, z)
+    pixel_deg = 360.0 / (nx * size)
+    fitting = [s for s in PYRAMID_STEPS if s * RESOLUTION_DEG <= pixel_deg]
+    return max(fitting) if fitting else 1
+
+
+def sample_tile(levels: Dict[int, np.ndarray], scheme: str, z: int, x: int, y: int, size: int = TILE_SIZE) -> np.ndarray:
+    """(size, size) values of tile ``z/x/y`` (NaN where there is no data)."""
+    nx, ny = tile_count(scheme, z)
+    if not (0 <= x < nx and 0 <= y < ny):
+        raise ValueError(f"Tile {z}/{x}/{y} is outside the {scheme} grid")
+    step = pyramid_step(scheme, z, size)
+    grid = levels[step]
+    cell = RESOLUTION_DEG * step
+    lat, lon = pixel_centers(scheme, z, x, y, size)
+    rows = np.clip(((90.0 - lat) / cell).astype(np.intp), 0, grid.shape[0] - 1)
+    cols = np.clip(((lon + 180.0) / cell).astype(np.intp), 0, grid.shape[1] - 1)
+    return grid[np.ix_(rows, cols)]
+
+
+def colorize(values: np.ndarray, style: LayerStyle, lut: np.ndarray) -> np.ndarray:
+    """RGBA uint8 image of ``values`` on the layer's fixed scale."""
+    values = np.asarray(values, dtype=np.float64)
+    lo, hi = style.vmin, style.vmax
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if style.log:
+            values, lo, hi = np.log10(values), np.log10(lo), np.log10(hi)
+        codes = np.clip((values - lo) / (hi - lo) * 255.0, 0, 255)
+    codes = np.where(np.isfinite(codes), codes, 256).astype(np.intp)
+    return lut[codes]
+
+
+def encode_image(rgba: np.ndarray, fmt: str = "png") -> bytes:
+    from PIL import Image
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {FORMATS}")
+    buffer = io.BytesIO()
+    image = Image.fromarray(rgba, mode="RGBA")
+    if fmt == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format="WEBP", lossless=True)
+    return buffer.getvalue()
+
+
+class TileCache:
+    """Lazily rendered tiles with LRU eviction in memory and on disk."""
+
+    def __init__(
+        self,
+        tile_dir: Path | str = DEFAULT_TILE_DIR,
+        max_memory_mb: float = 64,
+        max_disk_mb: float = 2048,
+        max_grids: int = 4,
+        tile_size: int = TILE_SIZE,
+    ) -> None:
+        self.tile_dir = Path(tile_dir)
+        self.max_memory = int(max_memory_mb * 2**20)
+        self.max_disk = int(max_disk_mb * 2**20)
+        self.max_grids = max_grids
+        self.tile_size = tile_size
+        self._memory: "OrderedDict[Path, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._grids: "OrderedDict[Tuple[str, str], Dict[int, np.ndarray]]" = OrderedDict()
+        self._luts: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        self._disk: "OrderedDict[Path, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._scan_disk()
+        self.hits = self.misses = 0
+
+    def _scan_disk(self) -> None:
+        if not self.tile_dir.exists():
+            return
+        files = [p for fmt in FORMATS for p in self.tile_dir.rglob(f"*.{fmt}")]
+        for path in sorted(files, key=lambda p: p.stat().st_mtime_ns):
+            self._disk[path] = path.stat().st_size
+            self._disk_bytes += self._disk[path]
+
+    @staticmethod
+    def source_token(layer: str, month: str) -> str:
+        stat = source_path(layer, month).stat()
+        return hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii")).hexdigest()[:8]
+
+    def path(self, scheme: str, layer: str, month: str, z: int, x: int, y: int, fmt: str = "png") -> Path:
+        token = self.source_token(layer, month)
+        return self.tile_dir / scheme / layer / f"{month}-{token}" / str(z) / str(x) / f"{y}.{fmt}"
+
+    def levels(self, layer: str, month: str) -> Dict[int, np.ndarray]:
+        key = (layer, month)
+        levels = self._grids.get(key)
+        if levels is None:
+            LOGGER.info("Pooling %s %s", layer, month)
+            levels = build_pyramid(load_layer(layer, month), PYRAMID_STEPS)
+            self._grids[key] = levels
+            while len(self._grids) > self.max_grids:
+                self._grids.popitem(last=False)
+        self._grids.move_to_end(key)
+        return levels
+
+    def render(self, scheme: str, layer: str, month: str, z: int, x: int, y: int, fmt: str = "png") -> bytes:
+        style = LAYER_STYLES[layer]
+        if style.cmap not in self._luts:
+            self._luts[style.cmap] = colormap_lut(style.cmap)
+        values = sample_tile(self.levels(layer, month), scheme, z, x, y, self.tile_size)
+        return encode_image(colorize(values, style, self._luts[style.cmap]), fmt)
+
+    def get(self, scheme: str, layer: str, month: str, z: int, x: int, y: int, fmt: str = "png") -> bytes:
+        """Tile bytes from memory, disk, or a fresh render (in that order)."""
+        if layer not in LAYER_STYLES:
+            raise KeyError(f"Unknown layer {layer!r}; expected one of {sorted(LAYER_STYLES)}")
+        with self._lock:
+            path = self.path(scheme, layer, month, z, x, y, fmt)
+            data = self._memory.get(path)
+            if data is not None:
+                self._memory.move_to_end(path)
+                self._touch_disk(path)
+                self.hits += 1
+                return data
+            if path in self._disk and path.exists():
+                data = path.read_bytes()
+                self._touch_disk(path)
+                self.hits += 1
+            else:
+                data = self.render(scheme, layer, month, z, x, y, fmt)
+                self._write_disk(path, data)
+                self.misses += 1
+            self._remember(path, data)
+            return data
+
+    def _remember(self, path: Path, data: bytes) -> None:
+        self._memory[path] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _touch_disk(self, path: Path) -> None:
+        if path in self._disk:
+            self._disk.move_to_end(path)
+
+    def _write_disk(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self._disk_bytes += len(data) - self._disk.pop(path, 0)
+        self._disk[path] = len(data)
+        while self._disk_bytes > self.max_disk and len(self._disk) > 1:
+            evicted, size = self._disk.popitem(last=False)
+            evicted.unlink(missing_ok=True)
+            self._disk_bytes -= size
+
+    def tiles(self, scheme: str, zooms: Sequence[int]) -> Iterator[Tuple[int, int, int]]:
+        for z in zooms:
+            nx, ny = tile_count(scheme, z)
+            for x in range(nx):
+                for y in range(ny):
+                    yield z, x, y
+
+    def build(self, scheme: str, layer: str, month: str, zooms: Sequence[int], fmt: str = "png") -> int:
+        """Render (or reuse) every tile of the given zooms; returns the number of tiles."""
+        count, misses = 0, self.misses
+        for z, x, y in self.tiles(scheme, zooms):
+            self.get(scheme, layer, month, z, x, y, fmt)
+            count += 1
+        LOGGER.info("%s %s %s: %d tiles (%d rendered)", scheme, layer, month, count, self.misses - misses)
+        return count
+
+
+def make_handler(cache: TileCache):
+    class TileHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes, content_type: str, cacheable: bool = False) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            if cacheable:
+                self.send_header("Cache-Control", "public, max-age=3600")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            path = self.path.split("?", 1)[0]
+            if path == "/tiles/layers.json":
+                layers = {
+                    name: {**style.__dict__, "months": available_months(name)}
+                    for name, style in LAYER_STYLES.items()
+                }
+                body = json.dumps({"schemes": SCHEMES, "tileSize": cache.tile_size, "layers": layers}).encode("utf-8")
+                self._send(200, body, "application/json")
+                return
+            match = _TILE_PATH.match(path)
+            if match is None:
+                self._send(404, b"not found", "text/plain")
+                return
+            p = match.groupdict()
+            try:
+                data = cache.get(p["scheme"], p["layer"], p["month"], int(p["z"]), int(p["x"]), int(p["y"]), p["fmt"])
+            except (KeyError, ValueError, FileNotFoundError) as exc:
+                self._send(404, str(exc).encode("utf-8"), "text/plain")
+                return
+            self._send(200, data, f"image/{p['fmt']}", cacheable=True)
+
+        def log_message(self, format: str, *args) -> None:  # noqa: A002
+            LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    return TileHandler
+
+
+def serve(cache: TileCache, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Development tile server: ``GET /tiles/{scheme}/{layer}/{month}/{z}/{x}/{y}.{png|webp}``."""
+    server = ThreadingHTTPServer((host, port), make_handler(cache))
+    LOGGER.info("Serving tiles from %s on http://%s:%d/tiles/", cache.tile_dir, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="XYZ tiles for the NEO SST/chlorophyll and SAI grids")
+    parser.add_argument("--tile-dir", default=str(DEFAULT_TILE_DIR), help="Tile cache directory (default: %(default)s)")
+    parser.add_argument("--max-disk-mb", type=float, default=2048, help="Disk cache budget (default: %(default)s)")
+    parser.add_argument("--max-memory-mb", type=float, default=64, help="In-memory tile budget (default: %(default)s)")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        help="Logging level (DEBUG, INFO, WARNING, ...)",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Pre-render the tiles of some zoom levels")
+    build.add_argument("--layer", choices=sorted(LAYER_STYLES), required=True)
+    build.add_argument("--month", nargs="+", required=True, help="Months (YYYY-MM)")
+    build.add_argument("--zooms", type=int, nargs="+", default=[0, 1, 2, 3])
+    build.add_argument("--scheme", choices=SCHEMES, default="webmercator")
+    build.add_argument("--format", choices=FORMATS, default="png")
+
+    srv = sub.add_parser("serve", help="Local HTTP tile endpoint rendering missing tiles on demand")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(message)s")
+    cache = TileCache(args.tile_dir, max_memory_mb=args.max_memory_mb, max_disk_mb=args.max_disk_mb)
+    if args.command == "build":
+        for month in args.month:
+            cache.build(args.scheme, args.layer, month, args.zooms, args.format)
+    else:
+        serve(cache, args.host, args.port)
+
+
+__all__ = [
+    "FORMATS",
+    "LAYER_STYLES",
+    "LayerStyle",
+    "SCHEMES",
+    "TileCache",
+    "colorize",
+    "colormap_lut",
+    "pixel_centers",
+    "sample_tile",
+    "serve",
+    "tile_count",
+]
+
+
+if __name__ == "__main__":
+    main()
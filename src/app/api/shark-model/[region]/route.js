@@ -0,0 +1,51 @@
+import { readShard, readShardIndex } from "../shards";
+
+export async function GET(request, { params }) {
+  const { region } = await params;
+
+  let entry;
+  try {
+    const index = JSON.parse(await readShardIndex());
+    entry = index.regions.find((item) => item.region === region);
+  } catch (error) {
+    return new Response("Not found", { status: 404 });
+  }
+  if (!entry) {
+    return new Response("Not found", { status: 404 });
+  }
+
+  // ?points=128 returns a single zoom level instead of the whole shard
+  const points = new URL(request.url).searchParams.get("points");
+
+  // Shards are content-addressed: the hash changes whenever the shard does
+  const etag = points ? `"${entry.hash}-${points}"` : `"${entry.hash}"`;
+  if (request.headers.get("if-none-match") === etag) {
+    return new Response(null, { status: 304, headers: { ETag: etag } });
+  }
+
+  let data;
+  try {
+    data = await readShard(entry.shard);
+  } catch (error) {
+    return new Response("Not found", { status: 404 });
+  }
+
+  if (points) {
+    const shard = JSON.parse(data);
+    const level = shard.levels?.[points];
+    if (!level) {
+      return new Response("Not found", { status: 404 });
+    }
+    data = Buffer.from(JSON.stringify({ region: shard.region, hash: shard.hash, points: Number(points), timeSeries: level }));
+  }
+
+  return new Response(data, {
+    status: 200,
+    headers: {
+      "Content-Type": "application/json; charset=utf-8",
+      "Content-Length": data.length.toString(),
+      "Cache-Control": "public, max-age=300",
+      ETag: etag
+    }
+  });
+}
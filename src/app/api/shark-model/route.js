@@ -0,0 +1,25 @@
+import { createHash } from "node:crypto";
+import { readShardIndex } from "./shards";
+
+export async function GET(request) {
+  let index;
+  try {
+    index = await readShardIndex();
+  } catch (error) {
+    return new Response("Not found", { status: 404 });
+  }
+
+  const etag = `"${createHash("sha1").update(index).digest("hex")}"`;
+  if (request.headers.get("if-none-match") === etag) {
+    return new Response(null, { status: 304, headers: { ETag: etag } });
+  }
+
+  return new Response(index, {
+    status: 200,
+    headers: {
+      "Content-Type": "application/json; charset=utf-8",
+      "Cache-Control": "public, max-age=60",
+      ETag: etag
+    }
+  });
+}
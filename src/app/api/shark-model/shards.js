@@ -0,0 +1,13 @@
+import path from "node:path";
+import fs from "node:fs/promises";
+
+// Written by `python scripts/build_shark_model_dashboard.py --format shards`
+export const SHARD_ROOT = path.join(process.cwd(), "public", "data", "shark-model", "regions");
+
+export async function readShardIndex() {
+  return fs.readFile(path.join(SHARD_ROOT, "index.json"), "utf8");
+}
+
+export async function readShard(filename) {
+  return fs.readFile(path.join(SHARD_ROOT, path.basename(filename)));
+}
@@ -1,7 +1,8 @@
 ﻿"use client";
 
 import dynamic from "next/dynamic";
-import { useMemo } from "react";
+import { useCallback, useMemo, useRef, useState } from "react";
+import { decodeGrid, loadPyramidWindow, pickPyramidLevel } from "../data/quantizedGrid";
 
 const Plot = dynamic(() => import("react-plotly.js"), {
   ssr: false,
@@ -46,22 +47,72 @@ export function HeatmapCard({
   zmid,
   height = 320
 }) {
+  const pyramid = grid?.pyramid;
+  const [detail, setDetail] = useState(null);
+  const request = useRef(0);
+
   const { z, xAxis, yAxis } = useMemo(() => {
-    const data = grid?.data ?? [];
+    const data = decodeGrid(grid);
     if (!data.length) {
       return { z: [[0]], xAxis: [0], yAxis: [0] };
     }
     const rows = data.length;
     const cols = data[0]?.length ?? 0;
+    if (pyramid) {
+      // Pyramid grids are placed in source-pixel coordinates so zoomed tiles line up
+      const step = grid.step;
+      const total = pyramid.shape[0];
+      const y = Array.from({ length: rows }, (_, idx) => total - (idx + 0.5) * step);
+      const x = Array.from({ length: cols }, (_, idx) => (idx + 0.5) * step);
+      return { z: data, xAxis: x, yAxis: y };
+    }
     const y = Array.from({ length: rows }, (_, idx) => rows - idx);
     const x = Array.from({ length: cols }, (_, idx) => idx + 1);
     return { z: data, xAxis: x, yAxis: y };
-  }, [grid]);
+  }, [grid, pyramid]);
+
+  const zRange = useMemo(() => {
+    if (!pyramid) return null;
+    const [lo, hi] = pyramid.range;
+    if (typeof zmid !== "number") return { zmin: lo, zmax: hi };
+    const half = Math.max(Math.abs(hi - zmid), Math.abs(lo - zmid));
+    return { zmin: zmid - half, zmax: zmid + half };
+  }, [pyramid, zmid]);
+
+  const handleRelayout = useCallback(
+    (event) => {
+      if (!pyramid) return;
+      const id = (request.current += 1);
+      if (event["xaxis.autorange"] || event["yaxis.autorange"]) {
+        setDetail(null);
+        return;
+      }
+      const x0 = event["xaxis.range[0]"];
+      const x1 = event["xaxis.range[1]"];
+      const y0 = event["yaxis.range[0]"];
+      const y1 = event["yaxis.range[1]"];
+      if ([x0, x1, y0, y1].some((value) => typeof value !== "number")) return;
+
+      const total = pyramid.shape[0];
+      const rows = [total - Math.max(y0, y1), total - Math.min(y0, y1)];
+      const cols = [Math.min(x0, x1), Math.max(x0, x1)];
+      const step = pickPyramidLevel(pyramid, Math.max(rows[1] - rows[0], cols[1] - cols[0]), 2 * z.length);
+      if (step >= grid.step) {
+        setDetail(null);
+        return;
+      }
+      loadPyramidWindow(pyramid, step, rows, cols).then((view) => {
+        if (view && id === request.current) setDetail(view);
+      });
+    },
+    [pyramid, grid, z.length]
+  );
 
   const layout = useMemo(() => {
     const base = commonLayout(height);
     return {
       ...base,
+      uirevision: title ?? "heatmap",
       title: { text: title, font: { size: 16, color: "#5eead4" } },
       xaxis: {
         title: grid?.xLabel ?? "X",
@@ -92,19 +143,40 @@ export function HeatmapCard({
         titlefont: { size: 11 }
       }
     };
-    if (typeof zmid === "number") {
+    if (zRange) {
+      Object.assign(payload, zRange);
+    } else if (typeof zmid === "number") {
       payload.zmid = zmid;
     }
     return payload;
-  }, [z, xAxis, yAxis, colorscale, colorbarTitle, zmid]);
+  }, [z, xAxis, yAxis, colorscale, colorbarTitle, zmid, zRange]);
+
+  const traces = useMemo(() => {
+    if (!detail || !pyramid) return [trace];
+    const { step, rowStart, colStart } = detail;
+    const total = pyramid.shape[0];
+    return [
+      trace,
+      {
+        z: detail.z,
+        x: detail.z[0].map((_, idx) => (colStart + idx + 0.5) * step),
+        y: detail.z.map((_, idx) => total - (rowStart + idx + 0.5) * step),
+        type: "heatmap",
+        colorscale,
+        showscale: false,
+        ...zRange
+      }
+    ];
+  }, [trace, detail, pyramid, colorscale, zRange]);
 
   return (
     <article className="space-y-3">
       {description ? <p className="text-xs text-white/65 leading-relaxed">{description}</p> : null}
       <div className="rounded-2xl border border-white/10 bg-black/40 p-3">
         <Plot
-          data={[trace]}
+          data={traces}
           layout={layout}
+          onRelayout={handleRelayout}
           config={{
             ...baseConfig,
             toImageButtonOptions: {
@@ -15,6 +15,17 @@ const layerColors = {
   sharkHotspots: "#c084fc"
 };
 
+// Raster layers served by `python scripts/xyz_tiles.py serve` (e.g. http://localhost:8765/tiles)
+const TILE_SERVER = process.env.NEXT_PUBLIC_TILE_SERVER;
+const TILE_MONTH = process.env.NEXT_PUBLIC_TILE_MONTH;
+const rasterLayers = {
+  seaSurfaceTemperature: "sst",
+  phytoplankton: "chlorophyll",
+  sharkHotspots: "sai"
+};
+// 0.1 degree grids gain nothing past this zoom; Leaflet upscales the z5 tiles instead
+const RASTER_MAX_NATIVE_ZOOM = 5;
+
 const defaultCenter = [40.6, -73.7];
 const defaultZoom = 7;
 const DEGREE_LABEL = "degC";
@@ -54,7 +65,7 @@ function hotspotRadius(confidence) {
   return Math.max(10, Math.round(confidence * 25));
 }
 
-export default function OceanMap({ layers, visibleLayers, filters }) {
+export default function OceanMap({ layers, visibleLayers, filters, tileMonth = TILE_MONTH }) {
   const { depthRange, temperatureRange, timeFilter } = filters;
 
   const filteredLayers = useMemo(() => {
@@ -89,6 +100,20 @@ export default function OceanMap({ layers, visibleLayers, filters }) {
           attribution="&copy; OpenStreetMap contributors & CARTO"
         />
 
+        {TILE_SERVER && tileMonth
+          ? Object.entries(rasterLayers).map(([key, layer]) =>
+              visibleLayers[key] ? (
+                <TileLayer
+                  key={`${layer}-${tileMonth}`}
+                  url={`${TILE_SERVER}/webmercator/${layer}/${tileMonth}/{z}/{x}/{y}.png`}
+                  opacity={0.55}
+                  maxNativeZoom={RASTER_MAX_NATIVE_ZOOM}
+                  attribution="NASA NEO"
+                />
+              ) : null
+            )
+          : null}
+
         {visibleLayers.seaSurfaceTemperature ? (
           <LayerGroup>
             {filteredLayers.seaSurfaceTemperature.map((point) => (
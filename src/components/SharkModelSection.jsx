@@ -1,7 +1,14 @@
 ﻿"use client";
 
+import { useCallback, useEffect, useState } from "react";
 import dynamic from "next/dynamic";
-import sharkModelData from "../data/sharkModelDashboard.json";
+import {
+  BASE_POINTS,
+  loadRegionSeries,
+  loadSharkModel,
+  pickLevel,
+  topRegions as pickTopRegions
+} from "../data/sharkModelData";
 
 const Plot = dynamic(() => import("react-plotly.js"), {
   ssr: false,
@@ -23,7 +30,11 @@ const baseConfig = {
   ]
 };
 
-function TimeSeriesPlot({ timeSeries, selectedRegions }) {
+function parsePlotlyDate(value) {
+  return Date.parse(String(value).replace(" ", "T"));
+}
+
+function TimeSeriesPlot({ timeSeries, selectedRegions, onRelayout }) {
   const traces = selectedRegions
     .filter((region) => timeSeries[region])
     .map((region) => ({
@@ -48,13 +59,15 @@ function TimeSeriesPlot({ timeSeries, selectedRegions }) {
     },
     xaxis: { title: "Date", tickangle: -30, tickfont: { size: 10 } },
     yaxis: { title: "Shark activity index", tickfont: { size: 10 } },
-    legend: { orientation: "h", y: -0.2 }
+    legend: { orientation: "h", y: -0.2 },
+    uirevision: "activity-timeseries"
   };
 
   return (
     <Plot
       data={traces}
       layout={layout}
+      onRelayout={onRelayout}
       config={{ ...baseConfig, toImageButtonOptions: { format: "png", filename: "shark-activity-timeseries", scale: 2 } }}
       style={{ width: "100%", height: 360 }}
       useResizeHandler
@@ -102,13 +115,64 @@ function ScatterPlot({ scatter }) {
 }
 
 export default function SharkModelSection() {
-  const { formulas, regions, timeSeries, scatter, hotspots, generatedAt } = sharkModelData;
+  const [data, setData] = useState(null);
+  const [error, setError] = useState(null);
+  const [zoomSeries, setZoomSeries] = useState(null);
+
+  // Shards hold several zoom levels; fetch the one that fits the visible date range
+  const handleRelayout = useCallback(
+    (event) => {
+      if (data?.source !== "shards") return;
+      const selected = pickTopRegions(data.regions);
+      const dates = data.timeSeries[selected[0]]?.date ?? [];
+      let fraction = 1;
+      if (event["xaxis.range[0]"] !== undefined && dates.length > 1) {
+        const span = parsePlotlyDate(dates[dates.length - 1]) - parsePlotlyDate(dates[0]);
+        const visible = parsePlotlyDate(event["xaxis.range[1]"]) - parsePlotlyDate(event["xaxis.range[0]"]);
+        fraction = span > 0 && visible > 0 ? Math.min(1, visible / span) : 1;
+      } else if (!event["xaxis.autorange"]) {
+        return;
+      }
+      const points = pickLevel(data.levels, fraction);
+      if (points === (zoomSeries?.points ?? BASE_POINTS)) return;
+      if (points === BASE_POINTS) {
+        setZoomSeries(null);
+        return;
+      }
+      Promise.all(selected.map((region) => loadRegionSeries(region, points)))
+        .then((series) =>
+          setZoomSeries({ points, timeSeries: Object.fromEntries(selected.map((region, i) => [region, series[i]])) })
+        )
+        .catch((err) => console.error("Failed to load shark activity zoom level", err));
+    },
+    [data, zoomSeries]
+  );
+
+  useEffect(() => {
+    let isMounted = true;
+    loadSharkModel()
+      .then((loaded) => {
+        if (isMounted) setData(loaded);
+      })
+      .catch((err) => {
+        console.error("Failed to load shark model data", err);
+        if (isMounted) setError("Failed to load shark model data.");
+      });
+    return () => {
+      isMounted = false;
+    };
+  }, []);
+
+  if (!data) {
+    return (
+      <section className="rounded-3xl border border-white/10 bg-white/5 p-8 text-sm text-white/60 shadow-xl">
+        {error ?? "Loading shark activity model..."}
+      </section>
+    );
+  }
 
-  const topRegions = regions
-    .slice()
-    .sort((a, b) => b.activityMean - a.activityMean)
-    .slice(0, 3)
-    .map((item) => item.region);
+  const { formulas, regions, timeSeries, scatter, hotspots, generatedAt } = data;
+  const topRegions = pickTopRegions(regions);
 
   return (
     <section className="rounded-3xl border border-white/10 bg-white/5 p-8 text-white shadow-xl space-y-8">
@@ -141,7 +205,11 @@ export default function SharkModelSection() {
       <div className="grid gap-6 lg:grid-cols-[1.4fr_1fr]">
         <div className="rounded-2xl border border-white/10 bg-black/40 p-4">
           <h3 className="text-sm font-semibold text-teal-200 mb-2">Activity time series (bi-weekly demo feed)</h3>
-          <TimeSeriesPlot timeSeries={timeSeries} selectedRegions={topRegions} />
+          <TimeSeriesPlot
+            timeSeries={zoomSeries?.timeSeries ?? timeSeries}
+            selectedRegions={topRegions}
+            onRelayout={handleRelayout}
+          />
         </div>
         <div className="rounded-2xl border border-white/10 bg-black/40 p-4 space-y-3">
           <h3 className="text-sm font-semibold text-teal-200">Region quick stats</h3>
@@ -0,0 +1,99 @@
+// Decoder for the quantised heatmap grids written by scripts/build_plotly_from_png.py
+// and scripts/grid_pyramid.py: base64 little-endian uint8/uint16 codes with
+// value = offset + code * scale, the dtype's maximum code standing for a missing cell.
+// Pyramid grids also carry a `pyramid` manifest whose finer levels are fetched as tiles.
+
+const VIEWS = {
+  uint8: [Uint8Array, 255],
+  uint16: [Uint16Array, 65535]
+};
+
+function base64ToBytes(text) {
+  const binary = atob(text);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i += 1) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
+export function decodeGrid(grid) {
+  if (!grid) return [];
+  if (Array.isArray(grid.data)) return grid.data;
+  if (!grid.values) return [];
+
+  const [View, nanCode] = VIEWS[grid.dtype] ?? VIEWS.uint8;
+  const codes = new View(base64ToBytes(grid.values).buffer);
+  const [rows, cols] = grid.shape;
+  const out = new Array(rows);
+  for (let r = 0; r < rows; r += 1) {
+    const row = new Array(cols);
+    const base = r * cols;
+    for (let c = 0; c < cols; c += 1) {
+      const code = codes[base + c];
+      row[c] = code === nanCode ? null : grid.offset + code * grid.scale;
+    }
+    out[r] = row;
+  }
+  return out;
+}
+
+const tileCache = new Map();
+
+function fetchTile(url) {
+  if (!tileCache.has(url)) {
+    tileCache.set(
+      url,
+      fetch(url)
+        .then((response) => (response.ok ? response.json() : null))
+        .then((tile) => (tile ? decodeGrid(tile) : null))
+    );
+  }
+  return tileCache.get(url);
+}
+
+// Finest level whose window of `span` source pixels fits in `maxCells` cells per axis.
+export function pickPyramidLevel(pyramid, span, maxCells = 512) {
+  const steps = pyramid.levels.map((level) => level.step).sort((a, b) => a - b);
+  return steps.find((step) => span / step <= maxCells) ?? steps[steps.length - 1];
+}
+
+// Cells of level `step` covering source rows [r0, r1) and columns [c0, c1),
+// assembled from the tiles that intersect the window.
+export async function loadPyramidWindow(pyramid, step, [r0, r1], [c0, c1]) {
+  const level = pyramid.levels.find((entry) => entry.step === step);
+  if (!level) return null;
+  const [levelRows, levelCols] = level.shape;
+  const size = pyramid.tileSize;
+  const rowStart = Math.max(0, Math.floor(r0 / step));
+  const rowEnd = Math.min(levelRows, Math.ceil(r1 / step));
+  const colStart = Math.max(0, Math.floor(c0 / step));
+  const colEnd = Math.min(levelCols, Math.ceil(c1 / step));
+  if (rowEnd <= rowStart || colEnd <= colStart) return null;
+
+  const z = Array.from({ length: rowEnd - rowStart }, () => new Array(colEnd - colStart).fill(null));
+  const requests = [];
+  for (let ty = Math.floor(rowStart / size); ty * size < rowEnd; ty += 1) {
+    for (let tx = Math.floor(colStart / size); tx * size < colEnd; tx += 1) {
+      const url = pyramid.tileUrl
+        .replace("{step}", step)
+        .replace("{row}", ty)
+        .replace("{col}", tx);
+      requests.push(
+        fetchTile(url).then((tile) => {
+          if (!tile) return;
+          tile.forEach((values, i) => {
+            const r = ty * size + i;
+            if (r < rowStart || r >= rowEnd) return;
+            values.forEach((value, j) => {
+              const c = tx * size + j;
+              if (c >= colStart && c < colEnd) z[r - rowStart][c - colStart] = value;
+            });
+          });
+        })
+      );
+    }
+  }
+  await Promise.all(requests);
+  return { step, z, rowStart, colStart };
+}
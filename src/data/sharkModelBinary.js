@@ -0,0 +1,101 @@
+// Decoder for the typed-array shark model payload written by
+// `python scripts/build_shark_model_dashboard.py --format binary`.
+// Rebuilds the same shape as sharkModelDashboard.json so components can use either.
+
+const DEFAULT_BASE_URL = "/data/shark-model/sharkModelDashboard";
+const UINT16_NAN = 65535;
+const DAY_MS = 86400000;
+
+const VIEWS = {
+  float32: Float32Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint8: Uint8Array
+};
+
+function roundTo(value, digits) {
+  const factor = 10 ** digits;
+  return Math.round(value * factor) / factor;
+}
+
+export function decodeArrays(buffer, entries) {
+  const arrays = {};
+  for (const entry of entries) {
+    const View = VIEWS[entry.dtype];
+    const raw = new View(buffer, entry.offset, entry.length);
+    if (entry.dtype === "uint16") {
+      const values = new Float64Array(entry.length);
+      for (let i = 0; i < entry.length; i += 1) {
+        values[i] = raw[i] === UINT16_NAN ? NaN : entry.min + raw[i] * entry.scale;
+      }
+      arrays[entry.name] = values;
+    } else {
+      arrays[entry.name] = raw;
+    }
+  }
+  return arrays;
+}
+
+export function decodeSharkModelPayload(manifest, buffer) {
+  const arrays = decodeArrays(buffer, manifest.arrays);
+  const names = manifest.regions.names;
+  const pick = (key, digits) => Array.from(arrays[key], (value) => roundTo(value, digits));
+
+  const regions = names.map((region, i) => ({
+    region,
+    lat: roundTo(arrays["regions.lat"][i], 2),
+    lon: roundTo(arrays["regions.lon"][i], 2),
+    activityMean: roundTo(arrays["regions.activityMean"][i], 3),
+    activityMax: roundTo(arrays["regions.activityMax"][i], 3),
+    sstMean: roundTo(arrays["regions.sstMean"][i], 2),
+    chlorMean: roundTo(arrays["regions.chlorMean"][i], 3),
+    sampleCount: arrays["regions.sampleCount"][i],
+    isCustom: arrays["regions.isCustom"][i] === 1
+  }));
+
+  const { offsets } = manifest.timeSeries;
+  const dates = Array.from(arrays["timeSeries.date"], (day) => new Date(day * DAY_MS).toISOString().slice(0, 10));
+  const activity = pick("timeSeries.activity", 3);
+  const sst = pick("timeSeries.sst", 2);
+  const chlorophyll = pick("timeSeries.chlorophyll", 3);
+  const timeSeries = {};
+  names.forEach((region, i) => {
+    const [start, end] = [offsets[i], offsets[i + 1]];
+    if (end > start) {
+      timeSeries[region] = {
+        date: dates.slice(start, end),
+        activity: activity.slice(start, end),
+        sst: sst.slice(start, end),
+        chlorophyll: chlorophyll.slice(start, end)
+      };
+    }
+  });
+
+  const scatter = {
+    sst: pick("scatter.sst", 2),
+    chlorophyll: pick("scatter.chlorophyll", 3),
+    activity: pick("scatter.activity", 3),
+    region: Array.from(arrays["scatter.region"], (code) => names[code]),
+    isCustom: Array.from(arrays["scatter.isCustom"], (flag) => flag === 1)
+  };
+
+  return {
+    generatedAt: manifest.generatedAt,
+    formulas: manifest.formulas,
+    regions,
+    timeSeries,
+    scatter,
+    hotspots: manifest.hotspots
+  };
+}
+
+export async function loadSharkModelDashboard(baseUrl = DEFAULT_BASE_URL) {
+  const manifestResponse = await fetch(`${baseUrl}.json`);
+  if (!manifestResponse.ok) throw new Error(`${baseUrl}.json: HTTP ${manifestResponse.status}`);
+  const manifest = await manifestResponse.json();
+  const bufferUrl = new URL(manifest.buffer.file, new URL(`${baseUrl}.json`, window.location.href));
+  const bufferResponse = await fetch(bufferUrl);
+  if (!bufferResponse.ok) throw new Error(`${bufferUrl}: HTTP ${bufferResponse.status}`);
+  const buffer = await bufferResponse.arrayBuffer();
+  return decodeSharkModelPayload(manifest, buffer);
+}
@@ -0,0 +1,65 @@
+// Runtime loader for the shark model dashboard.
+// Prefers the per-region shards served by /api/shark-model (`--format shards`),
+// then the typed-array payload (`--format binary`), and only falls back to the
+// bundled sharkModelDashboard.json (a separate chunk) when neither was generated.
+
+import { loadSharkModelDashboard } from "./sharkModelBinary";
+
+const SHARD_API = "/api/shark-model";
+export const BASE_POINTS = 32;
+
+async function fetchJson(url) {
+  const response = await fetch(url);
+  if (!response.ok) throw new Error(`${url}: HTTP ${response.status}`);
+  return response.json();
+}
+
+export function topRegions(regions, count = 3) {
+  return regions
+    .slice()
+    .sort((a, b) => b.activityMean - a.activityMean)
+    .slice(0, count)
+    .map((item) => item.region);
+}
+
+// Coarsest level that still shows about BASE_POINTS samples in the visible fraction of the series
+export function pickLevel(levels, visibleFraction) {
+  const sorted = [...levels].sort((a, b) => a - b);
+  return sorted.find((level) => level * visibleFraction >= sorted[0]) ?? sorted[sorted.length - 1];
+}
+
+export async function loadRegionSeries(region, points = BASE_POINTS) {
+  const level = await fetchJson(`${SHARD_API}/${encodeURIComponent(region)}?points=${points}`);
+  return level.timeSeries;
+}
+
+async function loadFromShards() {
+  const index = await fetchJson(SHARD_API);
+  const selected = topRegions(index.regions);
+  const series = await Promise.all(selected.map((region) => loadRegionSeries(region)));
+  return {
+    source: "shards",
+    levels: index.levels ?? [BASE_POINTS],
+    generatedAt: index.generatedAt,
+    formulas: index.formulas,
+    regions: index.regions,
+    timeSeries: Object.fromEntries(selected.map((region, i) => [region, series[i]])),
+    scatter: index.scatter,
+    hotspots: index.hotspots
+  };
+}
+
+export async function loadSharkModel() {
+  try {
+    return await loadFromShards();
+  } catch (error) {
+    console.info("Shark model shards unavailable, trying the binary payload", error);
+  }
+  try {
+    return { source: "binary", ...(await loadSharkModelDashboard()) };
+  } catch (error) {
+    console.info("Binary shark model payload unavailable, using the bundled JSON", error);
+  }
+  const bundled = await import("./sharkModelDashboard.json");
+  return { source: "bundled", ...bundled.default };
+}